@@ -0,0 +1,323 @@
+import os
+import re
+import gzip
+import json
+import hashlib
+import logging
+
+from recipe_parser import find_recipes_array, scan_array
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# Set up logging
+logging.basicConfig(level=logging.INFO)
+
+OUTPUT_DIR = "dist"
+ASSET_DIR = "assets"
+MANIFEST_NAME = "manifest.json"
+
+# Precompressed siblings are only worth serving above this size
+MIN_COMPRESS_SIZE = 1024
+
+_STYLE = re.compile(r"[ \t]*<style>(.*?)</style>[ \t]*\n?", re.DOTALL)
+_SCRIPT = re.compile(r"[ \t]*<script>(.*?)</script>[ \t]*\n?", re.DOTALL)
+_HTML_COMMENT = re.compile(r"<!--(?!\[).*?-->", re.DOTALL)
+
+_CSS_TOKENS = re.compile(r"""("(?:\\.|[^"\\])*"|'(?:\\.|[^'\\])*')|/\*.*?\*/|\s+""", re.DOTALL)
+_CSS_TIGHT = re.compile(r"\s*([{};,>])\s*|:\s+")
+_CSS_LAST_SEMICOLON = re.compile(r";}")
+
+# A '/' after one of these starts a regular expression literal rather than a division
+_REGEX_AFTER = set("(,=:[!&|?{};+-*%<>~^")
+_REGEX_KEYWORDS = ("return", "typeof", "case", "in", "of", "void", "delete", "throw", "new")
+
+# Whitespace next to these never separates two tokens
+_JS_PUNCT = set("{}()[];,:=<>+-*/%!&|?^~.")
+
+# A line break after these (or before these) cannot end a statement, so it is safe to drop
+_NO_ASI_AFTER = set("{;,([")
+_NO_ASI_BEFORE = set("})];,.")
+
+def minify_css(css):
+    """Strip comments and needless whitespace from a stylesheet, leaving strings alone."""
+    out = []
+    pos = 0
+    for match in _CSS_TOKENS.finditer(css):
+        out.append(css[pos:match.start()])
+        if match.group(1):
+            out.append(match.group(1))
+        elif not match.group(0).startswith("/*"):
+            out.append(" ")
+        pos = match.end()
+    out.append(css[pos:])
+
+    # Strings were kept verbatim above; tighten only the text between them
+    parts = re.split(r"""("(?:\\.|[^"\\])*"|'(?:\\.|[^'\\])*')""", "".join(out))
+    for i in range(0, len(parts), 2):
+        text = _CSS_TIGHT.sub(lambda m: m.group(1) or ":", parts[i])
+        parts[i] = _CSS_LAST_SEMICOLON.sub("}", text)
+    return "".join(parts).strip() + "\n"
+
+def _skip_string(js, pos, quote):
+    """Return the index just past the string literal whose opening quote is at pos."""
+    pos += 1
+    while pos < len(js):
+        char = js[pos]
+        if char == "\\":
+            pos += 2
+            continue
+        pos += 1
+        if char == quote:
+            return pos
+    return pos
+
+def _skip_regex(js, pos):
+    """Return the index just past the regular expression literal (and flags) starting at pos."""
+    pos += 1
+    in_class = False
+    while pos < len(js):
+        char = js[pos]
+        if char == "\\":
+            pos += 2
+            continue
+        pos += 1
+        if char == "[":
+            in_class = True
+        elif char == "]":
+            in_class = False
+        elif char == "/" and not in_class:
+            break
+    while pos < len(js) and (js[pos].isalnum() or js[pos] == "_"):
+        pos += 1
+    return pos
+
+def _regex_allowed(out):
+    """True when a '/' following the emitted code would start a regex literal."""
+    text = "".join(out[-3:]).rstrip()
+    if not text:
+        return True
+    if text[-1] in _REGEX_AFTER:
+        return True
+    word = re.search(r"[A-Za-z_$]+$", text)
+    return bool(word) and word.group(0) in _REGEX_KEYWORDS
+
+def minify_js(js):
+    """Strip comments, indentation and blank lines from a script.
+
+    This is deliberately conservative: strings, template literals and regex
+    literals are copied verbatim, and line breaks are only dropped where they
+    cannot end a statement, so automatic semicolon insertion is unaffected.
+    """
+    out = []
+    pending = ""     # whitespace seen since the last token: "", " " or "\n"
+    stack = []       # open template literals, as brace depth inside their ${...}
+    pos = 0
+    end = len(js)
+
+    def flush(next_char):
+        if not pending or not out:
+            return
+        prev = out[-1][-1]
+        if pending == "\n" and prev not in _NO_ASI_AFTER and next_char not in _NO_ASI_BEFORE:
+            out.append("\n")
+        elif prev in "+-" and next_char in "+-":
+            out.append(" ")
+        elif prev not in _JS_PUNCT and next_char not in _JS_PUNCT:
+            out.append(" ")
+
+    def copy_template(pos):
+        # Copy template text up to the closing backtick or the next ${
+        start = pos
+        while pos < end:
+            char = js[pos]
+            if char == "\\":
+                pos += 2
+                continue
+            if char == "`":
+                stack.pop()
+                out.append(js[start:pos + 1])
+                return pos + 1
+            if char == "$" and pos + 1 < end and js[pos + 1] == "{":
+                stack[-1] = 1
+                out.append(js[start:pos + 2])
+                return pos + 2
+            pos += 1
+        out.append(js[start:])
+        return end
+
+    while pos < end:
+        char = js[pos]
+        if char in " \t\r\n\f\v":
+            if char == "\n" or pending == "\n":
+                pending = "\n"
+            else:
+                pending = " "
+            pos += 1
+            continue
+        if char == "/" and js.startswith("//", pos):
+            newline = js.find("\n", pos)
+            pos = end if newline == -1 else newline
+            continue
+        if char == "/" and js.startswith("/*", pos):
+            close = js.find("*/", pos + 2)
+            close = end if close == -1 else close + 2
+            if "\n" in js[pos:close]:
+                pending = "\n"
+            elif not pending:
+                pending = " "
+            pos = close
+            continue
+
+        flush(char)
+        pending = ""
+        if char in "'\"":
+            stop = _skip_string(js, pos, char)
+            out.append(js[pos:stop])
+            pos = stop
+        elif char == "`":
+            out.append("`")
+            stack.append(0)
+            pos = copy_template(pos + 1)
+        elif char == "/" and _regex_allowed(out):
+            stop = _skip_regex(js, pos)
+            out.append(js[pos:stop])
+            pos = stop
+        elif char == "{" and stack and stack[-1]:
+            stack[-1] += 1
+            out.append(char)
+            pos += 1
+        elif char == "}" and stack and stack[-1]:
+            stack[-1] -= 1
+            out.append(char)
+            pos += 1
+            if stack[-1] == 0:
+                pos = copy_template(pos)
+        else:
+            out.append(char)
+            pos += 1
+    return "".join(out) + "\n"
+
+def minify_html(document):
+    """Drop comments and indentation from the page shell."""
+    document = _HTML_COMMENT.sub("", document)
+    lines = (line.strip() for line in document.splitlines())
+    return "\n".join(line for line in lines if line) + "\n"
+
+def fingerprint(name, data):
+    """Return name with a content hash before its extension: app.css -> app.1a2b3c4d5e.css."""
+    stem, ext = os.path.splitext(name)
+    return f"{stem}.{hashlib.sha1(data).hexdigest()[:10]}{ext}"
+
+def split_page(html_file: str = "index.html"):
+    """Split the page into its shell, stylesheet, recipe data and application script.
+
+    The shell keeps STYLE and SCRIPT markers where the inline blocks were.
+    """
+    with open(html_file, 'r', encoding='utf-8') as f:
+        document = f.read()
+
+    style = _STYLE.search(document)
+    script = _SCRIPT.search(document)
+    if not style or not script:
+        raise ValueError(f"{html_file} has no inline <style> or <script> block to split out")
+
+    code = script.group(1)
+    buf = code.encode("utf-8")
+    start = find_recipes_array(buf)
+    stop = scan_array(buf, start, len(buf))[0]
+    declaration = buf.rfind(b"const", 0, start)
+    if buf[stop:stop + 1] == b";":
+        stop += 1
+    data = "const recipes = " + buf[start:stop].decode("utf-8").rstrip(";") + ";"
+    app = (buf[:declaration] + buf[stop:]).decode("utf-8")
+
+    shell = (document[:style.start()] + "<!--STYLE-->\n" + document[style.end():script.start()]
+             + "<!--SCRIPT-->\n" + document[script.end():])
+    return shell, style.group(1), data, app
+
+def _write_compressed(path, data):
+    """Write data with .gz (and .br when brotli is installed) siblings; return the written paths."""
+    written = [path]
+    with open(path, 'wb') as f:
+        f.write(data)
+    if len(data) < MIN_COMPRESS_SIZE:
+        return written
+    with open(path + ".gz", 'wb') as f:
+        # mtime=0 keeps the archive byte-identical across builds
+        f.write(gzip.compress(data, compresslevel=9, mtime=0))
+    written.append(path + ".gz")
+    if brotli is not None:
+        with open(path + ".br", 'wb') as f:
+            f.write(brotli.compress(data, quality=11))
+        written.append(path + ".br")
+    return written
+
+def build_bundle(html_file: str = "index.html", output_dir: str = OUTPUT_DIR):
+    """Write a fingerprinted, precompressed asset bundle for the page into output_dir.
+
+    The inline CSS, recipe data and application script become minified
+    files under assets/ named by their content hash, and the page shell
+    links to them. Identical content always gets the same name, so
+    unchanged assets are left untouched between builds. Assets from the
+    previous build are kept so pages already in flight can finish loading;
+    anything older is deleted. Returns the manifest.
+    """
+    asset_dir = os.path.join(output_dir, ASSET_DIR)
+    os.makedirs(asset_dir, exist_ok=True)
+    manifest_path = os.path.join(output_dir, MANIFEST_NAME)
+    try:
+        with open(manifest_path, 'r', encoding='utf-8') as f:
+            previous = json.load(f)
+    except (OSError, ValueError):
+        previous = {}
+
+    shell, css, data, app = split_page(html_file)
+    sources = {
+        "app.css": minify_css(css),
+        "recipes.js": minify_js(data),
+        "app.js": minify_js(app),
+    }
+
+    assets = {}
+    sizes = {}
+    for name, text in sources.items():
+        body = text.encode("utf-8")
+        hashed = fingerprint(name, body)
+        path = os.path.join(asset_dir, hashed)
+        if not os.path.exists(path):
+            _write_compressed(path, body)
+        assets[name] = f"{ASSET_DIR}/{hashed}"
+        sizes[name] = len(body)
+
+    shell = shell.replace("<!--STYLE-->", f'<link rel="stylesheet" href="{assets["app.css"]}" />')
+    shell = shell.replace(
+        "<!--SCRIPT-->",
+        f'<script defer src="{assets["recipes.js"]}"></script>\n<script defer src="{assets["app.js"]}"></script>',
+    )
+    page = minify_html(shell).encode("utf-8")
+    _write_compressed(os.path.join(output_dir, "index.html"), page)
+    sizes["index.html"] = len(page)
+
+    keep = {os.path.basename(path) for path in assets.values()}
+    keep.update(os.path.basename(path) for path in previous.get("assets", {}).values())
+    for name in os.listdir(asset_dir):
+        if name.split(".gz")[0].split(".br")[0] not in keep:
+            os.remove(os.path.join(asset_dir, name))
+
+    manifest = {"assets": assets, "sizes": sizes, "brotli": brotli is not None}
+    with open(manifest_path, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=1, sort_keys=True)
+
+    original = os.path.getsize(html_file)
+    logging.info(f"✓ Bundled {html_file} ({original} bytes) into {len(assets)} assets, "
+                 f"{sum(sizes.values())} bytes minified")
+    return manifest
+
+if __name__ == "__main__":
+    print("Building the asset bundle...")
+    manifest = build_bundle()
+    for name, path in sorted(manifest["assets"].items()):
+        print(f"  {name} -> {path} ({manifest['sizes'][name]} bytes)")
@@ -1,80 +1,63 @@
-import re
 import json
 import logging
 
+from recipe_mmap import field_text, patch_recipes, replace_field
+from recipe_models import Nutrition
+from recipe_snapshot import load_recipes
+
 # Set up logging
 logging.basicConfig(level=logging.INFO)
 
 def clean_nutrition_data(html_file: str = "index.html"):
     """Clean up existing nutrition data to have proper integer values."""
     
-    with open(html_file, 'r', encoding='utf-8') as f:
-        content = f.read()
+    found = 0
     
-    def clean_nutrition_match(match):
-        """Clean up a single nutrition data match."""
-        full_match = match.group(0)
-        nutrition_str = match.group(1)
+    def clean_nutrition_field(buf, start, end, fields):
+        """Clean up a single nutrition data field."""
+        nonlocal found
+        nutrition_str = field_text(buf, fields, "nutrition")
+        if nutrition_str is None:
+            return None
+        found += 1
         
         try:
             # Parse the nutrition JSON
-            nutrition_data = json.loads(nutrition_str)
-            
-            # Clean up the values - round to reasonable precision
-            cleaned_nutrition = {
-                "calories": round(nutrition_data.get("calories", 0)),
-                "protein": round(nutrition_data.get("protein", 0), 1),
-                "carbs": round(nutrition_data.get("carbs", 0), 1),
-                "fat": round(nutrition_data.get("fat", 0), 1),
-                "fiber": round(nutrition_data.get("fiber", 0), 1),
-                "sugar": round(nutrition_data.get("sugar", 0), 1),
-                "sodium": round(nutrition_data.get("sodium", 0)),
-                "servings": nutrition_data.get("servings", 1)
-            }
-            
-            # Convert back to JSON string
-            cleaned_str = json.dumps(cleaned_nutrition).replace('"', '\\"')
-            
-            # Replace the nutrition part in the full match
-            return full_match.replace(nutrition_str, cleaned_str)
-            
+            nutrition = Nutrition.from_json(nutrition_str)
         except json.JSONDecodeError as e:
             logging.error(f"Failed to parse nutrition data: {nutrition_str}")
-            return full_match
-    
-    # Find all nutrition data and clean it
-    nutrition_pattern = r'nutrition:\s*"([^"]+)"'
-    
-    # Replace all nutrition data with cleaned versions
-    cleaned_content = re.sub(nutrition_pattern, clean_nutrition_match, content)
+            return None
+        
+        # Clean up the values - round to reasonable precision and convert back to JSON string with proper escaping
+        edit = replace_field(fields, "nutrition", nutrition.to_embedded_json())
+        
+        # Leave entries that are already clean untouched
+        if buf[edit[0]:edit[1]] == edit[2]:
+            return None
+        return [edit]
     
-    # Write back to file
-    with open(html_file, 'w', encoding='utf-8') as f:
-        f.write(cleaned_content)
+    # Replace all nutrition data with cleaned versions; unchanged text is streamed straight from the mapped file
+    changed = patch_recipes(html_file, clean_nutrition_field)
     
-    logging.info("Cleaned up all nutrition data in the HTML file")
+    logging.info(f"Cleaned up {changed} of {found} nutrition entries in the HTML file")
 
 def get_sample_nutrition():
     """Get a sample of current nutrition data to show the improvement."""
     
-    with open("index.html", 'r', encoding='utf-8') as f:
-        content = f.read()
-    
-    # Find first few nutrition entries
-    nutrition_pattern = r'nutrition:\s*"([^"]+)"'
-    matches = re.findall(nutrition_pattern, content)
+    # Find first few nutrition entries in the parsed snapshot
+    samples = [recipe.nutrition for recipe in load_recipes("index.html") if recipe.nutrition]
     
     print("Sample of current nutrition data:")
-    for i, match in enumerate(matches[:3]):
+    for i, nutrition in enumerate(samples[:3]):
         try:
-            data = json.loads(match)
+            data = nutrition.to_dict()
             print(f"\nRecipe {i+1}:")
             print(f"  Calories: {data.get('calories', 'N/A')}")
             print(f"  Protein: {data.get('protein', 'N/A')}g")
             print(f"  Carbs: {data.get('carbs', 'N/A')}g")
             print(f"  Fat: {data.get('fat', 'N/A')}g")
         except:
-            print(f"  Raw data: {match}")
+            print(f"  Raw data: {nutrition}")
 
 if __name__ == "__main__":
     print("Cleaning up nutrition data...")
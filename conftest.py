@@ -0,0 +1 @@
+# The modules live at the top of the repository; this file makes pytest put it on sys.path for tests/
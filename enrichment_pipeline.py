@@ -0,0 +1,261 @@
+import os
+import json
+import time
+import hashlib
+import logging
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+from memo_cache import cache_report
+from nutrition_analyzer import NUTRITION_PROMPT
+from nutrition_tiers import estimate_tiered
+from recipe_diff import field_bytes
+from recipe_ids import ingest, recipe_key, record_key
+from recipe_mmap import insert_field, patch_recipes, replace_field, string_literal
+from recipe_models import Nutrition
+from recipe_snapshot import CACHE_DIR, load_recipes
+from simple_images import get_food_image_url
+
+# Set up logging
+logging.basicConfig(level=logging.INFO)
+
+# Bump when stored stage state can no longer be trusted
+PIPELINE_VERSION = 1
+
+class Stage:
+    """One step of the enrichment DAG.
+
+    run(recipes, positions) updates the listed recipes in memory and returns
+    the positions it succeeded on, or None when all of them succeeded. reads
+    names the recipe fields that make up a recipe's input fingerprint;
+    writes names the fields the stage fills in, which are written back to
+    index.html at the end. after lists stages that must finish first.
+    With keep_existing, recipes the stage has no record of are left alone
+    when their written fields are already filled (e.g. by an older script).
+    Bump version when run changes in a way that should redo every recipe.
+    """
+
+    def __init__(self, name, run, reads, writes, after=(), keep_existing=False, version=1):
+        self.name = name
+        self.run = run
+        self.reads = tuple(reads)
+        self.writes = tuple(writes)
+        self.after = tuple(after)
+        self.keep_existing = keep_existing
+        self.version = version
+
+    def input_digest(self, recipe):
+        digest = hashlib.blake2b(f"{self.name}:{self.version}".encode("utf-8"), digest_size=8)
+        for name in self.reads:
+            data = field_bytes(recipe, name)
+            digest.update(len(data).to_bytes(4, "little"))
+            digest.update(data)
+        return digest.hexdigest()
+
+    def __repr__(self):
+        return f"Stage({self.name!r})"
+
+def estimate_nutrition_stage(recipes, positions):
+    """Cheapest-first nutrition estimates (see nutrition_tiers)."""
+    chosen = [recipes[position] for position in positions]
+    succeeded = []
+    for position, nutrition in zip(positions, estimate_tiered(chosen, NUTRITION_PROMPT)):
+        if nutrition:
+            recipes[position].nutrition = nutrition
+            succeeded.append(position)
+    return succeeded
+
+def clean_nutrition_stage(recipes, positions):
+    """Round nutrition to the stored precision, as clean_precision.py and fix_nutrition_precision.py did."""
+    for position in positions:
+        nutrition = recipes[position].nutrition
+        if nutrition is not None:
+            recipes[position].nutrition = Nutrition.from_dict(nutrition.to_dict())
+
+def resolve_images_stage(recipes, positions):
+    """Pick an image URL for recipes that have none, as simple_images.py does."""
+    for position in positions:
+        recipe = recipes[position]
+        if not recipe.image:
+            recipe.image = get_food_image_url(recipe.title) or ""
+    return [position for position in positions if recipes[position].image]
+
+# The production sequence: nutrition, then cleanup; images run alongside both
+STAGES = (
+    Stage("nutrition", estimate_nutrition_stage, reads=("title", "ingredients", "method"), writes=("nutrition",),
+          keep_existing=True),
+    Stage("clean", clean_nutrition_stage, reads=("nutrition",), writes=("nutrition",), after=("nutrition",)),
+    Stage("images", resolve_images_stage, reads=("title", "category"), writes=("image",), keep_existing=True),
+)
+
+def _rewrites_input(stage):
+    return not set(stage.reads).isdisjoint(stage.writes)
+
+def _has_output(recipe, stage):
+    return all(getattr(recipe, name) for name in stage.writes)
+
+def check_stages(stages):
+    """Return stages in a dependency order; raises ValueError for unknown dependencies or cycles."""
+    by_name = {stage.name: stage for stage in stages}
+    if len(by_name) != len(stages):
+        raise ValueError("Stage names must be unique")
+    ordered = []
+    state = {}
+
+    def visit(stage, path):
+        if state.get(stage.name) == "done":
+            return
+        if state.get(stage.name) == "visiting":
+            raise ValueError(f"Stage cycle: {' -> '.join(path + [stage.name])}")
+        state[stage.name] = "visiting"
+        for dependency in stage.after:
+            if dependency not in by_name:
+                raise ValueError(f"Stage {stage.name!r} depends on unknown stage {dependency!r}")
+            visit(by_name[dependency], path + [stage.name])
+        state[stage.name] = "done"
+        ordered.append(stage)
+
+    for stage in stages:
+        visit(stage, [])
+    return ordered
+
+def state_path(html_file: str = "index.html"):
+    """Return where per-stage input fingerprints for html_file are stored."""
+    directory, name = os.path.split(os.path.abspath(html_file))
+    return os.path.join(directory, CACHE_DIR, name + ".pipeline.json")
+
+def _load_state(path):
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    return data.get("stages", {}) if data.get("version") == PIPELINE_VERSION else {}
+
+def _save_state(path, stages_state):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump({"version": PIPELINE_VERSION, "stages": stages_state}, f, separators=(",", ":"))
+    os.replace(tmp_path, path)
+
+def run_stage(stage, recipes, seen):
+    """Run stage on the recipes whose input fingerprint changed; returns (state, redone count)."""
+    digests = [stage.input_digest(recipe) for recipe in recipes]
+    keys = [recipe_key(recipe) for recipe in recipes]
+    todo = []
+    for position, (recipe, key, digest) in enumerate(zip(recipes, keys, digests)):
+        previous = seen.get(key)
+        if previous == digest:
+            continue
+        if previous is None and stage.keep_existing and _has_output(recipe, stage):
+            continue
+        todo.append(position)
+
+    failed = set()
+    if todo:
+        succeeded = stage.run(recipes, todo)
+        if succeeded is not None:
+            failed = set(todo).difference(succeeded)
+        if _rewrites_input(stage):
+            # Fingerprint what the stage left behind, or its own output would look like new input next run
+            for position in todo:
+                digests[position] = stage.input_digest(recipes[position])
+    # Failures are recorded with an empty digest, which never matches, so the next run
+    # retries them even though an older value of the written field is still there
+    state = {
+        key: "" if position in failed else digest
+        for position, (key, digest) in enumerate(zip(keys, digests))
+    }
+    return state, len(todo)
+
+def _field_text(recipe, name):
+    if name == "nutrition":
+        return recipe.nutrition.to_embedded_json() if recipe.nutrition is not None else ""
+    return getattr(recipe, name)
+
+def materialize(recipes, fields, html_file: str = "index.html"):
+    """Write the given fields of every recipe back to html_file in one pass; returns how many changed."""
+    by_key = {recipe_key(recipe): recipe for recipe in recipes}
+
+    def patch(buf, start, end, record_fields):
+        recipe = by_key.get(record_key(buf, record_fields))
+        if recipe is None:
+            return None
+        edits = []
+        inserted = b""
+        for name in fields:
+            text = _field_text(recipe, name)
+            if not text:
+                continue
+            if name in record_fields:
+                edit = replace_field(record_fields, name, text)
+                if buf[edit[0]:edit[1]] != edit[2]:
+                    edits.append(edit)
+            elif not inserted:
+                position, _, inserted = insert_field(buf, end, name, text)
+            else:
+                inserted += f", {name}: ".encode("ascii") + string_literal(text)
+        if inserted:
+            edits.append((position, position, inserted))
+        return sorted(edits) or None
+
+    return patch_recipes(html_file, patch)
+
+def run_pipeline(html_file: str = "index.html", stages=STAGES, workers: int = None):
+    """Run every stage whose inputs changed, in dependency order, and write index.html once.
+
+    Stages whose dependencies are done run in parallel threads (the slow
+    ones wait on the network). A failed stage is logged, its dependents are
+    skipped, and whatever the other stages produced is still written.
+    Returns {stage name: status} with status "ran N", "up to date", "failed"
+    or "blocked".
+    """
+    stages = check_stages(list(stages))
+    # Stage state and the write-back are keyed by stable id, so stamp missing ones first
+    ingest(html_file)
+    recipes = load_recipes(html_file)
+    path = state_path(html_file)
+    previous_state = _load_state(path)
+    new_state = {}
+    report = {}
+
+    pending = {stage.name: stage for stage in stages}
+    running = {}
+    with ThreadPoolExecutor(max_workers=workers or len(stages)) as pool:
+        while pending or running:
+            for name, stage in list(pending.items()):
+                if any(report.get(dependency) in ("failed", "blocked") for dependency in stage.after):
+                    report[name] = "blocked"
+                    del pending[name]
+                elif all(dependency in new_state for dependency in stage.after):
+                    logging.info(f"Starting stage {name}")
+                    future = pool.submit(run_stage, stage, recipes, previous_state.get(name, {}))
+                    running[future] = (stage, time.perf_counter())
+                    del pending[name]
+            if not running:
+                continue
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                stage, started = running.pop(future)
+                try:
+                    new_state[stage.name], redone = future.result()
+                except Exception:
+                    logging.exception(f"Stage {stage.name} failed")
+                    report[stage.name] = "failed"
+                    continue
+                report[stage.name] = f"ran {redone}" if redone else "up to date"
+                logging.info(f"Stage {stage.name}: {report[stage.name]} ({time.perf_counter() - started:.1f}s)")
+
+    fields = [name for stage in stages if stage.name in new_state for name in stage.writes]
+    changed = materialize(recipes, list(dict.fromkeys(fields)), html_file) if fields else 0
+    logging.info(f"Wrote {changed} changed recipes to {html_file}")
+    # Saved only after the HTML holds the results, so a crash redoes the work instead of losing it
+    _save_state(path, dict(previous_state, **new_state))
+    for line in cache_report():
+        logging.info(line)
+    return report
+
+if __name__ == "__main__":
+    print("Running the enrichment pipeline (nutrition -> clean, images)...")
+    for name, status in run_pipeline().items():
+        print(f"  {name}: {status}")
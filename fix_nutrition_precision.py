@@ -1,73 +1,53 @@
-import re
 import json
 
+from recipe_mmap import field_text, patch_recipes, replace_field
+from recipe_models import Nutrition
+from recipe_snapshot import load_recipes
+
 def fix_nutrition_precision(html_file: str = "index.html"):
     """Fix floating point precision issues in nutrition data."""
     
-    with open(html_file, 'r', encoding='utf-8') as f:
-        content = f.read()
+    found = 0
     
-    def fix_precision_match(match):
-        """Fix precision in a single nutrition data match."""
-        full_match = match.group(0)
-        nutrition_str = match.group(1)
+    def fix_precision_field(buf, start, end, fields):
+        """Fix precision in a single nutrition data field."""
+        nonlocal found
+        nutrition_str = field_text(buf, fields, "nutrition")
+        if nutrition_str is None:
+            return None
+        found += 1
         
         try:
             # Parse the nutrition JSON
-            nutrition_data = json.loads(nutrition_str)
-            
-            # Fix precision issues
-            fixed_nutrition = {
-                "calories": int(round(nutrition_data.get("calories", 0))),
-                "protein": round(nutrition_data.get("protein", 0), 1),
-                "carbs": round(nutrition_data.get("carbs", 0), 1),
-                "fat": round(nutrition_data.get("fat", 0), 1),
-                "fiber": round(nutrition_data.get("fiber", 0), 1),
-                "sugar": round(nutrition_data.get("sugar", 0), 1),
-                "sodium": int(round(nutrition_data.get("sodium", 0))),
-                "servings": int(nutrition_data.get("servings", 1))
-            }
-            
-            # Convert back to JSON string with proper escaping
-            fixed_str = json.dumps(fixed_nutrition).replace('"', '\\"')
-            
-            # Replace the nutrition part in the full match
-            return full_match.replace(nutrition_str, fixed_str)
-            
+            nutrition = Nutrition.from_json(nutrition_str)
         except json.JSONDecodeError as e:
             print(f"Failed to parse nutrition data: {nutrition_str}")
-            return full_match
-    
-    # Find all nutrition data and fix precision
-    nutrition_pattern = r'nutrition:\s*"([^"]+)"'
-    
-    # Count how many we're fixing
-    matches = re.findall(nutrition_pattern, content)
-    print(f"Found {len(matches)} nutrition entries to fix")
-    
-    # Replace all nutrition data with fixed versions
-    fixed_content = re.sub(nutrition_pattern, fix_precision_match, content)
+            return None
+        
+        # Fix precision issues and convert back to JSON string with proper escaping
+        edit = replace_field(fields, "nutrition", nutrition.to_embedded_json())
+        
+        # Leave entries that are already clean untouched
+        if buf[edit[0]:edit[1]] == edit[2]:
+            return None
+        return [edit]
     
-    # Write back to file
-    with open(html_file, 'w', encoding='utf-8') as f:
-        f.write(fixed_content)
+    # Replace all nutrition data with fixed versions; unchanged text is streamed straight from the mapped file
+    changed = patch_recipes(html_file, fix_precision_field)
+    print(f"Found {found} nutrition entries to fix")
     
-    print("Fixed all nutrition precision issues!")
+    print(f"Fixed nutrition precision issues in {changed} recipes!")
 
 def show_sample_before_after():
     """Show a sample of the fixes."""
     
-    with open("index.html", 'r', encoding='utf-8') as f:
-        content = f.read()
-    
-    # Find first few nutrition entries
-    nutrition_pattern = r'nutrition:\s*"([^"]+)"'
-    matches = re.findall(nutrition_pattern, content)
+    # Find first few nutrition entries in the parsed snapshot
+    samples = [recipe.nutrition for recipe in load_recipes("index.html") if recipe.nutrition]
     
     print("\nSample of fixed nutrition data:")
-    for i, match in enumerate(matches[:3]):
+    for i, nutrition in enumerate(samples[:3]):
         try:
-            data = json.loads(match)
+            data = nutrition.to_dict()
             print(f"\nRecipe {i+1}:")
             print(f"  Calories: {data.get('calories', 'N/A')}")
             print(f"  Protein: {data.get('protein', 'N/A')}g")
@@ -0,0 +1,240 @@
+import json
+import asyncio
+import hashlib
+import logging
+from collections import Counter, deque
+
+from llm_response import ResponseError, parse_nutrition_response
+from memo_cache import BoundedCache
+from openai_client import DEFAULT_TIMEOUT, AsyncOpenAIClient, OpenAIError
+from recipe_models import Nutrition
+
+# Set up logging
+logging.basicConfig(level=logging.INFO)
+
+DEFAULT_MODEL = "gpt-4"
+
+# Requests in flight at once; the client's retries handle rate limiting
+DEFAULT_CONCURRENCY = 4
+
+# Hedging: a duplicate goes out once a call outlives this percentile of recent call latencies
+HEDGE_PERCENTILE = 90
+
+# Duplicates allowed, as a fraction of the calls made so far
+HEDGE_BUDGET = 0.1
+
+# Latencies remembered, and needed before the first hedge
+LATENCY_WINDOW = 100
+MIN_LATENCY_SAMPLES = 10
+
+# Model answers kept in memory, keyed by the fingerprint of the request that produced them
+ANSWER_CACHE_ENTRIES = 10000
+ANSWER_CACHE_BYTES = 8 << 20
+
+ANSWER_CACHE = BoundedCache("model_answers", ANSWER_CACHE_ENTRIES, ANSWER_CACHE_BYTES)
+
+def build_payload(recipe, config):
+    """Return the chat completion request for one recipe.
+
+    config is a dict with "system" and "prompt" texts, "temperature" and
+    "max_tokens", and optionally "model" and a "validate" callable. The prompt
+    is formatted with title, ingredients and method.
+    """
+    prompt = config["prompt"].format(
+        title=recipe.title,
+        ingredients=", ".join(recipe.ingredients),
+        method=recipe.method.label,
+    )
+    return {
+        "model": config.get("model", DEFAULT_MODEL),
+        "messages": [
+            {"role": "system", "content": config["system"]},
+            {"role": "user", "content": prompt},
+        ],
+        "temperature": config["temperature"],
+        "max_tokens": config["max_tokens"],
+    }
+
+def request_key(payload):
+    """Return the fingerprint a chat request's answer is cached under."""
+    data = json.dumps(payload, sort_keys=True, ensure_ascii=False).encode("utf-8")
+    return hashlib.blake2b(data, digest_size=16).digest()
+
+def _cache_keys(recipes, config):
+    # Repeats of one request in a batch are separate samples, so each gets its own entry
+    seen = Counter()
+    keys = []
+    for recipe in recipes:
+        key = request_key(build_payload(recipe, config))
+        seen[key] += 1
+        keys.append((key, seen[key]))
+    return keys
+
+async def estimate_nutrition(client, recipe, config, timeout=DEFAULT_TIMEOUT):
+    """Ask the model for one recipe's nutrition; returns a Nutrition or None on any failure."""
+    try:
+        content = await client.chat(build_payload(recipe, config), timeout)
+    except OpenAIError as e:
+        logging.error(f"API request failed for {recipe.title}: {e}")
+        return None
+
+    try:
+        nutrition_data, issues = parse_nutrition_response(content)
+    except ResponseError as e:
+        logging.error(f"Failed to parse response for {recipe.title} ({e.code}): {e} in {content[:200]!r}")
+        return None
+    if issues:
+        logging.debug(f"Defaulted fields for {recipe.title}: {[issue.field for issue in issues]}")
+
+    validate = config.get("validate")
+    if validate is not None and not validate(nutrition_data):
+        logging.warning(f"Got unrealistic values for {recipe.title}: {nutrition_data}")
+        return None
+    return Nutrition.from_dict(nutrition_data)
+
+class Hedger:
+    """Issues a duplicate of a call that runs past the recent p90 latency.
+
+    The first valid (non-None) answer wins and the other call is cancelled.
+    Duplicates are capped at budget times the number of calls, so a slow
+    API cannot double the load. hedges, hedge_wins and denied count what
+    happened; win_rate is the share of duplicates that beat the original.
+    """
+
+    def __init__(self, percentile=HEDGE_PERCENTILE, budget=HEDGE_BUDGET, window=LATENCY_WINDOW,
+                 min_samples=MIN_LATENCY_SAMPLES):
+        self.percentile = percentile
+        self.budget = budget
+        self.min_samples = min_samples
+        self.latencies = deque(maxlen=window)
+        self.calls = 0
+        self.hedges = 0
+        self.hedge_wins = 0
+        self.denied = 0
+
+    @property
+    def win_rate(self):
+        return self.hedge_wins / self.hedges if self.hedges else 0.0
+
+    def delay(self):
+        """Return how long to wait before hedging, or None while there are too few samples."""
+        if len(self.latencies) < self.min_samples:
+            return None
+        ordered = sorted(self.latencies)
+        return ordered[min(len(ordered) - 1, len(ordered) * self.percentile // 100)]
+
+    async def _timed(self, make_call):
+        loop = asyncio.get_running_loop()
+        start = loop.time()
+        result = await make_call()
+        if result is not None:
+            self.latencies.append(loop.time() - start)
+        return result
+
+    async def run(self, make_call):
+        """Await make_call(), hedging it once if it is slow; returns the first non-None result or None."""
+        self.calls += 1
+        delay = self.delay()
+        primary = asyncio.ensure_future(self._timed(make_call))
+        tasks = [primary]
+        try:
+            if delay is not None:
+                done, _ = await asyncio.wait(tasks, timeout=delay)
+                if not done:
+                    if self.hedges < self.budget * self.calls:
+                        self.hedges += 1
+                        tasks.append(asyncio.ensure_future(self._timed(make_call)))
+                    else:
+                        self.denied += 1
+
+            pending = set(tasks)
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                # Prefer the original when both finish in the same step
+                for task in sorted(done, key=tasks.index):
+                    result = task.result()
+                    if result is not None:
+                        if task is not primary:
+                            self.hedge_wins += 1
+                        return result
+            return None
+        finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+    def summary(self):
+        return (f"Hedged {self.hedges} of {self.calls} calls ({self.denied} over budget); "
+                f"hedges won {self.hedge_wins} ({self.win_rate:.0%})")
+
+async def estimate_all_async(recipes, config, concurrency=DEFAULT_CONCURRENCY, timeout=DEFAULT_TIMEOUT, hedge=False,
+                             cache=ANSWER_CACHE):
+    """Estimate nutrition for recipes concurrently over one pooled client; results are in input order.
+
+    hedge=True (or a Hedger, to read its counters afterwards) duplicates
+    straggling calls; duplicates share the same connection limit. Answers
+    are served from and added to cache (pass None to always ask); failures
+    are not cached.
+    """
+    results = [None] * len(recipes)
+    keys = _cache_keys(recipes, config) if cache is not None else None
+    todo = []
+    for i in range(len(recipes)):
+        cached = cache.get(keys[i]) if cache is not None else None
+        if cached is not None:
+            results[i] = cached.copy()
+        else:
+            todo.append(i)
+    if len(todo) < len(recipes):
+        logging.info(f"Served {len(recipes) - len(todo)}/{len(recipes)} answers from the cache")
+    if not todo:
+        return results
+
+    try:
+        client = AsyncOpenAIClient(max_connections=concurrency)
+    except OpenAIError as e:
+        logging.error(str(e))
+        return results
+
+    hedger = Hedger() if hedge is True else hedge or None
+    slots = asyncio.Semaphore(concurrency)
+    done = 0
+
+    async def run(i):
+        nonlocal done
+        recipe = recipes[i]
+        async with slots:
+            if hedger:
+                nutrition = await hedger.run(lambda: estimate_nutrition(client, recipe, config, timeout))
+            else:
+                nutrition = await estimate_nutrition(client, recipe, config, timeout)
+        done += 1
+        if nutrition:
+            logging.info(f"✓ {done}/{len(todo)} {recipe.title}: "
+                         f"Calories: {nutrition.calories:.0f}, Protein: {nutrition.protein:.1f}g")
+            if cache is not None:
+                cache.put(keys[i], nutrition.copy())
+        else:
+            logging.error(f"✗ {done}/{len(todo)} Failed: {recipe.title}")
+        results[i] = nutrition
+
+    async with client:
+        # Calls start only when a slot is free, so measured latencies exclude queueing
+        await asyncio.gather(*(run(i) for i in todo))
+    if hedger:
+        logging.info(hedger.summary())
+    return results
+
+def estimate_all(recipes, config, concurrency=DEFAULT_CONCURRENCY, timeout=DEFAULT_TIMEOUT, hedge=False):
+    """Blocking wrapper around estimate_all_async for the scripts."""
+    return asyncio.run(estimate_all_async(recipes, config, concurrency, timeout, hedge))
+
+def enrich_recipes(recipes, config, concurrency=DEFAULT_CONCURRENCY, hedge=False):
+    """Set recipe.nutrition on every recipe the model answered for; returns the recipes."""
+    logging.info(f"Found {len(recipes)} recipes to analyze")
+    results = estimate_all(recipes, config, concurrency, hedge=hedge)
+    for recipe, nutrition in zip(recipes, results):
+        if nutrition:
+            recipe.nutrition = nutrition
+    logging.info(f"Successfully analyzed {sum(1 for nutrition in results if nutrition)}/{len(recipes)} recipes")
+    return recipes
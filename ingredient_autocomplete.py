@@ -0,0 +1,198 @@
+import json
+import heapq
+import logging
+from bisect import bisect_left
+from collections import Counter
+
+from ingredient_canon import ingredient_name, normalize
+from recipe_snapshot import load_recipes
+
+# Set up logging
+logging.basicConfig(level=logging.INFO)
+
+MAX_SUGGESTIONS = 8
+
+# Prefixes matching more terms than this get precomputed top lists instead of ranking per query
+MAX_RANGE = 64
+
+# Typos are only looked for once the user typed this much
+MIN_FUZZY_LENGTH = 3
+
+# Term prefixes indexed for typo lookup; longer queries are matched on this many characters first
+FUZZY_PREFIX = 6
+
+def build_vocabulary(recipes):
+    """Count how many recipes use each canonical ingredient name."""
+    counts = Counter()
+    for recipe in recipes:
+        counts.update(ingredient_name(number) for number in set(recipe.ingredient_ids))
+    return counts
+
+def _deletes(text):
+    """Return text and every string one deletion away from it."""
+    return {text} | {text[:i] + text[i + 1:] for i in range(len(text))}
+
+def _within_one_edit(a, b):
+    """True when a and b differ by at most one insert, delete, substitution or adjacent swap."""
+    if abs(len(a) - len(b)) > 1:
+        return False
+    return _prefix_within_one_edit(a, b, exact_length=True)
+
+def _prefix_within_one_edit(query, term, exact_length=False):
+    """True when some prefix of term (or term itself, with exact_length) is one edit from query."""
+    i = 0
+    limit = min(len(query), len(term))
+    while i < limit and query[i] == term[i]:
+        i += 1
+    if i == len(query):
+        return not exact_length or len(term) - i <= 1
+    if exact_length:
+        def matches(rest, other):
+            return rest == other
+    else:
+        def matches(rest, other):
+            return other.startswith(rest)
+    return (
+        matches(query[i + 1:], term[i + 1:])          # substitution
+        or matches(query[i + 1:], term[i:])           # extra letter typed
+        or matches(query[i:], term[i + 1:])           # letter left out
+        or (i + 1 < len(query) and i + 1 < len(term)  # adjacent swap: "teh" vs "the"
+            and query[i] == term[i + 1] and query[i + 1] == term[i]
+            and matches(query[i + 2:], term[i + 2:]))
+    )
+
+class AutocompleteIndex:
+    """Ingredient suggestions by prefix, tolerating one typo.
+
+    Terms live in one sorted list, so a prefix is a bisect range. Typos are
+    found through a symmetric-delete index: every prefix of length
+    MIN_FUZZY_LENGTH..FUZZY_PREFIX of every term is stored under itself and
+    its one-deletion variants, and a query looks up its own variants.
+    """
+
+    def __init__(self, counts):
+        self.terms = sorted(counts)
+        self.counts = [counts[term] for term in self.terms]
+
+        # Sorted terms sharing a prefix are contiguous, so each length is one pass over groups
+        self.top_lists = {}
+        length = 1
+        while True:
+            found = False
+            start = 0
+            while start < len(self.terms):
+                prefix = self.terms[start][:length]
+                stop = self._prefix_range(prefix)[1] if len(prefix) == length else start + 1
+                if stop - start > MAX_RANGE:
+                    self.top_lists[prefix] = self._rank(range(start, stop))
+                    found = True
+                start = stop
+            if not found:
+                break
+            length += 1
+
+        # Term prefixes one character longer than FUZZY_PREFIX catch a letter missing from the query
+        self.deletes = {}
+        for term in self.terms:
+            for length in range(MIN_FUZZY_LENGTH, min(FUZZY_PREFIX + 1, len(term)) + 1):
+                prefix = term[:length]
+                for key in _deletes(prefix):
+                    self.deletes.setdefault(key, set()).add(prefix)
+
+    @classmethod
+    def from_recipes(cls, recipes):
+        return cls(build_vocabulary(recipes))
+
+    @classmethod
+    def from_html(cls, html_file: str = "index.html"):
+        return cls.from_recipes(load_recipes(html_file))
+
+    def __len__(self):
+        return len(self.terms)
+
+    def _rank(self, positions, limit=MAX_SUGGESTIONS):
+        counts = self.counts
+        return heapq.nsmallest(limit, positions, key=lambda i: (-counts[i], i))
+
+    def _prefix_range(self, prefix):
+        start = bisect_left(self.terms, prefix)
+        stop = bisect_left(self.terms, prefix + "\uffff", start)
+        return start, stop
+
+    def _top(self, prefix, limit=MAX_SUGGESTIONS):
+        """Return the best-ranked term positions starting with prefix."""
+        if prefix in self.top_lists:
+            return self.top_lists[prefix][:limit]
+        return self._rank(range(*self._prefix_range(prefix)), limit)
+
+    def _tail_typos(self, query, head):
+        """Yield positions under the exact head whose start is one edit from query."""
+        # Terms sharing their first len(query) + 1 characters get the same answer; check each once
+        size = len(query) + 1
+        last_key, last_match = None, False
+        for i in range(*self._prefix_range(head)):
+            key = self.terms[i][:size]
+            if key != last_key:
+                last_key, last_match = key, _prefix_within_one_edit(query, key)
+            if last_match:
+                yield i
+
+    def _fuzzy(self, query, limit):
+        """Return ranked positions of terms whose start is one edit away from query.
+
+        The delete index finds term prefixes one edit away from the first
+        FUZZY_PREFIX characters; the rest of the query then has to match
+        exactly, which is again a bisect range. A typo past FUZZY_PREFIX is
+        checked term by term under the exact head.
+        """
+        head, tail = query[:FUZZY_PREFIX], query[FUZZY_PREFIX:]
+        prefixes = set()
+        for key in _deletes(head):
+            prefixes.update(self.deletes.get(key, ()))
+
+        positions = set()
+        for prefix in prefixes:
+            if prefix == head:
+                if tail:
+                    positions.update(self._tail_typos(query, head))
+            elif abs(len(prefix) - len(head)) <= 1 and _within_one_edit(head, prefix):
+                positions.update(self._top(prefix + tail, limit))
+        return self._rank(positions, limit)
+
+    def suggest(self, text, limit=MAX_SUGGESTIONS):
+        """Return [(term, recipe_count)] for what the user typed so far.
+
+        Terms starting with the text come first, most used first; typo
+        matches fill the remaining places.
+        """
+        query = normalize(text)
+        if not query:
+            return []
+
+        ranked = self._top(query, limit)
+        if len(ranked) < limit and len(query) >= MIN_FUZZY_LENGTH:
+            seen = set(ranked)
+            ranked += [i for i in self._fuzzy(query, limit) if i not in seen][:limit - len(ranked)]
+        return [(self.terms[i], self.counts[i]) for i in ranked]
+
+    def to_json(self):
+        """Return the vocabulary as the compact blob the page loads.
+
+        Terms are sorted so the page can bisect for prefixes; counts are in
+        the same order.
+        """
+        return {"terms": self.terms, "counts": self.counts}
+
+def export_autocomplete(html_file: str = "index.html", output_file: str = "ingredients.json"):
+    """Write the autocomplete vocabulary for the page and return the index."""
+    index = AutocompleteIndex.from_html(html_file)
+    with open(output_file, 'w', encoding='utf-8') as f:
+        json.dump(index.to_json(), f, separators=(",", ":"))
+    logging.info(f"✓ Wrote {len(index)} ingredient names to {output_file}")
+    return index
+
+if __name__ == "__main__":
+    print("Building the ingredient autocomplete index...")
+    index = AutocompleteIndex.from_html()
+    for text in ("ch", "chee", "chese", "tortila", "pnut butter", "oi"):
+        print(f"{text!r}: {index.suggest(text)}")
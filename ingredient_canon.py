@@ -0,0 +1,158 @@
+import re
+from fractions import Fraction
+
+from memo_cache import BoundedCache
+
+# Unit spellings -> (family, canonical unit, size in the family's base unit).
+# Volumes and weights are summed across units; count-like units stay separate.
+UNITS = {
+    "tsp": ("volume", "tsp", 1), "teaspoon": ("volume", "tsp", 1), "teaspoons": ("volume", "tsp", 1),
+    "tbsp": ("volume", "tbsp", 3), "tablespoon": ("volume", "tbsp", 3), "tablespoons": ("volume", "tbsp", 3),
+    "cup": ("volume", "cup", 48), "cups": ("volume", "cup", 48),
+    "g": ("weight", "g", 1), "gram": ("weight", "g", 1), "grams": ("weight", "g", 1),
+    "oz": ("weight", "oz", Fraction(2835, 100)), "ounce": ("weight", "oz", Fraction(2835, 100)),
+    "ounces": ("weight", "oz", Fraction(2835, 100)),
+    "lb": ("weight", "lb", Fraction(45359, 100)), "lbs": ("weight", "lb", Fraction(45359, 100)),
+    "slice": ("slice", "slice", 1), "slices": ("slice", "slice", 1),
+    "can": ("can", "can", 1), "cans": ("can", "can", 1),
+    "clove": ("clove", "clove", 1), "cloves": ("clove", "clove", 1),
+    "scoop": ("scoop", "scoop", 1), "scoops": ("scoop", "scoop", 1),
+    "piece": ("piece", "piece", 1), "pieces": ("piece", "piece", 1),
+}
+
+NUMBER = r"(\d+\s+\d+/\d+|\d+/\d+|\d+(?:\.\d+)?)"
+UNIT = "|".join(sorted(UNITS, key=len, reverse=True))
+QUANTITY_PREFIX = re.compile(rf"^{NUMBER}\s*(?:({UNIT})\b\.?)?\s*(?:of\s+)?(.+)$", re.IGNORECASE)
+
+# Preparation notes that do not change what you buy
+PREP_WORDS = {
+    "diced", "sliced", "thin", "thinly", "mashed", "scrambled", "minced", "cooked", "pre-cooked", "shredded",
+    "chopped", "grated", "melted", "softened", "small", "large", "medium", "fresh", "canned", "hard-boiled",
+    "pre-made", "roasted", "crushed", "beaten", "ripe", "leftover", "boneless", "skinless",
+}
+
+# Trailing words naming a cut or shape of the ingredient before it ("cheese slices", "salmon fillet")
+FORM_WORDS = {"slice", "slices", "stick", "sticks", "leaf", "leaves", "link", "links", "fillet", "fillets",
+              "piece", "pieces", "cube", "cubes"}
+
+# Whole-word spellings folded into one
+WORD_SYNONYMS = {
+    "veggies": "vegetables",
+    "veggie": "vegetable",
+    "mayo": "mayonnaise",
+    "jalapeños": "jalapenos",
+    "jalapeño": "jalapeno",
+}
+
+# Whole names mapped to their canonical form, checked before and after the rules
+# so products like "mozzarella sticks" keep their shape words
+SYNONYMS = {
+    "mozzarella sticks": "mozzarella stick",
+    "instant oats": "oats",
+    "mixed vegetable": "vegetable",
+    "mixed berry": "berry",
+    "marinara sauce": "marinara",
+    "cocoa powder": "cocoa",
+}
+
+# Words left alone by the plural rules
+UNCOUNTABLE = {"oats", "hummus", "asparagus", "couscous", "molasses", "swiss", "grits", "krispies", "brussels"}
+IRREGULAR = {"leaves": "leaf", "loaves": "loaf", "halves": "half"}
+
+# Clauses after these start a note, as in "chicken breast cut into pieces"
+_NOTE = re.compile(r",|\(| cut into | for | to taste")
+
+# Bounds on the per-string memo tables. LFU keeps staples like salt and butter
+# resident in a long-running process while one-off spellings churn past them.
+CANONICAL_CACHE_ENTRIES = 50000
+CANONICAL_CACHE_BYTES = 16 << 20
+
+_canonical_names = BoundedCache("canonical_names", CANONICAL_CACHE_ENTRIES, CANONICAL_CACHE_BYTES, policy="lfu")
+_canonical_ids = BoundedCache("canonical_ids", CANONICAL_CACHE_ENTRIES, CANONICAL_CACHE_BYTES, policy="lfu")
+# The id registry itself is never evicted, so ids stay stable for the life of the process
+_ids = {}
+_names = []
+
+def normalize(text):
+    """Lowercase and trim an ingredient name, like normalize() in index.html."""
+    return (text or "").lower().strip()
+
+def parse_amount(text):
+    """Parse "2", "1/4", "1 1/2" or "0.5" into a Fraction."""
+    whole, _, rest = text.strip().partition(" ")
+    if rest:
+        return Fraction(whole) + Fraction(rest.strip())
+    return Fraction(whole)
+
+def split_quantity(text):
+    """Split "1/4 cup cheese" into (Fraction(1, 4), "cup", "cheese"); amount is None when absent."""
+    text = normalize(text)
+    match = QUANTITY_PREFIX.match(text)
+    if not match:
+        return None, None, text
+    amount, unit, name = match.groups()
+    return parse_amount(amount), unit and unit.lower(), name.strip()
+
+def lemmatize(word):
+    """Return the singular form of an English noun using suffix rules."""
+    if word in IRREGULAR:
+        return IRREGULAR[word]
+    if word in UNCOUNTABLE or len(word) <= 3:
+        return word
+    if word.endswith("ies") and len(word) > 4:
+        return word[:-3] + "y"
+    if word.endswith("oes"):
+        return word[:-2]
+    if word.endswith(("ches", "shes", "sses", "xes", "zes")):
+        return word[:-2]
+    if word.endswith("s") and not word.endswith(("ss", "us", "is")):
+        return word[:-1]
+    return word
+
+def _canonicalize(text):
+    name = _NOTE.split(split_quantity(text)[2])[0].strip()
+    if name in SYNONYMS:
+        return SYNONYMS[name]
+    words = [WORD_SYNONYMS.get(word, word) for word in name.split() if word not in PREP_WORDS]
+    if len(words) > 1 and words[-1] in FORM_WORDS:
+        words.pop()
+    if not words:
+        return name
+    words[-1] = lemmatize(words[-1])
+    name = " ".join(words)
+    return SYNONYMS.get(name, name)
+
+def canonical_name(text):
+    """Return the canonical name of an ingredient string ("2 Eggs, beaten" -> "egg").
+
+    Results are cached per distinct input string.
+    """
+    name = _canonical_names.get(text)
+    if name is None:
+        name = _canonicalize(text)
+        _canonical_names.put(text, name)
+    return name
+
+def ingredient_id(name):
+    """Return the integer id of a canonical name, assigning the next id on first use."""
+    number = _ids.get(name)
+    if number is None:
+        number = _ids[name] = len(_names)
+        _names.append(name)
+    return number
+
+def canonical_id(text):
+    """Return the canonical ingredient id for an ingredient string."""
+    number = _canonical_ids.get(text)
+    if number is None:
+        number = ingredient_id(canonical_name(text))
+        _canonical_ids.put(text, number)
+    return number
+
+def canonical_ids(ingredients):
+    """Return the canonical ids of a list of ingredient strings, in the same order."""
+    return tuple(canonical_id(text) for text in ingredients)
+
+def ingredient_name(number):
+    """Return the canonical name behind an ingredient id."""
+    return _names[number]
@@ -0,0 +1,183 @@
+import re
+import json
+
+from recipe_models import NUTRIENTS
+
+# Unit each nutrition field is expected in, and what other units convert with
+FIELD_UNITS = {name: "g" for name in NUTRIENTS}
+FIELD_UNITS.update({"calories": "kcal", "sodium": "mg"})
+UNIT_FACTORS = {
+    ("g", "mg"): 0.001, ("mg", "g"): 1000, ("kcal", "kj"): 1 / 4.184,
+    ("g", "gram"): 1, ("g", "grams"): 1, ("mg", "milligrams"): 1,
+    ("kcal", "cal"): 1, ("kcal", "calories"): 1,
+}
+
+# Fields without a usable value are an error; the rest default
+REQUIRED_FIELDS = ("calories",)
+DEFAULTS = dict({name: 0 for name in NUTRIENTS}, servings=1)
+
+# Answers sometimes wrap the numbers one level down
+WRAPPER_KEYS = ("nutrition", "nutrition_per_serving", "per_serving", "data", "result")
+
+_STRUCTURE = re.compile(r'[{}\[\]"\\]')
+_TRAILING_COMMA = re.compile(r",\s*([}\]])")
+_THOUSANDS = re.compile(r"(?<=\d),(?=\d{3}(?!\d))")
+_QUANTITY = re.compile(
+    r"^[~≈<>]?\s*(?:about|approx\.?|approximately|around)?\s*"
+    r"(-?\d+(?:\.\d+)?)\s*(?:(?:-|–|to)\s*(\d+(?:\.\d+)?))?\s*([a-z]*)",
+    re.IGNORECASE,
+)
+
+class ResponseError(ValueError):
+    """A model answer that could not be turned into usable data.
+
+    code is one of "no_json", "invalid_json", "not_object", "missing_field"
+    or "bad_value"; offset points into the text and field names the
+    offending field, when known.
+    """
+
+    def __init__(self, code, message, offset=None, field=None):
+        super().__init__(message)
+        self.code = code
+        self.offset = offset
+        self.field = field
+
+    def to_dict(self):
+        return {"code": self.code, "message": str(self), "offset": self.offset, "field": self.field}
+
+def _balanced_spans(text):
+    """Yield (start, end) for each top-level balanced object or array in text, in one pass.
+
+    Only brackets, quotes and backslashes are visited. Quotes count only
+    inside a candidate, so prose around it cannot open a string. A span
+    ends early at a mismatched bracket and scanning resumes after it. If a
+    value is still open at the end, (start, -1) is yielded last.
+    """
+    closers = []
+    start = -1
+    in_string = False
+    escaped_until = -1
+    for match in _STRUCTURE.finditer(text):
+        pos = match.start()
+        if pos < escaped_until:
+            continue
+        char = text[pos]
+        if in_string:
+            if char == "\\":
+                escaped_until = pos + 2
+            elif char == '"':
+                in_string = False
+        elif char == '"':
+            in_string = bool(closers)
+        elif char in "{[":
+            if not closers:
+                start = pos
+            closers.append("}" if char == "{" else "]")
+        elif char in "}]" and closers:
+            if char != closers.pop():
+                # Mismatched brackets: hand back the span so decoding reports where it broke
+                closers.clear()
+                yield start, pos + 1
+            elif not closers:
+                yield start, pos + 1
+    if closers:
+        yield start, -1
+
+def extract_json(text):
+    """Return the first JSON object or array embedded in text.
+
+    Code fences and prose around the value are skipped. The text is
+    scanned once for balanced spans, and each span is decoded as is, then
+    with trailing commas removed. Raises ResponseError when no value can
+    be recovered.
+    """
+    if not text:
+        raise ResponseError("no_json", "Empty response", 0)
+    error = None
+    for start, end in _balanced_spans(text):
+        if end == -1:
+            error = error or ResponseError("invalid_json", "Unbalanced JSON in response", start)
+            break
+        span = text[start:end]
+        try:
+            return json.loads(span)
+        except json.JSONDecodeError:
+            pass
+        try:
+            return json.loads(_TRAILING_COMMA.sub(r"\1", span))
+        except json.JSONDecodeError as e:
+            error = error or ResponseError("invalid_json", f"Invalid JSON in response: {e.msg}", start + e.pos)
+    raise error or ResponseError("no_json", "No JSON object in response", 0)
+
+def coerce_number(value, unit=None):
+    """Turn 12, "12g", "~150 kcal", "1,200 mg" or "10-12" into a float, converting to unit.
+
+    Ranges become their midpoint. Returns None when no number is present.
+    """
+    if isinstance(value, bool) or value is None:
+        return None
+    if isinstance(value, (int, float)):
+        return float(value)
+    if not isinstance(value, str):
+        return None
+    match = _QUANTITY.match(_THOUSANDS.sub("", value.strip()))
+    if not match:
+        return None
+    low, high, found_unit = match.groups()
+    number = (float(low) + float(high)) / 2 if high else float(low)
+    found_unit = found_unit.lower()
+    if unit and found_unit and found_unit != unit:
+        number *= UNIT_FACTORS.get((unit, found_unit), 1)
+    return number
+
+def coerce_nutrition(data):
+    """Coerce a decoded answer to the nutrition schema; returns (values, issues).
+
+    values has every nutrient plus servings, with defaults for missing or
+    unusable fields; issues lists a ResponseError per field that needed a
+    default. Raises ResponseError when the answer is not an object or a
+    required field is unusable.
+    """
+    if isinstance(data, list):
+        data = next((item for item in data if isinstance(item, dict)), None)
+    if not isinstance(data, dict):
+        raise ResponseError("not_object", "Response JSON is not an object")
+    for key in WRAPPER_KEYS:
+        if isinstance(data.get(key), dict) and "calories" not in data:
+            data = data[key]
+            break
+    lowered = {str(key).strip().lower(): value for key, value in data.items()}
+
+    values = {}
+    issues = []
+    for name, default in DEFAULTS.items():
+        raw = lowered.get(name)
+        number = coerce_number(raw, FIELD_UNITS.get(name))
+        if number is None or number < 0:
+            code = "missing_field" if raw is None else "bad_value"
+            error = ResponseError(code, f"{name}: {raw!r}", field=name)
+            if name in REQUIRED_FIELDS:
+                raise error
+            issues.append(error)
+            number = default
+        values[name] = number
+    values["servings"] = max(1, int(round(values["servings"])))
+    return values, issues
+
+def parse_nutrition_response(text):
+    """Extract and coerce nutrition from a model answer; returns (values, issues) as coerce_nutrition."""
+    return coerce_nutrition(extract_json(text))
+
+if __name__ == "__main__":
+    samples = [
+        '```json\n{"calories": 220, "protein": "9.8g", "carbs": 7, "fat": 17.6, "sodium": "1.2 g"}\n```',
+        'Sure! Here is the estimate: {"calories": "~150 kcal", "protein": "10-12 g", "servings": 2,} Enjoy.',
+        '[{"nutrition": {"calories": "1,200", "fat": "n/a"}}]',
+        "I can't estimate that.",
+    ]
+    for sample in samples:
+        try:
+            values, issues = parse_nutrition_response(sample)
+            print(values, [issue.to_dict()["message"] for issue in issues])
+        except ResponseError as e:
+            print("error:", e.to_dict())
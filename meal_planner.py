@@ -0,0 +1,180 @@
+import time
+import logging
+from collections import Counter
+
+import numpy as np
+
+from recipe_index import RecipeIndex
+from recipe_models import NUTRIENTS, Category
+
+# Same days, meal slots and default goals as the meal planner in index.html
+DAYS = ("monday", "tuesday", "wednesday", "thursday", "friday", "saturday", "sunday")
+MEAL_SLOTS = {
+    "breakfast": Category.BREAKFAST,
+    "lunch": Category.LUNCH,
+    "dinner": Category.DINNER,
+    "snack": Category.DESSERTS,
+}
+DEFAULT_GOALS = {"calories": 2000, "protein": 150, "carbs": 250, "fat": 80}
+GOAL_KEYS = tuple(DEFAULT_GOALS)
+
+# Candidates kept per slot; bounds the work regardless of catalogue size
+SHORTLIST_SIZE = 40
+
+def _day_cost(totals, goals):
+    """Squared relative miss of a day's totals against the goals."""
+    cost = 0.0
+    for total, goal in zip(totals, goals):
+        miss = (total - goal) / goal
+        cost += miss * miss
+    return cost
+
+class _Planner:
+    """Greedy construction followed by first-improvement local search."""
+
+    def __init__(self, index, goals, meals, bits, reuse_weight, repeat_penalty):
+        self.index = index
+        self.goals = goals
+        self.meals = meals
+        self.reuse_weight = reuse_weight
+        self.repeat_penalty = repeat_penalty
+        self.macros = {}
+        self.ingredients = {}
+        # Each slot is scored in one vectorized pass, so shortlisting takes little of the time budget
+        columns = [NUTRIENTS.index(key) for key in GOAL_KEYS]
+        share = np.array([goal / len(meals) for goal in goals])
+        with_nutrition = ~np.isnan(index.nutrient_values[:, 0])
+        self.shortlists = []
+        for meal in meals:
+            positions = np.flatnonzero(bits & index.category_bits[MEAL_SLOTS[meal]] & with_nutrition)
+            macros = index.nutrient_values[np.ix_(positions, columns)].astype(np.float64)
+            costs = np.square((macros - share) / share).sum(axis=1)
+            if len(positions) > SHORTLIST_SIZE:
+                keep = costs <= np.partition(costs, SHORTLIST_SIZE - 1)[SHORTLIST_SIZE - 1]
+                positions, macros, costs = positions[keep], macros[keep], costs[keep]
+            # Lowest cost first, ties to the lower position
+            order = np.lexsort((positions, costs))[:SHORTLIST_SIZE]
+            shortlist = positions[order].tolist()
+            for i, values in zip(shortlist, macros[order].tolist()):
+                if i not in self.macros:
+                    self.macros[i] = tuple(values)
+                    self.ingredients[i] = index.ingredient_sets[i]
+            self.shortlists.append(shortlist)
+
+        self.plan = [[None] * len(meals) for _ in DAYS]
+        self.totals = [[0.0] * len(goals) for _ in DAYS]
+        self.usage = Counter()
+        self.ingredient_counts = Counter()
+
+    def _place(self, day, slot, position):
+        self.plan[day][slot] = position
+        totals = self.totals[day]
+        for k, value in enumerate(self.macros[position]):
+            totals[k] += value
+        self.usage[position] += 1
+        self.ingredient_counts.update(self.ingredients[position])
+
+    def _remove(self, day, slot):
+        position = self.plan[day][slot]
+        self.plan[day][slot] = None
+        totals = self.totals[day]
+        for k, value in enumerate(self.macros[position]):
+            totals[k] -= value
+        self.usage[position] -= 1
+        self.ingredient_counts.subtract(self.ingredients[position])
+        return position
+
+    def _side_cost(self, position):
+        """Repeat penalty minus ingredient-reuse bonus for adding position now."""
+        reused = sum(1 for ingredient in self.ingredients[position] if self.ingredient_counts[ingredient] > 0)
+        return self.repeat_penalty * self.usage[position] - self.reuse_weight * reused
+
+    def _cost_with(self, day, position, goals):
+        totals = [total + value for total, value in zip(self.totals[day], self.macros[position])]
+        return _day_cost(totals, goals) + self._side_cost(position)
+
+    def build(self):
+        for day in range(len(DAYS)):
+            for slot, shortlist in enumerate(self.shortlists):
+                if not shortlist:
+                    continue
+                # Aim at the share of the daily goal that the filled slots should cover
+                fraction = (slot + 1) / len(self.meals)
+                target = [goal * fraction for goal in self.goals]
+                best = min(shortlist, key=lambda i: (self._cost_with(day, i, target), i))
+                self._place(day, slot, best)
+
+    def improve(self, deadline):
+        improved = True
+        while improved and time.perf_counter() < deadline:
+            improved = False
+            for day in range(len(DAYS)):
+                for slot, shortlist in enumerate(self.shortlists):
+                    if self.plan[day][slot] is None:
+                        continue
+                    current = self._remove(day, slot)
+                    current_cost = self._cost_with(day, current, self.goals)
+                    best, best_cost = current, current_cost
+                    for candidate in shortlist:
+                        cost = self._cost_with(day, candidate, self.goals)
+                        if cost < best_cost - 1e-9:
+                            best, best_cost = candidate, cost
+                    self._place(day, slot, best)
+                    if best != current:
+                        improved = True
+                    if time.perf_counter() >= deadline:
+                        return
+
+def plan_week(index, goals=None, diet=None, method=None, meals=tuple(MEAL_SLOTS),
+              reuse_weight=0.02, repeat_penalty=0.5, time_budget=0.08):
+    """Fill a 7-day meal plan that tracks the daily calorie/macro goals.
+
+    Only recipes passing the diet/method filters and carrying nutrition are
+    considered. Repeating a recipe within the week is penalised and sharing
+    ingredients across the week is rewarded slightly. time_budget seconds
+    are counted from the call, filtering and shortlisting included, and
+    local search stops when they run out, so the call stays within its
+    latency target.
+
+    Returns {"plan": {day: {meal: title}}, "ids": {day: {meal: stable id}},
+    "totals": {day: {nutrient: value}}, "cost": float}; the "plan" part has
+    the same shape the page keeps in localStorage.
+    """
+    started = time.perf_counter()
+    merged = dict(DEFAULT_GOALS, **(goals or {}))
+    goal_values = [float(merged[key]) for key in GOAL_KEYS]
+    if any(goal <= 0 for goal in goal_values):
+        raise ValueError("Nutrition goals must be positive")
+    unknown = [meal for meal in meals if meal not in MEAL_SLOTS]
+    if unknown:
+        raise ValueError(f"Unknown meal slots: {unknown}")
+
+    bits = index.filter_bits(diet=diet, method=method)
+    planner = _Planner(index, goal_values, list(meals), bits, reuse_weight, repeat_penalty)
+    planner.build()
+    planner.improve(started + time_budget)
+
+    plan, ids, totals = {}, {}, {}
+    cost = 0.0
+    for day, name in enumerate(DAYS):
+        plan[name] = {}
+        ids[name] = {}
+        for slot, meal in enumerate(meals):
+            position = planner.plan[day][slot]
+            if position is not None:
+                plan[name][meal] = index.recipes[position].title
+                # Stable ids let clients join plans to per-recipe data across catalogue edits
+                ids[name][meal] = index.recipes[position].id or None
+        totals[name] = {key: round(value, 1) for key, value in zip(GOAL_KEYS, planner.totals[day])}
+        cost += _day_cost(planner.totals[day], goal_values)
+
+    logging.info(f"Planned week in {(time.perf_counter() - started) * 1000:.1f} ms (cost {cost:.3f})")
+    return {"plan": plan, "ids": ids, "totals": totals, "cost": round(cost, 4)}
+
+if __name__ == "__main__":
+    print("Auto-planning a week against the default nutrition goals...")
+    result = plan_week(RecipeIndex.from_html())
+    for day in DAYS:
+        print(f"\n{day.title()}: {result['totals'][day]}")
+        for meal, title in result["plan"][day].items():
+            print(f"  {meal}: {title}")
@@ -0,0 +1,184 @@
+import sys
+import logging
+import threading
+from array import array
+from collections import OrderedDict
+from functools import wraps
+
+# Every cache created in this process, by name, for cache_report()
+CACHES = {}
+
+# LFU remembers the use counts of this many evicted keys per cached entry
+GHOST_FACTOR = 4
+
+# LFU evicts in batches, down to this share of its limits
+LFU_TRIM = 0.9
+
+# LFU halves every use count after this many lookups per cached entry
+DECAY_FACTOR = 10
+
+_MISSING = object()
+_ATOMS = (str, bytes, bytearray, array, int, float, bool, type(None))
+
+def approximate_size(value, depth=3):
+    """Return a rough byte count for value, following containers and __slots__ a few levels down."""
+    size = sys.getsizeof(value)
+    if depth == 0 or isinstance(value, _ATOMS):
+        return size
+    if isinstance(value, dict):
+        return size + sum(approximate_size(k, depth - 1) + approximate_size(v, depth - 1) for k, v in value.items())
+    if isinstance(value, (tuple, list, set, frozenset)):
+        return size + sum(approximate_size(item, depth - 1) for item in value)
+    for name in getattr(type(value), "__slots__", ()):
+        size += approximate_size(getattr(value, name, None), depth - 1)
+    return size
+
+class BoundedCache:
+    """A memo table capped by entry count and approximate bytes, with hit-rate counters.
+
+    policy "lru" evicts the least recently used entry. "lfu" evicts the
+    least frequently used ones, oldest first among equals, so a hot set
+    (salt, pepper, butter) stays resident while one-off keys churn past it.
+    A hit only bumps a counter; LFU evicts in batches and periodically
+    halves the counts, so yesterday's favourites can age out. It also remembers the
+    counts of recently evicted keys, so a staple pushed out before it could
+    prove itself comes back with its history. Safe to share between threads; forked workers get their own copy.
+    """
+
+    def __init__(self, name, max_entries=None, max_bytes=None, policy="lru", sizeof=approximate_size):
+        if policy not in ("lru", "lfu"):
+            raise ValueError(f"Unknown cache policy {policy!r}")
+        self.name = name
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.policy = policy
+        self._lfu = policy == "lfu"
+        self.sizeof = sizeof
+        self.hits = self.misses = self.evictions = 0
+        self.bytes = 0
+        # key -> [value, size, use count]; order is recency for LRU, age for LFU
+        self._entries = OrderedDict()
+        self._ghosts = OrderedDict()
+        self._decayed_at = 0
+        self._lock = threading.Lock()
+        CACHES[name] = self
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, key):
+        return key in self._entries
+
+    @property
+    def lookups(self):
+        return self.hits + self.misses
+
+    @property
+    def hit_rate(self):
+        return self.hits / self.lookups if self.lookups else 0.0
+
+    def get(self, key, default=None):
+        """Return the cached value for key, or default, counting a hit or a miss."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return default
+            self.hits += 1
+            if self._lfu:
+                entry[2] += 1
+            else:
+                self._entries.move_to_end(key)
+            return entry[0]
+
+    def put(self, key, value):
+        """Store value under key, evicting until the cache is back under its limits."""
+        size = self.sizeof(key) + self.sizeof(value)
+        if self.max_bytes is not None and size > self.max_bytes:
+            return
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self.bytes -= old[1]
+            count = self._ghosts.pop(key, 0) + 1 if self._lfu else 1
+            self._entries[key] = [value, size, count]
+            self.bytes += size
+            if self._over_limit(1.0):
+                self._evict_lfu() if self._lfu else self._evict_lru()
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._ghosts.clear()
+            self.bytes = 0
+
+    def _over_limit(self, share):
+        return ((self.max_entries is not None and len(self._entries) > share * self.max_entries)
+                or (self.max_bytes is not None and self.bytes > share * self.max_bytes))
+
+    def _evict_lru(self):
+        while self._over_limit(1.0):
+            _, (_, size, _) = self._entries.popitem(last=False)
+            self.bytes -= size
+            self.evictions += 1
+
+    def _evict_lfu(self):
+        entries = self._entries
+        # sorted() is stable, so among equal counts the oldest entries go first
+        for key in sorted(entries, key=lambda key: entries[key][2]):
+            if not self._over_limit(LFU_TRIM):
+                break
+            _, size, count = entries.pop(key)
+            self.bytes -= size
+            self.evictions += 1
+            self._ghosts[key] = count
+        while len(self._ghosts) > GHOST_FACTOR * (self.max_entries or len(entries) or 1):
+            self._ghosts.popitem(last=False)
+        if self.lookups - self._decayed_at >= DECAY_FACTOR * len(entries):
+            self._decayed_at = self.lookups
+            for entry in entries.values():
+                entry[2] = (entry[2] + 1) // 2
+
+    def stats(self):
+        return {"name": self.name, "policy": self.policy, "entries": len(self), "bytes": self.bytes,
+                "hits": self.hits, "misses": self.misses, "evictions": self.evictions, "hit_rate": self.hit_rate}
+
+    def summary(self):
+        return (f"{self.name} ({self.policy}): {len(self)} entries, {self.bytes / 1024:.0f} KiB, "
+                f"hit rate {self.hit_rate:.0%} of {self.lookups}, {self.evictions} evicted")
+
+def memoize(cache, key=None):
+    """Serve func's results from cache; key(*args) builds the cache key, the args tuple by default.
+
+    None results are not cached, so failed lookups are retried next time.
+    """
+    def decorate(func):
+        @wraps(func)
+        def wrapper(*args):
+            cache_key = key(*args) if key else args
+            value = cache.get(cache_key, _MISSING)
+            if value is _MISSING:
+                value = func(*args)
+                if value is not None:
+                    cache.put(cache_key, value)
+            return value
+        wrapper.cache = cache
+        return wrapper
+    return decorate
+
+def cache_report():
+    """Return one summary line per cache in this process."""
+    return [cache.summary() for cache in CACHES.values()]
+
+if __name__ == "__main__":
+    # Set up logging; as a library this module leaves logging to the importing script
+    logging.basicConfig(level=logging.INFO)
+
+    # Staples come back every 150 lookups, further apart than the 100 entries LRU keeps
+    for policy in ("lru", "lfu"):
+        cache = BoundedCache(f"demo-{policy}", max_entries=100, policy=policy)
+        for i in range(30000):
+            key = ("salt", "pepper", "butter")[i // 50 % 3] if i % 50 == 0 else f"one-off {i}"
+            if cache.get(key) is None:
+                cache.put(key, key.upper())
+        print(cache.summary())
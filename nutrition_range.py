@@ -0,0 +1,89 @@
+import json
+import logging
+from bisect import bisect_left, bisect_right
+
+import numpy as np
+
+from recipe_models import NUTRIENTS, WHOLE_NUTRIENTS
+from recipe_snapshot import load_recipes
+
+# Set up logging
+logging.basicConfig(level=logging.INFO)
+
+class NutritionRangeIndex:
+    """Sorted per-nutrient indexes answering range queries as recipe bitmaps.
+
+    For each nutrient, recipes with nutrition are kept in value order
+    (order) next to their sorted values, so a range is a bisect away and
+    its recipes are one contiguous slice of order. Bitmaps are bool arrays
+    indexed like RecipeIndex's, so they AND directly with its filters.
+    """
+
+    def __init__(self, recipes):
+        self.count = len(recipes)
+        self.values = {}
+        self.order = {}
+        self.positions = {}
+        rows = [(i, recipe.nutrition.to_dict()) for i, recipe in enumerate(recipes) if recipe.nutrition is not None]
+        for nutrient in NUTRIENTS:
+            ranked = sorted((data[nutrient], i) for i, data in rows)
+            self.values[nutrient] = [value for value, _ in ranked]
+            self.order[nutrient] = [i for _, i in ranked]
+            self.positions[nutrient] = np.array(self.order[nutrient], dtype=np.intp)
+
+    def range_bits(self, nutrient, low=None, high=None):
+        """Return the bitmap of recipes with low <= nutrient <= high; None leaves a side open."""
+        if nutrient not in self.values:
+            raise ValueError(f"Unknown nutrient: {nutrient!r}")
+        values = self.values[nutrient]
+        start = 0 if low is None else bisect_left(values, low)
+        stop = len(values) if high is None else bisect_right(values, high)
+        bits = np.zeros(self.count, dtype=bool)
+        bits[self.positions[nutrient][start:stop]] = True
+        return bits
+
+    def filter_bits(self, ranges):
+        """AND together range_bits for a {nutrient: (low, high)} mapping."""
+        bits = np.ones(self.count, dtype=bool)
+        for nutrient, (low, high) in ranges.items():
+            bits &= self.range_bits(nutrient, low, high)
+            if not bits.any():
+                break
+        return bits
+
+    def to_json(self):
+        """Return the index as the compact blob the page loads.
+
+        Per nutrient, order lists recipe positions by value and values holds
+        the sorted values as integer steps from the previous one (tenths for
+        nutrients shown with a decimal), so the page can rebuild them with a
+        running sum and bisect like range_bits.
+        """
+        nutrients = {}
+        for nutrient in NUTRIENTS:
+            scale = 1 if nutrient in WHOLE_NUTRIENTS else 10
+            previous = 0
+            steps = []
+            for value in self.values[nutrient]:
+                scaled = int(round(value * scale))
+                steps.append(scaled - previous)
+                previous = scaled
+            nutrients[nutrient] = {"scale": scale, "order": self.order[nutrient], "values": steps}
+        return {"count": self.count, "nutrients": nutrients}
+
+def export_nutrition_index(html_file: str = "index.html", output_file: str = "nutrition-index.json"):
+    """Write the range index for the page's nutrition sliders and return it."""
+    index = NutritionRangeIndex(load_recipes(html_file))
+    with open(output_file, 'w', encoding='utf-8') as f:
+        json.dump(index.to_json(), f, separators=(",", ":"))
+    logging.info(f"✓ Wrote nutrition range index for {index.count} recipes to {output_file}")
+    return index
+
+if __name__ == "__main__":
+    from recipe_index import RecipeIndex, iter_bits
+
+    print("Building the nutrition range index...")
+    recipes = RecipeIndex.from_html()
+    bits = recipes.filter_bits(diet="vegetarian", ranges={"calories": (200, 400), "protein": (20, None)})
+    for i in iter_bits(bits):
+        print(f"  {recipes.recipes[i].title}")
@@ -0,0 +1,214 @@
+import os
+import json
+import logging
+
+import numpy as np
+
+from recipe_models import NUTRIENTS, Category, Difficulty, Method
+from recipe_snapshot import CACHE_DIR, file_digest, load_recipes
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = None
+
+# Set up logging
+logging.basicConfig(level=logging.INFO)
+
+# Bump when the stored columns change so old files are rebuilt
+TABLE_VERSION = 1
+
+CODES = {"category": Category, "method": Method, "difficulty": Difficulty}
+
+_OPERATORS = {"lt": np.less, "le": np.less_equal, "gt": np.greater, "ge": np.greater_equal, "eq": np.equal}
+_AGGREGATES = ("count", "sum", "mean", "min", "max", "median")
+
+def table_path(html_file: str = "index.html"):
+    """Return where the nutrition table for html_file is stored (Parquet when pyarrow is installed)."""
+    directory, name = os.path.split(os.path.abspath(html_file))
+    return os.path.join(directory, CACHE_DIR, name + (".nutrition.parquet" if pa else ".nutrition.npz"))
+
+class NutritionTable:
+    """Nutrition of every recipe stored column by column.
+
+    columns maps each nutrient to a float32 array with one entry per recipe
+    (NaN where a recipe has no nutrition yet); codes maps category, method
+    and difficulty to uint8 arrays of the enum values. Row i is recipe i of
+    the catalogue.
+    """
+
+    def __init__(self, columns, codes, servings, source_sha1=""):
+        self.columns = columns
+        self.codes = codes
+        self.servings = servings
+        self.source_sha1 = source_sha1
+        self._sorted = {}
+
+    def __len__(self):
+        return len(self.servings)
+
+    @classmethod
+    def build(cls, recipes, source_sha1=""):
+        count = len(recipes)
+        values = np.full((count, len(NUTRIENTS)), np.nan, dtype=np.float32)
+        servings = np.ones(count, dtype=np.int16)
+        codes = {name: np.empty(count, dtype=np.uint8) for name in CODES}
+        for row, recipe in enumerate(recipes):
+            if recipe.nutrition is not None:
+                values[row] = recipe.nutrition.values
+                servings[row] = recipe.nutrition.servings
+            codes["category"][row] = recipe.category
+            codes["method"][row] = recipe.method
+            codes["difficulty"][row] = recipe.difficulty
+        columns = {name: np.ascontiguousarray(values[:, i]) for i, name in enumerate(NUTRIENTS)}
+        return cls(columns, codes, servings, source_sha1)
+
+    def _code(self, key, value):
+        enum = CODES[key]
+        if isinstance(value, str):
+            for member in enum:
+                if member.label == value:
+                    return member
+            raise ValueError(f"Unknown {key} {value!r}")
+        return enum(value)
+
+    def mask(self, category=None, method=None, difficulty=None, **conditions):
+        """Return a boolean row mask for equality and range conditions.
+
+        Conditions are written nutrient__op=value with op one of lt, le, gt,
+        ge or eq, e.g. mask(calories__lt=300, protein__gt=20, category="lunch").
+        Rows without nutrition never match a nutrient condition.
+        """
+        result = np.ones(len(self), dtype=bool)
+        for key, value in (("category", category), ("method", method), ("difficulty", difficulty)):
+            if value is not None:
+                result &= self.codes[key] == self._code(key, value)
+        for condition, value in conditions.items():
+            nutrient, _, op = condition.partition("__")
+            if nutrient not in self.columns or op not in _OPERATORS:
+                raise ValueError(f"Unknown condition {condition!r}")
+            result &= _OPERATORS[op](self.columns[nutrient], value)
+        return result
+
+    def select(self, **filters):
+        """Return the row numbers matching mask(**filters)."""
+        return np.flatnonzero(self.mask(**filters))
+
+    def group_by(self, key, nutrient, agg="mean", mask=None):
+        """Aggregate a nutrient per category, method or difficulty.
+
+        agg is one of count, sum, mean, min, max or median; rows without
+        nutrition are left out. Returns {label: value} for groups with rows.
+        """
+        if key not in CODES:
+            raise ValueError(f"Cannot group by {key!r}")
+        if agg not in _AGGREGATES:
+            raise ValueError(f"Unknown aggregate {agg!r}")
+        column = self.columns[nutrient]
+        rows = ~np.isnan(column)
+        if mask is not None:
+            rows &= mask
+        codes = self.codes[key][rows]
+        values = column[rows].astype(np.float64)
+        size = len(CODES[key])
+
+        counts = np.bincount(codes, minlength=size)
+        if agg == "count":
+            result = counts.astype(np.float64)
+        elif agg in ("sum", "mean"):
+            result = np.bincount(codes, weights=values, minlength=size)
+            if agg == "mean":
+                result = result / np.maximum(counts, 1)
+        elif agg == "min":
+            result = np.full(size, np.inf)
+            np.minimum.at(result, codes, values)
+        elif agg == "max":
+            result = np.full(size, -np.inf)
+            np.maximum.at(result, codes, values)
+        else:
+            order = np.argsort(codes, kind="stable")
+            groups = np.split(values[order], np.cumsum(counts)[:-1])
+            result = np.array([np.median(group) if len(group) else np.nan for group in groups])
+        return {CODES[key](code).label: float(result[code]) for code in range(size) if counts[code]}
+
+    def _sorted_values(self, nutrient):
+        values = self._sorted.get(nutrient)
+        if values is None:
+            column = self.columns[nutrient]
+            values = self._sorted[nutrient] = np.sort(column[~np.isnan(column)])
+        return values
+
+    def percentile(self, nutrient, q):
+        """Return the q-th percentile (0-100) of a nutrient across recipes with nutrition."""
+        values = self._sorted_values(nutrient)
+        return float(np.percentile(values, q)) if len(values) else float("nan")
+
+    def percentile_rank(self, nutrient, value):
+        """Return the percentage of recipes whose nutrient is at most value."""
+        values = self._sorted_values(nutrient)
+        if not len(values):
+            return float("nan")
+        return 100.0 * np.searchsorted(values, value, side="right") / len(values)
+
+    def save(self, path):
+        """Write the table to path atomically, as Parquet when pyarrow is installed and .npz otherwise."""
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        meta = {"version": TABLE_VERSION, "source_sha1": self.source_sha1}
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        if pa is not None and path.endswith(".parquet"):
+            arrays = dict(self.columns, servings=self.servings, **self.codes)
+            table = pa.table(arrays).replace_schema_metadata({"nutrition_table": json.dumps(meta)})
+            pq.write_table(table, tmp_path)
+        else:
+            with open(tmp_path, 'wb') as f:
+                np.savez(f, meta=np.array(json.dumps(meta)), servings=self.servings,
+                         **{f"n_{name}": column for name, column in self.columns.items()},
+                         **{f"c_{name}": codes for name, codes in self.codes.items()})
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path):
+        """Read a table written by save(); raises ValueError for foreign or stale layouts."""
+        if path.endswith(".parquet"):
+            if pa is None:
+                raise ValueError(f"Reading {path} needs pyarrow")
+            table = pq.read_table(path)
+            meta = json.loads((table.schema.metadata or {}).get(b"nutrition_table", b"{}"))
+            data = {name: table.column(name).to_numpy() for name in table.column_names}
+            columns = {name: data[name] for name in NUTRIENTS}
+            codes = {name: data[name] for name in CODES}
+            servings = data["servings"]
+        else:
+            with np.load(path, allow_pickle=False) as data:
+                meta = json.loads(str(data["meta"]))
+                columns = {name: data[f"n_{name}"] for name in NUTRIENTS}
+                codes = {name: data[f"c_{name}"] for name in CODES}
+                servings = data["servings"]
+        if meta.get("version") != TABLE_VERSION:
+            raise ValueError(f"Incompatible nutrition table {path}")
+        return cls(columns, codes, servings, meta.get("source_sha1", ""))
+
+def load_nutrition_table(html_file: str = "index.html"):
+    """Return the nutrition table for html_file, rebuilding it when the file changed."""
+    path = table_path(html_file)
+    sha1 = file_digest(html_file)
+    try:
+        table = NutritionTable.load(path)
+        if table.source_sha1 == sha1:
+            return table
+    except (OSError, KeyError, ValueError):
+        pass
+
+    table = NutritionTable.build(load_recipes(html_file), sha1)
+    table.save(path)
+    logging.info(f"Rebuilt nutrition table for {html_file} ({len(table)} recipes)")
+    return table
+
+if __name__ == "__main__":
+    print("Loading the nutrition table...")
+    table = load_nutrition_table()
+    print(f"Average sodium per category: {table.group_by('category', 'sodium')}")
+    print(f"Recipes under 300 kcal with more than 20 g protein: {len(table.select(calories__lt=300, protein__gt=20))}")
+    print(f"Median calories: {table.percentile('calories', 50):.0f}")
+    print(f"A 400 kcal recipe is at the {table.percentile_rank('calories', 400):.0f}th percentile")
@@ -0,0 +1,124 @@
+import asyncio
+import logging
+from collections import Counter
+from statistics import median
+
+from gpt_nutrition import DEFAULT_CONCURRENCY, estimate_all_async
+from nutrition_api import get_nutrition_from_api, ingredient_coverage
+from openai_client import DEFAULT_TIMEOUT
+from recipe_models import NUTRIENTS, Nutrition
+
+# Set up logging
+logging.basicConfig(level=logging.INFO)
+
+# Share of ingredients the local table must know before its estimate is accepted
+MIN_CONFIDENCE = 0.7
+
+# Models tried in order after the local estimator; samples > 1 asks several times and takes the median
+DEFAULT_TIERS = (
+    {"model": "gpt-4o-mini", "samples": 1},
+    {"model": "gpt-4", "samples": 1},
+)
+
+# Samples whose calories spread wider than this, relative to their median, escalate to the next tier
+MAX_SPREAD = 0.25
+
+def local_estimate(recipe):
+    """Return (nutrition, confidence) from the ingredient table, tagged "local"."""
+    nutrition = get_nutrition_from_api(recipe.ingredients)
+    nutrition.source = "local"
+    return nutrition, ingredient_coverage(recipe.ingredients)
+
+def reconcile(answers, source):
+    """Merge model answers into one Nutrition by per-nutrient median; returns (nutrition, spread).
+
+    spread is the calorie range divided by the median calories, 0 for a
+    single answer.
+    """
+    if len(answers) == 1:
+        nutrition = answers[0]
+        nutrition.source = source
+        return nutrition, 0.0
+    values = [median(answer.values[i] for answer in answers) for i in range(len(NUTRIENTS))]
+    servings = int(median(answer.servings for answer in answers))
+    calories = [answer.calories for answer in answers]
+    spread = (max(calories) - min(calories)) / values[0] if values[0] else float("inf")
+    return Nutrition(values, servings, f"{source}:median{len(answers)}"), spread
+
+async def estimate_tiered_async(recipes, config, tiers=DEFAULT_TIERS, min_confidence=MIN_CONFIDENCE,
+                                concurrency=DEFAULT_CONCURRENCY, timeout=DEFAULT_TIMEOUT):
+    """Estimate nutrition cheapest-first; results are in input order, each tagged with its source.
+
+    Recipes the local table covers well enough are answered without a
+    request. The rest go to each tier in turn, and only those the tier
+    failed on, or whose samples disagreed, move on to the next. A recipe no
+    tier settles keeps the best answer seen: a disagreeing median, then the
+    local estimate if it matched anything.
+    """
+    results = [None] * len(recipes)
+    fallback = {}
+    pending = []
+    for i, recipe in enumerate(recipes):
+        nutrition, confidence = local_estimate(recipe)
+        if confidence >= min_confidence:
+            results[i] = nutrition
+        else:
+            pending.append(i)
+            if confidence > 0:
+                fallback[i] = nutrition
+    logging.info(f"Local table answered {len(recipes) - len(pending)}/{len(recipes)} recipes")
+
+    for level, tier in enumerate(tiers):
+        if not pending:
+            break
+        model = tier["model"]
+        samples = tier.get("samples", 1)
+        last = level == len(tiers) - 1
+        logging.info(f"Asking {model} about {len(pending)} recipes ({samples} sample(s) each)")
+        answers = await estimate_all_async(
+            [recipes[i] for i in pending] * samples, dict(config, model=model), concurrency, timeout
+        )
+
+        escalate = []
+        for k, i in enumerate(pending):
+            valid = [answer for answer in answers[k::len(pending)] if answer is not None]
+            if not valid:
+                escalate.append(i)
+                continue
+            nutrition, spread = reconcile(valid, model)
+            if spread > MAX_SPREAD and not last:
+                fallback[i] = nutrition
+                escalate.append(i)
+            else:
+                results[i] = nutrition
+        pending = escalate
+
+    for i in pending:
+        results[i] = fallback.get(i)
+    counts = Counter(nutrition.source if nutrition else "none" for nutrition in results)
+    logging.info("Sources: " + ", ".join(f"{source} {count}" for source, count in counts.most_common()))
+    return results
+
+def estimate_tiered(recipes, config, tiers=DEFAULT_TIERS, min_confidence=MIN_CONFIDENCE,
+                    concurrency=DEFAULT_CONCURRENCY, timeout=DEFAULT_TIMEOUT):
+    """Blocking wrapper around estimate_tiered_async for the scripts."""
+    return asyncio.run(estimate_tiered_async(recipes, config, tiers, min_confidence, concurrency, timeout))
+
+def enrich_recipes_tiered(recipes, config, tiers=DEFAULT_TIERS, min_confidence=MIN_CONFIDENCE,
+                          concurrency=DEFAULT_CONCURRENCY):
+    """Set recipe.nutrition from the cheapest tier that settles each recipe; returns the recipes."""
+    logging.info(f"Found {len(recipes)} recipes to analyze")
+    results = estimate_tiered(recipes, config, tiers, min_confidence, concurrency)
+    for recipe, nutrition in zip(recipes, results):
+        if nutrition:
+            recipe.nutrition = nutrition
+    logging.info(f"Successfully analyzed {sum(1 for nutrition in results if nutrition)}/{len(recipes)} recipes")
+    return recipes
+
+if __name__ == "__main__":
+    from nutrition_analyzer import NUTRITION_PROMPT
+    from recipe_snapshot import load_recipes
+
+    print("Estimating nutrition cheapest tier first (local table, then models)...")
+    for recipe in enrich_recipes_tiered(load_recipes()[:10], NUTRITION_PROMPT):
+        print(f"{recipe.title}: {recipe.nutrition}")
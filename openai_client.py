@@ -0,0 +1,311 @@
+import os
+import ssl
+import json
+import random
+import asyncio
+import logging
+from urllib.parse import urlsplit
+
+# Set up logging
+logging.basicConfig(level=logging.INFO)
+
+API_BASE = "https://api.openai.com/v1"
+
+# Seconds a whole request may take, retries and backoff included
+DEFAULT_TIMEOUT = 30.0
+
+# Open connections per client; requests beyond this wait for a free one
+MAX_CONNECTIONS = 8
+
+# Rate-limited and server-error responses are retried this many times
+MAX_RETRIES = 3
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+BACKOFF_BASE = 0.5
+
+class OpenAIError(Exception):
+    """Raised when the API cannot answer; status is the HTTP status, or None for transport errors."""
+
+    def __init__(self, message, status=None):
+        super().__init__(message)
+        self.status = status
+
+class DeadlineExceeded(OpenAIError):
+    """Raised when a request runs past its deadline."""
+
+async def _until(awaitable, deadline):
+    """Await with whatever time is left before deadline (a loop.time() value)."""
+    remaining = deadline - asyncio.get_running_loop().time()
+    if remaining <= 0:
+        if asyncio.iscoroutine(awaitable):
+            awaitable.close()
+        raise DeadlineExceeded("Request deadline exceeded")
+    try:
+        return await asyncio.wait_for(awaitable, remaining)
+    except asyncio.TimeoutError:
+        raise DeadlineExceeded("Request deadline exceeded") from None
+
+class _Connection:
+    __slots__ = ("reader", "writer")
+
+    def __init__(self, reader, writer):
+        self.reader = reader
+        self.writer = writer
+
+    def close(self):
+        self.writer.close()
+
+class _Response:
+    """Status and headers of a response whose body is still on the connection."""
+
+    __slots__ = ("status", "headers", "connection", "reusable")
+
+    def __init__(self, status, headers, connection):
+        self.status = status
+        self.headers = headers
+        self.connection = connection
+        self.reusable = headers.get("connection", "").lower() != "close"
+
+    async def iter_body(self, deadline):
+        """Yield the body in chunks, honouring chunked and Content-Length framing."""
+        reader = self.connection.reader
+        if self.headers.get("transfer-encoding", "").lower() == "chunked":
+            while True:
+                size_line = await _until(reader.readline(), deadline)
+                size = int(size_line.split(b";")[0].strip() or b"0", 16)
+                if size == 0:
+                    while await _until(reader.readline(), deadline) not in (b"\r\n", b"\n", b""):
+                        pass
+                    return
+                chunk = await _until(reader.readexactly(size + 2), deadline)
+                yield chunk[:-2]
+        elif "content-length" in self.headers:
+            remaining = int(self.headers["content-length"])
+            while remaining:
+                chunk = await _until(reader.read(min(remaining, 65536)), deadline)
+                if not chunk:
+                    raise OpenAIError("Connection closed mid-response")
+                remaining -= len(chunk)
+                yield chunk
+        else:
+            # Body runs to the end of the connection, which cannot be reused afterwards
+            self.reusable = False
+            while True:
+                chunk = await _until(reader.read(65536), deadline)
+                if not chunk:
+                    return
+                yield chunk
+
+    async def read(self, deadline):
+        return b"".join([chunk async for chunk in self.iter_body(deadline)])
+
+class AsyncOpenAIClient:
+    """Minimal asyncio client for the OpenAI REST API over pooled keep-alive connections.
+
+    Connections are opened lazily, at most max_connections at a time, and
+    returned to the pool after each complete response. Every request gets a
+    deadline covering connecting, retries and reading the body; a request
+    that is cancelled or times out closes its connection instead of
+    returning it, since its state is unknown. Use as an async context
+    manager, or call close() when done.
+    """
+
+    def __init__(self, api_key=None, base_url=API_BASE, max_connections=MAX_CONNECTIONS, timeout=DEFAULT_TIMEOUT):
+        self.api_key = api_key or os.getenv("OPENAI_API_KEY")
+        if not self.api_key:
+            raise OpenAIError("OpenAI API key not found. Please set OPENAI_API_KEY environment variable.")
+        url = urlsplit(base_url)
+        self.tls = url.scheme == "https"
+        self.host = url.hostname
+        self.port = url.port or (443 if self.tls else 80)
+        self.base_path = url.path.rstrip("/")
+        self.timeout = timeout
+        self._ssl = ssl.create_default_context() if self.tls else None
+        self._idle = []
+        self._slots = asyncio.Semaphore(max_connections)
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.close()
+
+    async def close(self):
+        """Close every idle connection."""
+        idle, self._idle = self._idle, []
+        for connection in idle:
+            connection.close()
+        for connection in idle:
+            try:
+                await connection.writer.wait_closed()
+            except (ConnectionError, ssl.SSLError):
+                pass
+
+    async def _connect(self, deadline):
+        reader, writer = await _until(
+            asyncio.open_connection(self.host, self.port, ssl=self._ssl, limit=1 << 20), deadline
+        )
+        return _Connection(reader, writer)
+
+    async def _send(self, connection, method, path, body, deadline):
+        head = [
+            f"{method} {self.base_path}{path} HTTP/1.1",
+            f"Host: {self.host}",
+            f"Authorization: Bearer {self.api_key}",
+            "Content-Type: application/json",
+            "Accept-Encoding: identity",
+            "Connection: keep-alive",
+            f"Content-Length: {len(body)}",
+        ]
+        connection.writer.write(("\r\n".join(head) + "\r\n\r\n").encode("latin-1") + body)
+        await _until(connection.writer.drain(), deadline)
+
+        status_line = await _until(connection.reader.readline(), deadline)
+        if not status_line:
+            raise ConnectionResetError("Connection closed before the response")
+        status = int(status_line.split(b" ", 2)[1])
+        headers = {}
+        while True:
+            line = await _until(connection.reader.readline(), deadline)
+            if line in (b"\r\n", b"\n", b""):
+                return _Response(status, headers, connection)
+            name, _, value = line.decode("latin-1").partition(":")
+            headers[name.strip().lower()] = value.strip()
+
+    async def _open(self, method, path, payload, deadline):
+        """Send a request and return the response once its headers arrive.
+
+        The caller owns the returned response's connection and must hand it
+        to _finish. A pooled connection the server already closed is
+        replaced once, transparently.
+        """
+        body = json.dumps(payload).encode("utf-8")
+        await _until(self._slots.acquire(), deadline)
+        for attempt in range(2):
+            reused = bool(self._idle)
+            connection = self._idle.pop() if reused else None
+            try:
+                if connection is None:
+                    connection = await self._connect(deadline)
+                return await self._send(connection, method, path, body, deadline)
+            except (ConnectionError, asyncio.IncompleteReadError, ssl.SSLError) as e:
+                if connection is not None:
+                    connection.close()
+                if reused and attempt == 0:
+                    continue
+                self._slots.release()
+                raise OpenAIError(f"Connection to {self.host} failed: {e}") from None
+            except BaseException:
+                if connection is not None:
+                    connection.close()
+                self._slots.release()
+                raise
+
+    def _finish(self, response, completed):
+        """Return the response's connection to the pool, or close it if the exchange did not complete."""
+        if completed and response.reusable:
+            self._idle.append(response.connection)
+        else:
+            response.connection.close()
+        self._slots.release()
+
+    async def _exchange(self, method, path, payload, deadline):
+        """Return (status, headers, body) for one request, retrying rate limits and server errors."""
+        loop = asyncio.get_running_loop()
+        for attempt in range(MAX_RETRIES + 1):
+            response = await self._open(method, path, payload, deadline)
+            completed = False
+            try:
+                body = await response.read(deadline)
+                completed = True
+            except (ConnectionError, asyncio.IncompleteReadError, ssl.SSLError) as e:
+                raise OpenAIError(f"Connection to {self.host} failed: {e}") from None
+            finally:
+                self._finish(response, completed)
+
+            if response.status not in RETRY_STATUSES or attempt == MAX_RETRIES:
+                return response.status, response.headers, body
+            delay = BACKOFF_BASE * (2 ** attempt) * (1 + random.random())
+            try:
+                delay = max(delay, float(response.headers.get("retry-after", 0)))
+            except ValueError:
+                pass
+            if loop.time() + delay >= deadline:
+                return response.status, response.headers, body
+            logging.info(f"OpenAI API returned {response.status}, retrying in {delay:.1f}s")
+            await asyncio.sleep(delay)
+
+    def _deadline(self, timeout):
+        return asyncio.get_running_loop().time() + (self.timeout if timeout is None else timeout)
+
+    async def post(self, path, payload, timeout=None):
+        """POST JSON to path under the API base and return the decoded JSON response."""
+        status, _, body = await self._exchange("POST", path, payload, self._deadline(timeout))
+        if status != 200:
+            raise OpenAIError(f"API request failed: {status} {body[:200].decode('utf-8', 'replace')}", status)
+        try:
+            return json.loads(body)
+        except json.JSONDecodeError:
+            raise OpenAIError("API returned invalid JSON", status) from None
+
+    async def chat(self, payload, timeout=None):
+        """Return the message content of a chat completion, stripped."""
+        data = await self.post("/chat/completions", payload, timeout)
+        try:
+            return data["choices"][0]["message"]["content"].strip()
+        except (KeyError, IndexError, TypeError, AttributeError):
+            raise OpenAIError("API response has no message content") from None
+
+    async def stream_chat(self, payload, timeout=None):
+        """Yield the content deltas of a streamed chat completion as they arrive.
+
+        Server-sent events are parsed incrementally, so the first tokens are
+        available before the completion finishes. Closing the generator early
+        closes the connection.
+        """
+        deadline = self._deadline(timeout)
+        response = await self._open("POST", "/chat/completions", dict(payload, stream=True), deadline)
+        completed = False
+        try:
+            if response.status != 200:
+                body = await response.read(deadline)
+                completed = True
+                raise OpenAIError(f"API request failed: {response.status} {body[:200].decode('utf-8', 'replace')}",
+                                  response.status)
+            pending = b""
+            done = False
+            async for chunk in response.iter_body(deadline):
+                pending += chunk
+                *events, pending = pending.replace(b"\r\n", b"\n").split(b"\n\n")
+                for event in events:
+                    for line in event.split(b"\n"):
+                        if not line.startswith(b"data:"):
+                            continue
+                        data = line[5:].strip()
+                        if data == b"[DONE]":
+                            done = True
+                            continue
+                        try:
+                            choices = json.loads(data).get("choices") or [{}]
+                            content = (choices[0].get("delta") or {}).get("content")
+                        except (ValueError, AttributeError, IndexError, TypeError):
+                            raise OpenAIError("API streamed an invalid event", response.status) from None
+                        if content:
+                            yield content
+            completed = True
+            if not done:
+                raise OpenAIError("Stream ended before [DONE]")
+        except (ConnectionError, asyncio.IncompleteReadError, ssl.SSLError) as e:
+            raise OpenAIError(f"Connection to {self.host} failed: {e}") from None
+        finally:
+            self._finish(response, completed)
+
+if __name__ == "__main__":
+    async def main():
+        async with AsyncOpenAIClient() as client:
+            payload = {"model": "gpt-4", "messages": [{"role": "user", "content": "Name three microwave breakfasts."}]}
+            async for text in client.stream_chat(payload):
+                print(text, end="", flush=True)
+            print()
+
+    print("Make sure you have OPENAI_API_KEY set in your environment variables.")
+    asyncio.run(main())
@@ -0,0 +1,265 @@
+import os
+import json
+import hashlib
+import logging
+from collections import Counter
+
+import numpy as np
+
+from recipe_models import Category, Difficulty, Method
+from recipe_snapshot import CACHE_DIR, file_digest, load_recipes
+
+# Set up logging
+logging.basicConfig(level=logging.INFO)
+
+# Bump when keys or field hashes are computed differently so old files are rebuilt
+FINGERPRINT_VERSION = 2
+
+# Fields hashed separately, in column order
+FIELDS = ("title", "category", "method", "ingredients", "steps", "difficulty", "time", "image", "nutrition")
+
+# What each kind of downstream work reads; a change to any of these fields reschedules it
+WORK_FIELDS = {
+    "nutrition": ("title", "ingredients", "method"),
+    "image": ("title", "category"),
+    "similarity": ("title", "ingredients", "method"),
+    "render": FIELDS,
+}
+
+def _digest(data):
+    return hashlib.blake2b(data, digest_size=8).digest()
+
+def _nutrition_bytes(nutrition):
+    if nutrition is None:
+        return b""
+    return nutrition.values.tobytes() + f"{nutrition.servings}|{nutrition.source}".encode("utf-8")
+
+def field_bytes(recipe, name):
+    """Return the bytes one field of a recipe is hashed as."""
+    value = getattr(recipe, name)
+    if name == "nutrition":
+        return _nutrition_bytes(value)
+    if name in ("ingredients", "steps"):
+        value = "\n".join(value)
+    elif name in ("category", "method", "difficulty"):
+        value = value.label
+    return value.encode("utf-8")
+
+def title_key(title):
+    """Normalize a title the way keys see it: case and spacing do not matter."""
+    return " ".join(title.casefold().split())
+
+class Fingerprints:
+    """Per-recipe keys and per-field hashes of one catalogue version.
+
+    keys is a uint64 per recipe derived from its stable id, so renames,
+    edits and deletions of same-titled recipes do not disturb other rows.
+    Recipes not yet given an id fall back to their normalized title plus an
+    occurrence salt, so duplicate titles still get distinct keys; fields is
+    a (recipes, FIELDS) uint64 matrix of field hashes. Row i is recipe i of
+    the catalogue.
+    """
+
+    def __init__(self, keys, fields, titles, source_sha1=""):
+        self.keys = keys
+        self.fields = fields
+        self.titles = titles
+        self.source_sha1 = source_sha1
+
+    def __len__(self):
+        return len(self.keys)
+
+    @classmethod
+    def build(cls, recipes, source_sha1=""):
+        # Enum fields index a table of their label digests; short repeated values are hashed once
+        labels = {
+            enum_cls: tuple(_digest(member.label.encode("utf-8")) for member in enum_cls)
+            for enum_cls in (Category, Method, Difficulty)
+        }
+        categories, methods, difficulties = labels[Category], labels[Method], labels[Difficulty]
+        short = {}
+
+        def text(value):
+            digest = short.get(value)
+            if digest is None:
+                digest = _digest(value.encode("utf-8"))
+                if len(value) < 32:
+                    short[value] = digest
+            return digest
+
+        seen = Counter()
+        keys = []
+        cells = []
+        for recipe in recipes:
+            if recipe.id:
+                keys.append(_digest(f"id\0{recipe.id}".encode("utf-8")))
+            else:
+                normalized = title_key(recipe.title)
+                seen[normalized] += 1
+                keys.append(_digest(f"{normalized}\0{seen[normalized]}".encode("utf-8")))
+            cells += (
+                text(recipe.title),
+                categories[recipe.category],
+                methods[recipe.method],
+                text("\n".join(recipe.ingredients)),
+                text("\n".join(recipe.steps)),
+                difficulties[recipe.difficulty],
+                text(recipe.time),
+                text(recipe.image),
+                _digest(_nutrition_bytes(recipe.nutrition)),
+            )
+        keys = np.frombuffer(b"".join(keys), dtype="<u8")
+        fields = np.frombuffer(b"".join(cells), dtype="<u8").reshape(len(recipes), len(FIELDS))
+        return cls(keys, fields, [recipe.title for recipe in recipes], source_sha1)
+
+    def save(self, path):
+        """Write the fingerprints to path atomically as .npz."""
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        meta = {"version": FINGERPRINT_VERSION, "source_sha1": self.source_sha1, "fields": FIELDS}
+        titles = np.frombuffer("\n".join(self.titles).encode("utf-8"), dtype=np.uint8)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'wb') as f:
+            np.savez(f, meta=np.array(json.dumps(meta)), keys=self.keys, fields=self.fields, titles=titles)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path):
+        """Read fingerprints written by save(); raises ValueError for foreign or stale layouts."""
+        with np.load(path, allow_pickle=False) as data:
+            meta = json.loads(str(data["meta"]))
+            if meta.get("version") != FINGERPRINT_VERSION or tuple(meta.get("fields", ())) != FIELDS:
+                raise ValueError(f"Incompatible fingerprints {path}")
+            keys = data["keys"]
+            titles = data["titles"].tobytes().decode("utf-8").split("\n") if len(keys) else []
+            return cls(keys, data["fields"], titles, meta.get("source_sha1", ""))
+
+class CatalogueDiff:
+    """What changed between two catalogue versions.
+
+    added lists positions in the new catalogue; removed lists titles from
+    the old one and removed_rows their positions there; modified maps new
+    positions to the names of the fields that changed. rows gives the old
+    position of every new recipe, -1 for added ones. A recipe whose title changed but whose other fields did
+    not is reported as modified in "title" rather than removed and added;
+    with stable ids any rename is, whatever else changed with it.
+    """
+
+    def __init__(self, added, removed, modified, rows=(), removed_rows=()):
+        self.added = added
+        self.removed = removed
+        self.modified = modified
+        self.rows = rows
+        self.removed_rows = removed_rows
+
+    def __bool__(self):
+        return bool(self.added or self.removed or self.modified)
+
+    def needs(self, work):
+        """Return sorted new positions that the given work (a WORK_FIELDS key or field names) must redo."""
+        fields = set(WORK_FIELDS.get(work, work) if isinstance(work, str) else work)
+        changed = [position for position, names in self.modified.items() if fields.intersection(names)]
+        return sorted(self.added + changed)
+
+    def summary(self):
+        counts = Counter(name for names in self.modified.values() for name in names)
+        detail = ", ".join(f"{name} {count}" for name, count in counts.most_common())
+        return (f"{len(self.added)} added, {len(self.removed)} removed, {len(self.modified)} modified"
+                + (f" ({detail})" if detail else ""))
+
+    def to_dict(self, titles):
+        """Return a JSON-ready report; titles are the new catalogue's titles."""
+        return {
+            "added": [titles[position] for position in self.added],
+            "removed": self.removed,
+            "modified": {titles[position]: list(names) for position, names in sorted(self.modified.items())},
+        }
+
+def diff_fingerprints(old, new):
+    """Compare two Fingerprints in linear time (plus one sort of the old keys)."""
+    order = np.argsort(old.keys, kind="stable")
+    sorted_keys = old.keys[order]
+    slots = np.minimum(np.searchsorted(sorted_keys, new.keys), max(len(old) - 1, 0))
+    matched = sorted_keys[slots] == new.keys if len(old) else np.zeros(len(new), dtype=bool)
+    old_rows = order[slots[matched]]
+    new_rows = np.flatnonzero(matched)
+
+    changed = old.fields[old_rows] != new.fields[new_rows]
+    modified = {}
+    for row in np.flatnonzero(changed.any(axis=1)).tolist():
+        modified[int(new_rows[row])] = tuple(FIELDS[column] for column in np.flatnonzero(changed[row]))
+
+    rows = np.full(len(new), -1, dtype=np.int64)
+    rows[new_rows] = old_rows
+    seen_old = np.zeros(len(old), dtype=bool)
+    seen_old[old_rows] = True
+    added = np.flatnonzero(~matched).tolist()
+    removed = np.flatnonzero(~seen_old).tolist()
+
+    # Pair renames: an unmatched old and new recipe whose other fields hash the same
+    if added and removed:
+        rest = [column for column, name in enumerate(FIELDS) if name != "title"]
+        by_content = {}
+        for row in removed:
+            by_content.setdefault(old.fields[row, rest].tobytes(), []).append(row)
+        still_added = []
+        renamed = set()
+        for position in added:
+            candidates = by_content.get(new.fields[position, rest].tobytes())
+            if candidates:
+                row = candidates.pop(0)
+                renamed.add(row)
+                rows[position] = row
+                modified[position] = ("title",)
+            else:
+                still_added.append(position)
+        added = still_added
+        removed = [row for row in removed if row not in renamed]
+
+    return CatalogueDiff(added, [old.titles[row] for row in removed], modified, rows, removed)
+
+def fingerprints_path(html_file: str = "index.html", baseline: str = None):
+    """Return where the current fingerprints, or a named baseline, for html_file are stored."""
+    directory, name = os.path.split(os.path.abspath(html_file))
+    suffix = f".{baseline}.baseline.npz" if baseline else ".fingerprints.npz"
+    return os.path.join(directory, CACHE_DIR, name + suffix)
+
+def load_fingerprints(html_file: str = "index.html"):
+    """Return the fingerprints of html_file as it is now, rebuilding them when the file changed."""
+    path = fingerprints_path(html_file)
+    sha1 = file_digest(html_file)
+    try:
+        fingerprints = Fingerprints.load(path)
+        if fingerprints.source_sha1 == sha1:
+            return fingerprints
+    except (OSError, KeyError, ValueError):
+        pass
+
+    fingerprints = Fingerprints.build(load_recipes(html_file), sha1)
+    fingerprints.save(path)
+    logging.info(f"Rebuilt fingerprints for {html_file} ({len(fingerprints)} recipes)")
+    return fingerprints
+
+def changes_since(baseline, html_file: str = "index.html"):
+    """Return (diff, current) between the named baseline and html_file now.
+
+    Without a saved baseline every recipe counts as added. Call
+    mark_done(baseline, current) once the scheduled work has finished.
+    """
+    current = load_fingerprints(html_file)
+    try:
+        previous = Fingerprints.load(fingerprints_path(html_file, baseline))
+    except (OSError, KeyError, ValueError):
+        previous = Fingerprints(np.empty(0, dtype="<u8"), np.empty((0, len(FIELDS)), dtype="<u8"), [])
+    return diff_fingerprints(previous, current), current
+
+def mark_done(baseline, fingerprints, html_file: str = "index.html"):
+    """Record fingerprints as the named baseline for the next changes_since."""
+    fingerprints.save(fingerprints_path(html_file, baseline))
+
+if __name__ == "__main__":
+    print("Comparing index.html against the last report...")
+    diff, current = changes_since("report")
+    print(diff.summary())
+    print(json.dumps(diff.to_dict(current.titles), indent=2)[:2000])
+    print(f"Nutrition work: {len(diff.needs('nutrition'))} recipes, render work: {len(diff.needs('render'))}")
+    mark_done("report", current)
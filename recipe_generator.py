@@ -0,0 +1,188 @@
+import logging
+from itertools import combinations, islice
+
+from ingredient_canon import canonical_id, ingredient_name, normalize
+from meal_planner import DEFAULT_GOALS, GOAL_KEYS, MEAL_SLOTS
+from nutrition_api import get_nutrition_from_api
+from recipe_models import Category, Difficulty, Method, Recipe
+from sharded_executor import run_sharded
+
+# Set up logging
+logging.basicConfig(level=logging.INFO)
+
+# The templates from generateAICRecipe in index.html. Each pattern also lists
+# the ingredients its steps rely on, so only recipes the pantry can make are
+# produced, and carries a fixed category and time instead of a random one.
+TEMPLATES = (
+    {
+        "name": "Microwave {main} Bowl",
+        "base": ("rice", "pasta", "quinoa", "oats"),
+        "patterns": (
+            {"main": "Rice", "requires": ("rice",), "category": Category.LUNCH, "time": "10 min",
+             "steps": ("Add 1 cup rice and 1.5 cups water to a bowl.", "Microwave 5 minutes, let stand 2 minutes.",
+                       "Top with {toppings} and serve hot.")},
+            {"main": "Pasta", "requires": ("pasta",), "category": Category.DINNER, "time": "10 min",
+             "steps": ("Add 1 cup pasta and enough water to cover in a bowl.", "Microwave 4-5 minutes until tender.",
+                       "Drain and mix with {toppings}.")},
+        ),
+    },
+    {
+        "name": "Microwave {main} Wrap",
+        "base": ("tortilla", "bread"),
+        "patterns": (
+            {"main": "Quesadilla", "requires": ("tortilla",), "category": Category.LUNCH, "time": "5 min",
+             "steps": ("Place tortilla on a plate.", "Add {fillings} to one half.",
+                       "Fold over and microwave 1-2 minutes until melted.")},
+            {"main": "Breakfast", "requires": ("tortilla", "egg"), "category": Category.BREAKFAST, "time": "5 min",
+             "steps": ("Scramble {eggs} in a mug for 1 minute.", "Warm tortilla 15 seconds.",
+                       "Fill with scrambled eggs and {toppings}.")},
+        ),
+    },
+    {
+        "name": "Microwave {main} Mug Cake",
+        "base": ("flour", "sugar", "cocoa", "chocolate"),
+        "patterns": (
+            {"main": "Chocolate", "requires": ("flour", "sugar", "cocoa", "milk", "oil"), "category": Category.DESSERTS,
+             "time": "5 min", "toppings": False,
+             "steps": ("Mix 4 tbsp flour, 3 tbsp sugar, 2 tbsp cocoa in a mug.", "Add 3 tbsp milk and 2 tbsp oil.",
+                       "Microwave 1-2 minutes until set.")},
+            {"main": "Vanilla", "requires": ("flour", "sugar", "baking powder", "milk", "oil"),
+             "category": Category.DESSERTS, "time": "5 min", "toppings": False,
+             "steps": ("Mix 4 tbsp flour, 2 tbsp sugar, 1/4 tsp baking powder in a mug.",
+                       "Add 3 tbsp milk and 1 tbsp oil.", "Microwave 1-2 minutes until fluffy.")},
+        ),
+    },
+    {
+        "name": "Microwave {main} Scramble",
+        "base": ("eggs", "cheese"),
+        "patterns": (
+            {"main": "Cheesy", "requires": ("egg", "cheese", "milk"), "category": Category.BREAKFAST, "time": "5 min",
+             "toppings": False,
+             "steps": ("Crack 2 eggs into a mug, whisk with 2 tbsp milk.", "Add {cheese} and microwave 30 seconds.",
+                       "Stir and microwave another 30-60 seconds.")},
+        ),
+    },
+)
+
+FALLBACK_STEPS = (
+    "Combine all ingredients in a microwave-safe bowl.",
+    "Add 2-3 tablespoons of water or oil as needed.",
+    "Microwave for 2-3 minutes, stirring halfway through.",
+    "Let stand 1 minute before serving.",
+)
+
+# Up to this many extras go on top of each recipe, as in the page
+MAX_TOPPINGS = 3
+
+# Topping combinations tried per pattern; keeps one large pantry from dominating a batch
+MAX_VARIANTS = 6
+
+# Resolved once: the canonical ids each pattern needs
+for _template in TEMPLATES:
+    for _pattern in _template["patterns"]:
+        _pattern["required_ids"] = tuple(canonical_id(name) for name in _pattern["requires"])
+
+_MEAL_TARGETS = [DEFAULT_GOALS[key] / len(MEAL_SLOTS) for key in GOAL_KEYS]
+
+def nutrition_score(nutrition):
+    """Score an estimate by how close it lands to one meal's share of the daily goals (1.0 is exact)."""
+    miss = 0.0
+    for key, target in zip(GOAL_KEYS, _MEAL_TARGETS):
+        relative = (getattr(nutrition, key) - target) / target
+        miss += relative * relative
+    return 1.0 / (1.0 + miss)
+
+def _matches_base(template, name):
+    # Same test as the page: the ingredient contains one of the template's base words
+    return any(normalize(base) in name for base in template["base"])
+
+def _fill_steps(steps, toppings, pantry):
+    filled = []
+    for step in steps:
+        if "{toppings}" in step:
+            step = step.replace("{toppings}", ", ".join(toppings) or "your favorite seasonings")
+        if "{fillings}" in step:
+            step = step.replace("{fillings}", " and ".join(toppings) or "cheese")
+        if "{cheese}" in step:
+            step = step.replace("{cheese}", next((item for item in pantry if "cheese" in normalize(item)), "shredded cheese"))
+        if "{eggs}" in step:
+            step = step.replace("{eggs}", "2 eggs")
+        filled.append(step)
+    return tuple(filled)
+
+def _build(title, category, time, ingredients, steps):
+    nutrition = get_nutrition_from_api(ingredients)
+    recipe = Recipe(title, category, Method.MICROWAVE, ingredients, steps, Difficulty.EASY, time, nutrition=nutrition)
+    return nutrition_score(nutrition), recipe
+
+def generate_recipes(pantry):
+    """Return every recipe the templates can make from a pantry, best score first.
+
+    pantry is a list of ingredient strings as typed by the user. Results are
+    (score, Recipe) pairs; recipes whose title and canonical ingredient set
+    repeat are dropped. With no usable template the page's "Microwave Mixed
+    Bowl" fallback is returned.
+    """
+    pantry = [item for item in dict.fromkeys(pantry) if normalize(item)]
+    by_id = {}
+    for item in pantry:
+        by_id.setdefault(canonical_id(item), item)
+
+    results = []
+    seen = set()
+    for template in TEMPLATES:
+        base_ids = {number for number in by_id if _matches_base(template, ingredient_name(number))}
+        if not base_ids:
+            continue
+        for pattern in template["patterns"]:
+            if any(number not in by_id for number in pattern["required_ids"]):
+                continue
+            required = [by_id[number] for number in pattern["required_ids"]]
+            extras = [item for number, item in by_id.items()
+                      if number not in base_ids and number not in pattern["required_ids"]]
+            if pattern.get("toppings", True):
+                size = min(MAX_TOPPINGS, len(extras))
+                variants = list(islice(combinations(extras, size), MAX_VARIANTS))
+            else:
+                variants = [()]
+            title = template["name"].replace("{main}", pattern["main"])
+            for toppings in variants:
+                ingredients = required + list(toppings)
+                key = (title, frozenset(canonical_id(item) for item in ingredients))
+                if key in seen:
+                    continue
+                seen.add(key)
+                steps = _fill_steps(pattern["steps"], toppings, pantry)
+                results.append(_build(title, pattern["category"], pattern["time"], ingredients, steps))
+
+    if not results and pantry:
+        results.append(_build("Microwave Mixed Bowl", Category.LUNCH, "5 min", pantry, FALLBACK_STEPS))
+
+    results.sort(key=lambda result: (-result[0], result[1].title))
+    return results
+
+def _generate_summary(pantry):
+    """Worker entry point: generated recipes as plain dicts with their scores."""
+    return [dict(recipe.to_dict(), score=round(score, 3)) for score, recipe in generate_recipes(pantry)]
+
+def generate_for_pantries(pantries, workers=None):
+    """Generate suggestions for many pantries, sharding large batches across processes.
+
+    Returns one list of recipe dicts (with a "score" field) per pantry, in
+    input order. Pantries with the same canonical ingredients are only
+    generated once.
+    """
+    pantries = [list(pantry) for pantry in pantries]
+    keys = [frozenset(canonical_id(item) for item in pantry if normalize(item)) for pantry in pantries]
+    unique = {}
+    for key, pantry in zip(keys, pantries):
+        unique.setdefault(key, pantry)
+    generated = dict(zip(unique, run_sharded(_generate_summary, list(unique.values()), workers=workers)))
+    logging.info(f"Generated suggestions for {len(pantries)} pantries ({len(unique)} distinct)")
+    return [generated[key] for key in keys]
+
+if __name__ == "__main__":
+    pantry = ["rice", "pasta", "2 eggs", "cheese", "tortilla", "spinach", "milk", "salsa", "flour", "sugar", "oil", "cocoa"]
+    print(f"Generating recipes for: {', '.join(pantry)}\n")
+    for score, recipe in generate_recipes(pantry):
+        print(f"{score:.2f}  {recipe.title}: {', '.join(recipe.ingredients)}")
@@ -0,0 +1,179 @@
+import os
+import json
+import logging
+
+from recipe_diff import title_key
+from recipe_mmap import field_text, insert_field, mapped_file, patch_recipes, replace_field
+from recipe_parser import iter_recipe_objects
+from recipe_snapshot import CACHE_DIR, file_digest, load_recipes_with_offsets
+
+# Set up logging
+logging.basicConfig(level=logging.INFO)
+
+# Bump when the stored index changes so old files are rebuilt
+IDS_VERSION = 2
+
+# Ids look like "r42"; the prefix keeps them apart from array positions in URLs
+ID_PREFIX = "r"
+
+def recipe_key(recipe):
+    """Return the key a recipe is matched by when patching index.html: its id, or its title before it has one."""
+    return recipe.id or recipe.title
+
+def record_key(buf, fields):
+    """Return recipe_key for a scanned recipe object in index.html."""
+    return field_text(buf, fields, "id") or field_text(buf, fields, "title")
+
+def _id_number(recipe_id):
+    if recipe_id and recipe_id.startswith(ID_PREFIX) and recipe_id[len(ID_PREFIX):].isdigit():
+        return int(recipe_id[len(ID_PREFIX):])
+    return 0
+
+def assign_ids(html_file: str = "index.html"):
+    """Stamp an `id` into every recipe in html_file that lacks one; returns how many were stamped.
+
+    Ids are never reused: new ones continue after the highest existing
+    number. A recipe object copied by hand carries its original's id, so
+    the second holder of an id gets a fresh one.
+    """
+    with mapped_file(html_file) as buf:
+        existing = [field_text(buf, fields, "id") for _, _, fields in iter_recipe_objects(buf)]
+    if all(existing) and len(set(existing)) == len(existing):
+        return 0
+
+    next_number = max(map(_id_number, existing), default=0)
+    seen = set()
+
+    def stamp(buf, start, end, fields):
+        nonlocal next_number
+        recipe_id = field_text(buf, fields, "id")
+        if recipe_id and recipe_id not in seen:
+            seen.add(recipe_id)
+            return None
+        next_number += 1
+        new_id = f"{ID_PREFIX}{next_number}"
+        seen.add(new_id)
+        if recipe_id:
+            return [replace_field(fields, "id", new_id)]
+        return [insert_field(buf, end, "id", new_id)]
+
+    stamped = patch_recipes(html_file, stamp)
+    logging.info(f"Assigned ids to {stamped} recipes in {html_file}")
+    return stamped
+
+def ingest(html_file: str = "index.html"):
+    """Prepare html_file for the scripts that write back to it; returns how many ids were stamped.
+
+    Loading recipes never modifies the HTML, so writers call this first to
+    make sure every recipe they patch can be matched by its stable id.
+    """
+    return assign_ids(html_file)
+
+class RecipeIds:
+    """Hash indexes from stable ids and titles to catalogue rows.
+
+    ids lists the id of each row; offsets holds the start/end byte offsets
+    of each row's object literal in index.html, as in the snapshot.
+    source_stat is the [size, mtime_ns] of the file it was built from.
+    """
+
+    def __init__(self, ids, titles, offsets, source_sha1="", source_stat=(0, 0)):
+        self.ids = ids
+        self.titles = titles
+        self.offsets = offsets
+        self.source_sha1 = source_sha1
+        self.source_stat = list(source_stat)
+        self.positions = {recipe_id: position for position, recipe_id in enumerate(ids) if recipe_id}
+        self.by_title = {}
+        for recipe_id, title in zip(ids, titles):
+            self.by_title.setdefault(title_key(title), []).append(recipe_id)
+
+    def __len__(self):
+        return len(self.ids)
+
+    def __contains__(self, recipe_id):
+        return recipe_id in self.positions
+
+    @classmethod
+    def build(cls, recipes, offsets, source_sha1="", source_stat=(0, 0)):
+        return cls([recipe.id for recipe in recipes], [recipe.title for recipe in recipes], list(offsets),
+                   source_sha1, source_stat)
+
+    def position(self, recipe_id):
+        """Return the catalogue row of recipe_id, or None."""
+        return self.positions.get(recipe_id)
+
+    def offset(self, recipe_id):
+        """Return the (start, end) byte offsets of recipe_id's object literal, or None."""
+        position = self.positions.get(recipe_id)
+        if position is None:
+            return None
+        return self.offsets[2 * position], self.offsets[2 * position + 1]
+
+    def id_for_title(self, title):
+        """Return the id of the first recipe with this title (ignoring case and spacing), or None."""
+        ids = self.by_title.get(title_key(title))
+        return ids[0] if ids else None
+
+    def save(self, path):
+        """Write the index to path atomically as JSON."""
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        data = {"version": IDS_VERSION, "source_sha1": self.source_sha1, "source_stat": self.source_stat,
+                "ids": self.ids, "titles": self.titles, "offsets": self.offsets}
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False, separators=(",", ":"))
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path):
+        """Read an index written by save(); raises ValueError for foreign or stale layouts."""
+        with open(path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        if data.get("version") != IDS_VERSION:
+            raise ValueError(f"Incompatible id index {path}")
+        return cls(data["ids"], data["titles"], data["offsets"], data.get("source_sha1", ""),
+                   data.get("source_stat", (0, 0)))
+
+def ids_path(html_file: str = "index.html"):
+    """Return where the id index for html_file is stored."""
+    directory, name = os.path.split(os.path.abspath(html_file))
+    return os.path.join(directory, CACHE_DIR, name + ".ids.json")
+
+def load_recipe_ids(html_file: str = "index.html"):
+    """Return the id index for html_file, rebuilding it when the file changed.
+
+    As with the snapshot, a matching size and mtime is trusted as is; the
+    content hash is only taken when the mtime moved but the size did not.
+    """
+    path = ids_path(html_file)
+    stat = os.stat(html_file)
+    source_stat = [stat.st_size, stat.st_mtime_ns]
+    sha1 = None
+    try:
+        index = RecipeIds.load(path)
+        if index.source_stat == source_stat:
+            return index
+        if index.source_stat[0] == stat.st_size:
+            sha1 = file_digest(html_file)
+            if index.source_sha1 == sha1:
+                index.source_stat = source_stat
+                index.save(path)
+                return index
+    except (OSError, KeyError, ValueError):
+        pass
+
+    recipes, offsets = load_recipes_with_offsets(html_file)
+    index = RecipeIds.build(recipes, offsets, sha1 or file_digest(html_file), source_stat)
+    index.save(path)
+    logging.info(f"Rebuilt id index for {html_file} ({len(index)} recipes)")
+    return index
+
+if __name__ == "__main__":
+    # The ingest step: `python recipe_ids.py` stamps ids into index.html after recipes are added by hand
+    print("Assigning stable recipe ids...")
+    ingest()
+    index = load_recipe_ids()
+    first = index.ids[0]
+    print(f"{len(index)} recipes; {first} is row {index.position(first)} at bytes {index.offset(first)}")
+    print(f"'{index.titles[0]}' -> {index.id_for_title(index.titles[0])}")
@@ -0,0 +1,132 @@
+import numpy as np
+
+from ingredient_canon import canonical_id, ingredient_name, lemmatize, normalize
+from nutrition_range import NutritionRangeIndex
+from recipe_models import NUTRIENTS, Category, Method, parse_code
+from recipe_snapshot import load_recipes
+
+# Ingredients that rule a recipe out of each diet (mirrors filterRecipes in index.html)
+DIET_EXCLUDES = {
+    "vegan": {"meat", "chicken", "beef", "pork", "fish", "seafood", "egg", "eggs", "dairy", "milk", "cheese", "butter", "cream", "yogurt"},
+    "vegetarian": {"meat", "chicken", "beef", "pork", "fish", "seafood"},
+    "keto": {"bread", "pasta", "rice", "potato", "potatoes", "sugar", "flour", "oats", "cereal"},
+    "gluten-free": {"bread", "pasta", "flour", "wheat", "barley", "rye", "oats"},
+    "paleo": {"bread", "pasta", "rice", "dairy", "milk", "cheese", "processed"},
+    "low-carb": {"bread", "pasta", "rice", "potato", "potatoes", "sugar", "flour"},
+}
+
+# Ingredients a recipe needs at least one of to count for each diet
+DIET_REQUIRES = {
+    "high-protein": {"chicken", "beef", "fish", "egg", "eggs", "protein", "meat"},
+}
+
+DIETS = tuple(DIET_EXCLUDES) + tuple(DIET_REQUIRES)
+
+# Plant-based products whose names contain a word from the lists above
+PLANT_BASED = {"peanut butter", "almond butter", "cocoa butter", "coconut milk", "almond milk", "oat milk", "soy milk"}
+
+# The lists as singular words; a canonical name hits a diet when any of its words is listed,
+# so "chicken nugget" counts as chicken and "2 eggs, beaten" as egg
+_DIET_WORDS = {diet: {lemmatize(word) for word in words} for diet, words in {**DIET_EXCLUDES, **DIET_REQUIRES}.items()}
+_diet_hits = {}
+
+def _hits_diet_list(number, diet):
+    key = (diet, number)
+    hit = _diet_hits.get(key)
+    if hit is None:
+        name = ingredient_name(number)
+        hit = name not in PLANT_BASED and any(lemmatize(word) in _DIET_WORDS[diet] for word in name.split())
+        _diet_hits[key] = hit
+    return hit
+
+def matches_diet(ingredient_ids, diet):
+    """Return True when a set of canonical ingredient ids fits the diet."""
+    if diet in DIET_EXCLUDES:
+        return not any(_hits_diet_list(number, diet) for number in ingredient_ids)
+    if diet in DIET_REQUIRES:
+        return any(_hits_diet_list(number, diet) for number in ingredient_ids)
+    raise ValueError(f"Unknown diet: {diet!r}")
+
+def iter_bits(bitmap):
+    """Return the positions of the set bits in a bitmap, lowest first."""
+    return np.flatnonzero(bitmap).tolist()
+
+class RecipeIndex:
+    """In-memory recipe store with bitmap indexes for the page's filters.
+
+    Bitmaps are numpy bool arrays with entry i set when recipe i
+    qualifies, so combining filters is a couple of vectorized ANDs and
+    listing the matches is linear in the catalogue size.
+    """
+
+    def __init__(self, recipes):
+        self.recipes = list(recipes)
+        count = len(self.recipes)
+        self.all_bits = np.ones(count, dtype=bool)
+        categories = np.fromiter((recipe.category for recipe in self.recipes), dtype=np.int8, count=count)
+        methods = np.fromiter((recipe.method for recipe in self.recipes), dtype=np.int8, count=count)
+        self.category_bits = {category: categories == category for category in Category}
+        self.method_bits = {method: methods == method for method in Method}
+        self.diet_bits = {diet: np.zeros(count, dtype=bool) for diet in DIETS}
+        # One row of NUTRIENTS values per recipe, NaN where nutrition is missing
+        self.nutrient_values = np.full((count, len(NUTRIENTS)), np.nan, dtype=np.float32)
+        self.ingredient_sets = []
+        self.title_positions = {}
+
+        for i, recipe in enumerate(self.recipes):
+            ingredients = frozenset(recipe.ingredient_ids)
+            self.ingredient_sets.append(ingredients)
+            if recipe.nutrition is not None:
+                self.nutrient_values[i] = recipe.nutrition.values
+            for diet in DIETS:
+                if matches_diet(ingredients, diet):
+                    self.diet_bits[diet][i] = True
+            self.title_positions.setdefault(recipe.title, []).append(i)
+        self.nutrition = NutritionRangeIndex(self.recipes)
+
+    @classmethod
+    def from_html(cls, html_file: str = "index.html"):
+        """Build the index from the parsed recipe snapshot."""
+        return cls(load_recipes(html_file))
+
+    def __len__(self):
+        return len(self.recipes)
+
+    def filter_bits(self, category=None, method=None, diet=None, ranges=None):
+        """Return the bitmap of recipes passing the category/method/diet filters.
+
+        Each filter takes the label used in index.html; None or "all" skips it.
+        ranges maps nutrients to inclusive (low, high) bounds, either side None.
+        """
+        bits = self.all_bits.copy()
+        if category not in (None, "all"):
+            bits &= self.category_bits[parse_code(Category, category)]
+        if method not in (None, "all"):
+            bits &= self.method_bits[parse_code(Method, method)]
+        if diet not in (None, "all"):
+            if diet not in self.diet_bits:
+                raise ValueError(f"Unknown diet: {diet!r}")
+            bits &= self.diet_bits[diet]
+        if ranges:
+            bits &= self.nutrition.filter_bits(ranges)
+        return bits
+
+    def search(self, category=None, method=None, diet=None, have=(), strict=False, ranges=None):
+        """Return [(position, hits, missing)] ranked like filterRecipes in index.html.
+
+        Recipes the user can fully make come first, then more matching
+        ingredients, then fewer missing ones, then title. In strict mode only
+        recipes with nothing missing are returned.
+        """
+        have = {canonical_id(item) for item in have if normalize(item)}
+        results = []
+        for i in iter_bits(self.filter_bits(category, method, diet, ranges)):
+            needed = self.ingredient_sets[i]
+            missing = needed - have
+            if strict and have and missing:
+                continue
+            results.append((i, len(needed) - len(missing), sorted(ingredient_name(number) for number in missing)))
+
+        recipes = self.recipes
+        results.sort(key=lambda result: (bool(result[2]), -result[1], len(result[2]), recipes[result[0]].title))
+        return results
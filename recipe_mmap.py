@@ -0,0 +1,113 @@
+import os
+import mmap
+from contextlib import contextmanager
+
+from recipe_parser import decode_string, iter_recipe_objects
+
+_PADDING = frozenset(b" \t\r\n")
+_COMMA = ord(",")
+
+@contextmanager
+def mapped_file(path):
+    """Map a file read-only for the tokenizer; empty files yield b""."""
+    with open(path, 'rb') as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            yield b""
+            return
+        mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            yield mapped
+        finally:
+            try:
+                mapped.close()
+            except BufferError:
+                # A caller kept a memoryview; the map is unmapped once it is dropped
+                pass
+
+def field_view(view, span):
+    """Return a zero-copy memoryview over a string field's raw, still escaped, contents."""
+    start, stop = span
+    return view[start + 1:stop - 1]
+
+def iter_field_views(html_file: str = "index.html", names=("title",)):
+    """Yield one dict per recipe mapping each requested field to a memoryview.
+
+    The views point into the mapped file, which stays mapped while any of
+    them is alive; use bytes() for a standalone copy.
+    """
+    with mapped_file(html_file) as buf:
+        view = memoryview(buf)
+        try:
+            for _, _, fields in iter_recipe_objects(buf):
+                yield {name: field_view(view, fields[name]) for name in names if name in fields}
+        finally:
+            view.release()
+
+def field_text(buf, fields, name):
+    """Decode one string field of a scanned recipe, or None when it is absent."""
+    span = fields.get(name)
+    return decode_string(buf, *span) if span else None
+
+def string_literal(text):
+    """Return text as a double-quoted JavaScript literal (text must already be escaped)."""
+    return f'"{text}"'.encode("utf-8")
+
+def insert_field(buf, end, name, text):
+    """Return an edit adding `name: "text"` as the last member of the object ending at end."""
+    # Keep the padding before the closing brace, as in `time: "3 min" }`
+    pos = end - 1
+    while buf[pos - 1] in _PADDING:
+        pos -= 1
+    prefix = b" " if buf[pos - 1] == _COMMA else b", "
+    return pos, pos, prefix + f'{name}: '.encode("ascii") + string_literal(text)
+
+def replace_field(fields, name, text):
+    """Return an edit replacing the value of an existing string field."""
+    start, stop = fields[name]
+    return start, stop, string_literal(text)
+
+def write_spliced(path, buf, edits):
+    """Stream buf into a temp file next to path with edits applied; return the temp path.
+
+    edits are (start, stop, replacement) tuples sorted by start and not
+    overlapping. Unchanged spans are written straight from buf without
+    being copied into Python objects.
+    """
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    view = memoryview(buf)
+    try:
+        with open(tmp_path, 'wb') as out:
+            pos = 0
+            for start, stop, replacement in edits:
+                out.write(view[pos:start])
+                out.write(replacement)
+                pos = stop
+            out.write(view[pos:])
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    finally:
+        view.release()
+    return tmp_path
+
+def patch_recipes(html_file, patch):
+    """Rewrite html_file by calling patch(buf, start, end, fields) for every recipe.
+
+    patch returns a list of edits for that recipe (see insert_field and
+    replace_field) or None. Returns how many recipes were changed; the file
+    is only rewritten when at least one was.
+    """
+    changed = 0
+    with mapped_file(html_file) as buf:
+        edits = []
+        for start, end, fields in iter_recipe_objects(buf):
+            recipe_edits = patch(buf, start, end, fields)
+            if recipe_edits:
+                edits.extend(recipe_edits)
+                changed += 1
+        if not edits:
+            return 0
+        tmp_path = write_spliced(html_file, buf, edits)
+    os.replace(tmp_path, html_file)
+    return changed
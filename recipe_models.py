@@ -0,0 +1,221 @@
+import sys
+import json
+from array import array
+from enum import IntEnum
+
+from ingredient_canon import canonical_ids
+
+# Order of the nutrient slots in every Nutrition.values array
+NUTRIENTS = ("calories", "protein", "carbs", "fat", "fiber", "sugar", "sodium")
+
+# Nutrients stored as whole numbers in index.html; the rest keep one decimal
+WHOLE_NUTRIENTS = ("calories", "sodium")
+
+class Category(IntEnum):
+    BREAKFAST = 0
+    LUNCH = 1
+    DINNER = 2
+    DESSERTS = 3
+
+    @property
+    def label(self):
+        return self.name.lower()
+
+class Method(IntEnum):
+    MICROWAVE = 0
+    AIR_FRYER = 1
+    OVEN = 2
+    NO_COOK = 3
+
+    @property
+    def label(self):
+        return self.name.lower().replace("_", "-")
+
+class Difficulty(IntEnum):
+    VERY_EASY = 0
+    EASY = 1
+    MEDIUM = 2
+
+    @property
+    def label(self):
+        return self.name.title().replace("_", " ")
+
+# Label -> member tables, built once so parsing never walks the enum
+_CODES = {
+    enum_cls: {member.label: member for member in enum_cls}
+    for enum_cls in (Category, Method, Difficulty)
+}
+
+def parse_code(enum_cls, label):
+    """Return the enum member for a label as written in index.html."""
+    try:
+        return _CODES[enum_cls][label]
+    except KeyError:
+        raise ValueError(f"Unknown {enum_cls.__name__.lower()}: {label!r}") from None
+
+def _nutrient_property(index):
+    """Build a read/write property over one slot of Nutrition.values."""
+    def fget(self):
+        return self.values[index]
+
+    def fset(self, value):
+        self.values[index] = value
+
+    return property(fget, fset)
+
+class Nutrition:
+    """Per-serving nutrition with the seven nutrients packed into an array('f').
+
+    source records where the numbers came from ("local", a model name, ...),
+    or is empty when unknown.
+    """
+
+    __slots__ = ("values", "servings", "source")
+
+    def __init__(self, values=None, servings=1, source=""):
+        self.values = array('f', values) if values is not None else array('f', bytes(4 * len(NUTRIENTS)))
+        self.servings = servings
+        self.source = source
+
+    calories = _nutrient_property(0)
+    protein = _nutrient_property(1)
+    carbs = _nutrient_property(2)
+    fat = _nutrient_property(3)
+    fiber = _nutrient_property(4)
+    sugar = _nutrient_property(5)
+    sodium = _nutrient_property(6)
+
+    @classmethod
+    def from_dict(cls, data):
+        """Build from a dict such as the JSON returned by the GPT scripts."""
+        return cls([float(data.get(name, 0) or 0) for name in NUTRIENTS], int(data.get("servings", 1) or 1),
+                   data.get("source") or "")
+
+    @classmethod
+    def from_json(cls, text):
+        """Build from a nutrition string, escaped as in index.html or plain JSON."""
+        if '\\"' in text:
+            text = text.replace('\\"', '"')
+        return cls.from_dict(json.loads(text))
+
+    def copy(self):
+        return Nutrition(self.values, self.servings, self.source)
+
+    def add(self, values):
+        """Accumulate another array of nutrient values in place."""
+        own = self.values
+        for i in range(len(NUTRIENTS)):
+            own[i] += values[i]
+
+    def to_dict(self):
+        """Return the rounded dict written to index.html."""
+        data = {}
+        for name, value in zip(NUTRIENTS, self.values):
+            data[name] = int(round(value)) if name in WHOLE_NUTRIENTS else round(value, 1)
+        data["servings"] = int(self.servings)
+        if self.source:
+            data["source"] = self.source
+        return data
+
+    def to_json(self):
+        return json.dumps(self.to_dict())
+
+    def to_embedded_json(self):
+        """Return the JSON with quotes escaped for a `nutrition: "..."` field."""
+        return self.to_json().replace('"', '\\"')
+
+    def __eq__(self, other):
+        if not isinstance(other, Nutrition):
+            return NotImplemented
+        return self.values == other.values and self.servings == other.servings
+
+    def __repr__(self):
+        return f"Nutrition({self.to_dict()})"
+
+class Recipe:
+    """One entry of the `recipes` array in index.html."""
+
+    __slots__ = ("title", "category", "method", "ingredients", "ingredient_ids", "steps", "difficulty", "time",
+                 "image", "nutrition", "id")
+
+    def __init__(self, title, category=Category.BREAKFAST, method=Method.MICROWAVE, ingredients=(), steps=(),
+                 difficulty=Difficulty.EASY, time="", image="", nutrition=None, recipe_id=""):
+        # Stable id stamped into index.html by recipe_ids.assign_ids; empty until then
+        self.id = recipe_id
+        self.title = title
+        self.category = category
+        self.method = method
+        # Ingredient names repeat across hundreds of recipes, so share one copy of each
+        self.ingredients = tuple(sys.intern(ingredient) for ingredient in ingredients)
+        # Canonical ids line up with ingredients; indexes compare these instead of the text
+        self.ingredient_ids = canonical_ids(self.ingredients)
+        self.steps = tuple(steps)
+        self.difficulty = difficulty
+        self.time = time
+        self.image = image
+        self.nutrition = nutrition
+
+    @classmethod
+    def from_fields(cls, title, category, method, ingredients, steps, difficulty, time, image="", nutrition="",
+                    recipe_id=""):
+        """Build from the raw string fields captured out of index.html."""
+        return cls(
+            title,
+            parse_code(Category, category),
+            parse_code(Method, method),
+            ingredients,
+            steps,
+            parse_code(Difficulty, difficulty),
+            time,
+            image or "",
+            Nutrition.from_json(nutrition) if nutrition else None,
+            recipe_id,
+        )
+
+    @classmethod
+    def from_dict(cls, data):
+        """Build from a dict shaped like the JavaScript recipe object."""
+        nutrition = data.get("nutrition")
+        if isinstance(nutrition, str):
+            nutrition = Nutrition.from_json(nutrition) if nutrition else None
+        elif isinstance(nutrition, dict):
+            nutrition = Nutrition.from_dict(nutrition)
+        return cls(
+            data["title"],
+            parse_code(Category, data["category"]),
+            parse_code(Method, data["method"]),
+            data.get("ingredients", ()),
+            data.get("steps", ()),
+            parse_code(Difficulty, data.get("difficulty", "Easy")),
+            data.get("time", ""),
+            data.get("image", ""),
+            nutrition,
+            data.get("id", ""),
+        )
+
+    def to_dict(self):
+        """Return the dict shape used by the JavaScript side."""
+        data = {
+            "title": self.title,
+            "category": self.category.label,
+            "method": self.method.label,
+            "ingredients": list(self.ingredients),
+            "steps": list(self.steps),
+            "difficulty": self.difficulty.label,
+            "time": self.time,
+        }
+        if self.image:
+            data["image"] = self.image
+        if self.nutrition is not None:
+            data["nutrition"] = self.nutrition.to_dict()
+        if self.id:
+            data["id"] = self.id
+        return data
+
+    def __reduce__(self):
+        # Ids are only meaningful inside one process, so pickles carry the text and re-derive them
+        return (Recipe, (self.title, self.category, self.method, self.ingredients, self.steps,
+                         self.difficulty, self.time, self.image, self.nutrition, self.id))
+
+    def __repr__(self):
+        return f"Recipe({self.title!r}, {self.category.label}, {self.method.label})"
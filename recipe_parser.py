@@ -0,0 +1,244 @@
+import re
+import logging
+from array import array
+
+from recipe_models import Recipe
+
+# Marker that opens the embedded recipe literal in index.html
+RECIPES_MARKER = b"const recipes"
+
+_WHITESPACE = frozenset(b" \t\r\n\f\v")
+_IDENT_CHARS = frozenset(b"abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789_$")
+_NUMBER_CHARS = frozenset(b"0123456789.-+eE")
+_QUOTES = {ord('"'): b'"', ord("'"): b"'"}
+
+_SLASH, _STAR, _BACKSLASH, _NEWLINE = ord("/"), ord("*"), ord("\\"), ord("\n")
+_OPEN_BRACE, _CLOSE_BRACE = ord("{"), ord("}")
+_OPEN_BRACKET, _CLOSE_BRACKET = ord("["), ord("]")
+_COLON, _COMMA = ord(":"), ord(",")
+
+_ESCAPES = {"n": "\n", "t": "\t", "r": "\r", "b": "\b", "f": "\f", "v": "\v", "0": "\0"}
+_ESCAPE_PATTERN = re.compile(r"\\(u[0-9a-fA-F]{4}|x[0-9a-fA-F]{2}|.)", re.S)
+
+class RecipeSyntaxError(ValueError):
+    """Raised when the embedded recipe literal cannot be tokenized."""
+
+    def __init__(self, message, offset):
+        super().__init__(f"{message} at byte {offset}")
+        self.message = message
+        self.offset = offset
+
+def line_col(buf, offset):
+    """Return the 1-based (line, column) of a byte offset."""
+    line = 1
+    pos = buf.find(b"\n", 0, offset)
+    last = -1
+    while pos != -1:
+        line += 1
+        last = pos
+        pos = buf.find(b"\n", pos + 1, offset)
+    return line, offset - last
+
+def skip_space(buf, pos, end):
+    """Skip whitespace and JavaScript comments, returning the next token offset."""
+    while pos < end:
+        c = buf[pos]
+        if c in _WHITESPACE:
+            pos += 1
+        elif c == _SLASH and pos + 1 < end and buf[pos + 1] == _SLASH:
+            newline = buf.find(b"\n", pos, end)
+            pos = end if newline == -1 else newline + 1
+        elif c == _SLASH and pos + 1 < end and buf[pos + 1] == _STAR:
+            close = buf.find(b"*/", pos + 2, end)
+            if close == -1:
+                raise RecipeSyntaxError("Unterminated comment", pos)
+            pos = close + 2
+        else:
+            break
+    return pos
+
+def scan_string(buf, pos, end):
+    """Return the offset just past the string literal that opens at pos."""
+    quote = _QUOTES[buf[pos]]
+    search = pos + 1
+    while True:
+        close = buf.find(quote, search, end)
+        if close == -1:
+            raise RecipeSyntaxError("Unterminated string", pos)
+        # A quote preceded by an odd number of backslashes is escaped
+        backslash = close - 1
+        while buf[backslash] == _BACKSLASH:
+            backslash -= 1
+        if (close - 1 - backslash) % 2 == 0:
+            break
+        search = close + 1
+    if buf.find(b"\n", pos, close) != -1:
+        raise RecipeSyntaxError("Line break inside string", pos)
+    return close + 1
+
+def _scan_word(buf, pos, end, chars):
+    start = pos
+    while pos < end and buf[pos] in chars:
+        pos += 1
+    if pos == start:
+        raise RecipeSyntaxError(f"Unexpected character {chr(buf[pos])!r}", pos)
+    return pos
+
+def scan_value(buf, pos, end):
+    """Scan one literal starting at pos.
+
+    Returns (next_offset, value) where strings, numbers and identifiers are
+    (start, end) spans into buf, arrays are lists and objects are dicts
+    mapping key names to values. Nothing is decoded here, so callers only
+    pay for the fields they read.
+    """
+    pos = skip_space(buf, pos, end)
+    if pos >= end:
+        raise RecipeSyntaxError("Unexpected end of input", pos)
+    c = buf[pos]
+    if c in _QUOTES:
+        stop = scan_string(buf, pos, end)
+        return stop, (pos, stop)
+    if c == _OPEN_BRACE:
+        return scan_object(buf, pos, end)
+    if c == _OPEN_BRACKET:
+        return scan_array(buf, pos, end)
+    if c in _NUMBER_CHARS:
+        stop = _scan_word(buf, pos, end, _NUMBER_CHARS)
+        return stop, (pos, stop)
+    stop = _scan_word(buf, pos, end, _IDENT_CHARS)
+    return stop, (pos, stop)
+
+def _after_item(buf, pos, end, closing, what):
+    """Consume the separator after an array item or object member."""
+    pos = skip_space(buf, pos, end)
+    if pos < end and buf[pos] == _COMMA:
+        return pos + 1, False
+    if pos < end and buf[pos] == closing:
+        return pos + 1, True
+    raise RecipeSyntaxError(f"Expected ',' or '{chr(closing)}' in {what}", pos)
+
+def scan_array(buf, pos, end):
+    """Scan an array literal whose '[' is at pos."""
+    items = []
+    pos += 1
+    while True:
+        pos = skip_space(buf, pos, end)
+        if pos < end and buf[pos] == _CLOSE_BRACKET:
+            return pos + 1, items
+        pos, item = scan_value(buf, pos, end)
+        items.append(item)
+        pos, done = _after_item(buf, pos, end, _CLOSE_BRACKET, "array")
+        if done:
+            return pos, items
+
+def scan_object(buf, pos, end):
+    """Scan an object literal whose '{' is at pos."""
+    fields = {}
+    pos += 1
+    while True:
+        pos = skip_space(buf, pos, end)
+        if pos >= end:
+            raise RecipeSyntaxError("Unterminated object", pos)
+        c = buf[pos]
+        if c == _CLOSE_BRACE:
+            return pos + 1, fields
+        if c in _QUOTES:
+            stop = scan_string(buf, pos, end)
+            key = decode_string(buf, pos, stop)
+        else:
+            stop = _scan_word(buf, pos, end, _IDENT_CHARS)
+            key = bytes(buf[pos:stop]).decode("ascii")
+        pos = skip_space(buf, stop, end)
+        if pos >= end or buf[pos] != _COLON:
+            raise RecipeSyntaxError(f"Expected ':' after {key!r}", pos)
+        pos, fields[key] = scan_value(buf, pos + 1, end)
+        pos, done = _after_item(buf, pos, end, _CLOSE_BRACE, "object")
+        if done:
+            return pos, fields
+
+def _unescape(match):
+    code = match.group(1)
+    if len(code) > 1:
+        return chr(int(code[1:], 16))
+    return _ESCAPES.get(code, code)
+
+def decode_string(buf, start, stop):
+    """Decode the string literal spanning buf[start:stop], quotes included."""
+    text = bytes(buf[start + 1:stop - 1]).decode("utf-8")
+    if "\\" in text:
+        text = _ESCAPE_PATTERN.sub(_unescape, text)
+    return text
+
+def find_recipes_array(buf):
+    """Return the byte offset of the '[' opening the `recipes` array literal."""
+    marker = buf.find(RECIPES_MARKER)
+    if marker == -1:
+        raise RecipeSyntaxError("No `const recipes` declaration found", 0)
+    start = buf.find(b"[", marker)
+    if start == -1:
+        raise RecipeSyntaxError("No array after `const recipes`", marker)
+    return start
+
+def iter_recipe_objects(buf):
+    """Yield (start, end, fields) for every object in the `recipes` array."""
+    pos = find_recipes_array(buf) + 1
+    end = len(buf)
+    while True:
+        pos = skip_space(buf, pos, end)
+        if pos >= end:
+            raise RecipeSyntaxError("Unterminated recipes array", pos)
+        if buf[pos] == _CLOSE_BRACKET:
+            return
+        if buf[pos] != _OPEN_BRACE:
+            raise RecipeSyntaxError("Expected recipe object", pos)
+        start = pos
+        pos, fields = scan_object(buf, pos, end)
+        yield start, pos, fields
+        pos, done = _after_item(buf, pos, end, _CLOSE_BRACKET, "recipes array")
+        if done:
+            return
+
+def recipe_from_fields(buf, fields):
+    """Build a Recipe from the spans produced by scan_object."""
+    def text(name, default=""):
+        span = fields.get(name)
+        return decode_string(buf, *span) if span else default
+
+    def texts(name):
+        return [decode_string(buf, *span) for span in fields.get(name, ())]
+
+    if "title" not in fields:
+        raise ValueError("Recipe has no title")
+
+    return Recipe.from_fields(
+        text("title"), text("category"), text("method"), texts("ingredients"), texts("steps"),
+        text("difficulty", "Easy"), text("time"), text("image"), text("nutrition"), text("id"),
+    )
+
+def parse_recipes(buf):
+    """Parse the recipe literal, returning (recipes, offsets).
+
+    offsets is a flat array('Q') of start/end byte pairs, one pair per recipe,
+    pointing at each object literal in the source.
+    """
+    recipes = []
+    offsets = array('Q')
+    for start, stop, fields in iter_recipe_objects(buf):
+        try:
+            recipe = recipe_from_fields(buf, fields)
+        except (KeyError, ValueError) as e:
+            line, column = line_col(buf, start)
+            logging.warning(f"Skipping recipe at line {line}, column {column}: {e}")
+            continue
+        recipes.append(recipe)
+        offsets.append(start)
+        offsets.append(stop)
+    return recipes, offsets
+
+def read_recipes(html_file: str = "index.html"):
+    """Parse every recipe in the HTML file without going through the cache."""
+    # Imported here because recipe_mmap builds on this module
+    from recipe_mmap import mapped_file
+    with mapped_file(html_file) as buf:
+        return parse_recipes(buf)
@@ -0,0 +1,347 @@
+import os
+import re
+import math
+import struct
+import logging
+from array import array
+from bisect import bisect_left
+
+import numpy as np
+
+from ingredient_canon import lemmatize
+from recipe_snapshot import CACHE_DIR, file_digest, load_recipes
+
+# Set up logging
+logging.basicConfig(level=logging.INFO)
+
+# A word in the title counts three times, in an ingredient twice, in a step once
+FIELD_WEIGHTS = (("title", 3), ("ingredients", 2), ("steps", 1))
+
+# Positions skipped between fields and list items so phrases never span two of them
+FIELD_GAP = 8
+
+# Occurrences are compared as document * POSITION_STRIDE + position
+POSITION_STRIDE = 1 << 24
+
+# BM25 parameters; frequencies are field-weighted, so a title hit alone is already 3, and K1 sits
+# above the usual 1.2 to keep repeated hits of a common word from saturating at once
+K1 = 2.0
+B = 0.75
+
+DEFAULT_LIMIT = 10
+
+# A prefix query matches at most this many vocabulary terms
+MAX_EXPANSIONS = 64
+
+# Decoded posting lists kept in memory
+MAX_CACHED_TERMS = 4096
+
+# Index file: magic, version, documents, terms, vocabulary/postings/positions sizes, source SHA-1
+_HEADER = struct.Struct("<4sHIIIII40s")
+_MAGIC = b"RSRC"
+_FILE_VERSION = 1
+
+_WORD = re.compile(r"[a-z0-9]+")
+_QUERY = re.compile(r'"([^"]*)"|(\S+)')
+_DOUBLED = re.compile(r"([b-df-hj-kmnp-rtv-z])\1$")
+
+def stem(word):
+    """Reduce a word to a crude stem so baking/baked/bake and crispy/crisp meet."""
+    word = lemmatize(word)
+    if len(word) > 4 and word.endswith("ied"):
+        word = word[:-3] + "y"
+    elif len(word) > 5 and word.endswith("ing"):
+        word = _DOUBLED.sub(r"\1", word[:-3])
+    elif len(word) > 4 and word.endswith("ed"):
+        word = _DOUBLED.sub(r"\1", word[:-2])
+    elif len(word) > 4 and word.endswith("ly"):
+        word = word[:-2]
+    if (len(word) > 4 and word.endswith("y")) or (len(word) > 3 and word.endswith("e")):
+        word = word[:-1]
+    return word
+
+def tokenize(text):
+    """Return the stems of the words in text, in order."""
+    return [stem(word) for word in _WORD.findall(text.lower())]
+
+def encode_varints(values, out):
+    """Append values to the bytearray out as LEB128 varints."""
+    for value in values:
+        while value >= 0x80:
+            out.append((value & 0x7F) | 0x80)
+            value >>= 7
+        out.append(value)
+
+def decode_varints(data):
+    """Decode a buffer of LEB128 varints into an int64 array in one vectorized pass."""
+    raw = np.frombuffer(data, dtype=np.uint8)
+    if not len(raw):
+        return np.zeros(0, dtype=np.int64)
+    ends = raw < 0x80
+    value_of = np.cumsum(ends) - ends
+    starts = np.flatnonzero(np.concatenate(([True], ends[:-1])))
+    shifts = np.arange(len(raw)) - starts[value_of]
+    parts = (raw & 0x7F).astype(np.float64) * np.exp2(7 * shifts)
+    return np.bincount(value_of, weights=parts).astype(np.int64)
+
+def index_path(html_file: str = "index.html"):
+    """Return where the search index for html_file is stored."""
+    directory, name = os.path.split(os.path.abspath(html_file))
+    return os.path.join(directory, CACHE_DIR, name + ".search")
+
+def parse_query(text):
+    """Split a query into (terms, phrases, prefixes).
+
+    "quoted words" are phrases that must appear in that order, word* is a
+    prefix, and everything else is a plain term. Phrase words also count as
+    terms for scoring.
+    """
+    terms, phrases, prefixes = [], [], []
+    for quoted, word in _QUERY.findall(text.lower()):
+        if quoted:
+            stems = tokenize(quoted)
+            if len(stems) > 1:
+                phrases.append(stems)
+            terms.extend(stems)
+        elif word.endswith("*") and _WORD.fullmatch(word[:-1]):
+            prefixes.append(word[:-1])
+        else:
+            terms.extend(tokenize(word))
+    return terms, phrases, prefixes
+
+class SearchIndex:
+    """Inverted BM25 index over recipe titles, ingredients and steps.
+
+    Each term has a postings block (document gaps, then weighted term
+    frequencies) and a positions block (a position count per document, then
+    position gaps), all varint-encoded in two byte blobs addressed by
+    per-term offsets. Blocks are decoded with NumPy on first use and cached.
+    """
+
+    def __init__(self, terms, lengths, postings_offsets, positions_offsets, postings, positions, source_sha1=""):
+        self.terms = terms
+        self.term_ids = {term: i for i, term in enumerate(terms)}
+        self.lengths = lengths
+        self.postings_offsets = postings_offsets
+        self.positions_offsets = positions_offsets
+        self.postings = postings
+        self.positions = positions
+        self.source_sha1 = source_sha1
+
+        lengths = np.frombuffer(lengths, dtype=np.uint32).astype(np.float32)
+        average = float(lengths.mean()) if len(lengths) else 1.0
+        self._norms = K1 * (1 - B + B * lengths / max(average, 1.0))
+        self._impacts = {}
+        self._term_positions = {}
+
+    def __len__(self):
+        return len(self.lengths)
+
+    @classmethod
+    def build(cls, recipes, source_sha1=""):
+        """Index recipes; document i is recipe i."""
+        postings = {}
+        lengths = array("I")
+        for doc, recipe in enumerate(recipes):
+            counts = {}
+            where = {}
+            position = 0
+            length = 0
+            for field, weight in FIELD_WEIGHTS:
+                texts = getattr(recipe, field)
+                for text in (texts,) if isinstance(texts, str) else texts:
+                    for token in tokenize(text):
+                        counts[token] = counts.get(token, 0) + weight
+                        where.setdefault(token, []).append(position)
+                        position += 1
+                        length += weight
+                    position += FIELD_GAP
+            lengths.append(length)
+            for token, count in counts.items():
+                postings.setdefault(token, []).append((doc, count, where[token]))
+
+        terms = sorted(postings)
+        postings_blob = bytearray()
+        positions_blob = bytearray()
+        postings_offsets = array("I", [0])
+        positions_offsets = array("I", [0])
+        for term in terms:
+            entries = postings[term]
+            previous = 0
+            gaps = []
+            for doc, _, _ in entries:
+                gaps.append(doc - previous)
+                previous = doc
+            encode_varints(gaps, postings_blob)
+            encode_varints([count for _, count, _ in entries], postings_blob)
+            encode_varints([len(places) for _, _, places in entries], positions_blob)
+            for _, _, places in entries:
+                encode_varints([places[0]] + [b - a for a, b in zip(places, places[1:])], positions_blob)
+            postings_offsets.append(len(postings_blob))
+            positions_offsets.append(len(positions_blob))
+        return cls(terms, lengths, postings_offsets, positions_offsets, bytes(postings_blob), bytes(positions_blob),
+                   source_sha1)
+
+    def _postings(self, term_id):
+        """Return (documents, BM25 impacts) for a term, decoding its block on first use."""
+        cached = self._impacts.get(term_id)
+        if cached is None:
+            start, stop = self.postings_offsets[term_id], self.postings_offsets[term_id + 1]
+            values = decode_varints(self.postings[start:stop])
+            count = len(values) // 2
+            docs = np.cumsum(values[:count])
+            frequencies = values[count:].astype(np.float32)
+            idf = math.log(1 + (len(self) - count + 0.5) / (count + 0.5))
+            impacts = idf * frequencies * (K1 + 1) / (frequencies + self._norms[docs])
+            if len(self._impacts) >= MAX_CACHED_TERMS:
+                self._impacts.clear()
+            cached = self._impacts[term_id] = (docs, impacts)
+        return cached
+
+    def _positions(self, term_id):
+        """Return a term's occurrences as sorted document * POSITION_STRIDE + position keys."""
+        cached = self._term_positions.get(term_id)
+        if cached is None:
+            docs = self._postings(term_id)[0]
+            start, stop = self.positions_offsets[term_id], self.positions_offsets[term_id + 1]
+            values = decode_varints(self.positions[start:stop])
+            counts, gaps = values[:len(docs)], values[len(docs):]
+            totals = np.cumsum(gaps)
+            firsts = np.cumsum(counts) - counts
+            places = totals - np.repeat(totals[firsts] - gaps[firsts], counts)
+            cached = np.repeat(docs * POSITION_STRIDE, counts) + places
+            if len(self._term_positions) >= MAX_CACHED_TERMS:
+                self._term_positions.clear()
+            self._term_positions[term_id] = cached
+        return cached
+
+    def _phrase_docs(self, phrase):
+        """Return the documents containing the stems of phrase next to each other, in order."""
+        ids = [self.term_ids.get(term) for term in phrase]
+        if None in ids:
+            return np.zeros(0, dtype=np.int64)
+        # Keep the occurrences of the first word that are followed by the second, the third...
+        starts = self._positions(ids[0])
+        for offset, term_id in enumerate(ids[1:], 1):
+            following = self._positions(term_id)
+            wanted = starts + offset
+            found = np.minimum(np.searchsorted(following, wanted), len(following) - 1)
+            starts = starts[following[found] == wanted]
+            if not len(starts):
+                break
+        docs = starts // POSITION_STRIDE
+        # starts is sorted, so repeated documents are adjacent
+        return docs[np.concatenate(([True], docs[1:] != docs[:-1]))] if len(docs) else docs
+
+    def expand_prefix(self, prefix):
+        """Return the ids of vocabulary terms starting with prefix."""
+        start = bisect_left(self.terms, prefix)
+        ids = []
+        while start < len(self.terms) and self.terms[start].startswith(prefix) and len(ids) < MAX_EXPANSIONS:
+            ids.append(start)
+            start += 1
+        return ids
+
+    def search(self, query, limit=DEFAULT_LIMIT):
+        """Return [(recipe position, score)] for a query, best first.
+
+        Terms and prefix expansions are scored with BM25 and summed. Recipes
+        are ranked by how many query words they match first (a prefix counts
+        as one word), so a recipe with every word outranks one that only
+        repeats the common ones, then by score. Every phrase has to match for
+        a recipe to be returned.
+        """
+        terms, phrases, prefixes = parse_query(query)
+        clauses = [[self.term_ids[term]] if term in self.term_ids else [] for term in dict.fromkeys(terms)]
+        clauses += [self.expand_prefix(prefix) for prefix in prefixes]
+        if not any(clauses):
+            return []
+
+        scores = np.zeros(len(self), dtype=np.float32)
+        words = np.zeros(len(self), dtype=np.int32)
+        for term_ids in clauses:
+            hit = np.zeros(len(self), dtype=bool)
+            for term_id in term_ids:
+                docs, impacts = self._postings(term_id)
+                scores[docs] += impacts
+                hit[docs] = True
+            words += hit
+        for phrase in phrases:
+            allowed = np.zeros(len(self), dtype=bool)
+            allowed[self._phrase_docs(phrase)] = True
+            scores[~allowed] = 0
+
+        top = np.flatnonzero(scores)
+        # One sort key: matched words, then score, which is always below the step between word counts
+        ranks = words[top] * (float(scores.max()) + 1.0) + scores[top]
+        if len(top) > limit:
+            # Keep everything ranking at least the limit-th best, so ties break by position
+            keep = ranks >= np.partition(ranks, len(top) - limit)[len(top) - limit]
+            top, ranks = top[keep], ranks[keep]
+        top = top[np.lexsort((top, -ranks))][:limit]
+        return [(doc, float(scores[doc])) for doc in top.tolist()]
+
+    def save(self, path):
+        """Write the index to path atomically."""
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        vocabulary = "\n".join(self.terms).encode("utf-8")
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'wb') as f:
+            f.write(_HEADER.pack(_MAGIC, _FILE_VERSION, len(self), len(self.terms), len(vocabulary),
+                                 len(self.postings), len(self.positions), self.source_sha1.encode("ascii")))
+            f.write(vocabulary)
+            self.lengths.tofile(f)
+            self.postings_offsets.tofile(f)
+            self.positions_offsets.tofile(f)
+            f.write(self.postings)
+            f.write(self.positions)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path):
+        """Read an index written by save(); raises ValueError for foreign or stale layouts."""
+        with open(path, 'rb') as f:
+            data = f.read()
+        if len(data) < _HEADER.size:
+            raise ValueError(f"Truncated search index {path}")
+        magic, version, docs, count, vocabulary_size, postings_size, positions_size, sha1 = _HEADER.unpack_from(data)
+        if magic != _MAGIC or version != _FILE_VERSION:
+            raise ValueError(f"Incompatible search index {path}")
+        sizes = (vocabulary_size, 4 * docs, 4 * (count + 1), 4 * (count + 1), postings_size, positions_size)
+        if len(data) != _HEADER.size + sum(sizes):
+            raise ValueError(f"Truncated search index {path}")
+
+        sections = []
+        pos = _HEADER.size
+        for size in sizes:
+            sections.append(data[pos:pos + size])
+            pos += size
+        vocabulary, lengths, postings_offsets, positions_offsets, postings, positions = sections
+        terms = vocabulary.decode("utf-8").split("\n") if count else []
+        return cls(terms, array("I", lengths), array("I", postings_offsets), array("I", positions_offsets),
+                   postings, positions, sha1.decode("ascii").rstrip("\0"))
+
+def load_search_index(html_file: str = "index.html"):
+    """Return the search index for html_file, rebuilding it when the file changed."""
+    path = index_path(html_file)
+    sha1 = file_digest(html_file)
+    try:
+        index = SearchIndex.load(path)
+        if index.source_sha1 == sha1:
+            return index
+    except (OSError, ValueError):
+        pass
+
+    index = SearchIndex.build(load_recipes(html_file), sha1)
+    index.save(path)
+    logging.info(f"Rebuilt search index for {html_file} ({len(index)} recipes, {len(index.terms)} terms)")
+    return index
+
+if __name__ == "__main__":
+    print("Building the recipe search index...")
+    recipes = load_recipes()
+    index = load_search_index()
+    for query in ("crispy air fryer chicken", '"peanut butter"', "choc* mug", "baked salmon"):
+        print(f"\n{query}:")
+        for position, score in index.search(query, 5):
+            print(f"  {score:5.2f}  {recipes[position].title}")
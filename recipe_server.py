@@ -0,0 +1,329 @@
+import json
+import asyncio
+import hashlib
+import logging
+from urllib.parse import urlsplit, parse_qs
+
+from ingredient_autocomplete import MAX_SUGGESTIONS, AutocompleteIndex
+from meal_planner import GOAL_KEYS, MEAL_SLOTS, plan_week
+from recipe_index import RecipeIndex
+from recipe_models import NUTRIENTS
+from recipe_search import load_search_index
+from recipe_similarity import load_similarity_index
+from recipe_snapshot import file_digest
+
+# Set up logging
+logging.basicConfig(level=logging.INFO)
+
+DEFAULT_PER_PAGE = 20
+MAX_PER_PAGE = 100
+
+# Requests with more header lines than this are rejected
+MAX_HEADERS = 100
+
+# Request bodies up to this size are read and discarded to keep the connection; larger ones close it
+MAX_DISCARD_BYTES = 64 * 1024
+
+_REASONS = {200: "OK", 304: "Not Modified", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed",
+            500: "Internal Server Error"}
+
+class HTTPError(Exception):
+    """Raised by request handlers to send an error response."""
+
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+        self.message = message
+
+def _int_param(params, name, default, minimum=1, maximum=None):
+    value = params.get(name, [str(default)])[-1]
+    try:
+        number = int(value)
+    except ValueError:
+        raise HTTPError(400, f"{name} must be an integer") from None
+    if number < minimum or (maximum is not None and number > maximum):
+        raise HTTPError(400, f"{name} is out of range")
+    return number
+
+def _float_param(params, name):
+    value = params.get(name, [None])[-1]
+    if value is None:
+        return None
+    try:
+        return float(value)
+    except ValueError:
+        raise HTTPError(400, f"{name} must be a number") from None
+
+def _etag_matches(if_none_match, etag):
+    if not if_none_match:
+        return False
+    candidates = [tag.strip() for tag in if_none_match.split(",")]
+    return "*" in candidates or etag in candidates or f"W/{etag}" in candidates
+
+class RecipeService:
+    """Answers recipe API requests from a RecipeIndex.
+
+    Routes:
+        GET /recipes?category=&method=&diet=&have=a,b&strict=1&min_calories=&max_protein=&page=&per_page=
+        GET /recipes/<id>           (a stable id such as r42)
+        GET /recipes/<id>/similar
+        GET /ingredients?q=&limit=
+        GET /search?q=&limit=
+        GET /plan?calories=&protein=&carbs=&fat=&diet=&method=&meals=breakfast,lunch
+    """
+
+    def __init__(self, index, version, similarity=None, autocomplete=None, search=None):
+        self.index = index
+        self.similarity = similarity
+        self.search = search
+        self.autocomplete = autocomplete or AutocompleteIndex.from_recipes(index.recipes)
+        self.positions = {recipe.id: position for position, recipe in enumerate(index.recipes) if recipe.id}
+        missing = len(index.recipes) - len(self.positions)
+        if missing:
+            logging.warning(f"{missing} recipes have no stable id and cannot be fetched; run recipe_ids.py")
+        # Every ETag is tied to the catalogue version, so edits to the HTML invalidate them
+        self.version = version[:16]
+
+    @classmethod
+    def from_html(cls, html_file: str = "index.html"):
+        return cls(RecipeIndex.from_html(html_file), file_digest(html_file), load_similarity_index(html_file),
+                   search=load_search_index(html_file))
+
+    def handle(self, method, target, headers):
+        """Return (status, body, extra_headers) for one request."""
+        if method not in ("GET", "HEAD"):
+            raise HTTPError(405, "Only GET is supported")
+
+        url = urlsplit(target)
+        path = url.path.rstrip("/")
+        if path == "/recipes":
+            params = parse_qs(url.query)
+            etag = self._etag("list", sorted((key, tuple(values)) for key, values in params.items()))
+            if _etag_matches(headers.get("if-none-match"), etag):
+                return 304, b"", {"ETag": etag}
+            return 200, self._list(params), {"ETag": etag}
+
+        if path.startswith("/recipes/") and path.endswith("/similar") and self.similarity is not None:
+            position = self._position(path[len("/recipes/"):-len("/similar")], len(self.similarity))
+            etag = self._etag("similar", position)
+            if _etag_matches(headers.get("if-none-match"), etag):
+                return 304, b"", {"ETag": etag}
+            return 200, self._similar(position), {"ETag": etag}
+
+        if path.startswith("/recipes/"):
+            position = self._position(path[len("/recipes/"):], len(self.index))
+            etag = self._etag("recipe", position)
+            if _etag_matches(headers.get("if-none-match"), etag):
+                return 304, b"", {"ETag": etag}
+            return 200, self._recipe(position), {"ETag": etag}
+
+        if path == "/ingredients":
+            params = parse_qs(url.query)
+            etag = self._etag("ingredients", sorted((key, tuple(values)) for key, values in params.items()))
+            if _etag_matches(headers.get("if-none-match"), etag):
+                return 304, b"", {"ETag": etag}
+            return 200, self._ingredients(params), {"ETag": etag}
+
+        if path == "/search" and self.search is not None:
+            params = parse_qs(url.query)
+            etag = self._etag("search", sorted((key, tuple(values)) for key, values in params.items()))
+            if _etag_matches(headers.get("if-none-match"), etag):
+                return 304, b"", {"ETag": etag}
+            return 200, self._search(params), {"ETag": etag}
+
+        if path == "/plan":
+            params = parse_qs(url.query)
+            etag = self._etag("plan", sorted((key, tuple(values)) for key, values in params.items()))
+            if _etag_matches(headers.get("if-none-match"), etag):
+                return 304, b"", {"ETag": etag}
+            return 200, self._plan(params), {"ETag": etag}
+
+        raise HTTPError(404, "Not found")
+
+    def _position(self, recipe_id, count):
+        """Resolve a stable id to a catalogue row.
+
+        Bare array positions are not accepted: ids count from r1 while
+        positions count from 0, and a position names a different recipe
+        after any insertion or deletion.
+        """
+        position = self.positions.get(recipe_id)
+        if position is None or position >= count:
+            raise HTTPError(404, "No such recipe")
+        return position
+
+    def _public(self, position, **extra):
+        """Return a recipe as sent to clients, with its stable id (None before it has one)."""
+        recipe = self.index.recipes[position]
+        return dict(recipe.to_dict(), id=recipe.id or None, **extra)
+
+    def _etag(self, kind, key):
+        digest = hashlib.sha1(repr((kind, key)).encode("utf-8")).hexdigest()[:16]
+        return f'"{self.version}-{digest}"'
+
+    def _list(self, params):
+        def text(name):
+            return params.get(name, [None])[-1]
+
+        have = [item for value in params.get("have", []) for item in value.split(",")]
+        strict = text("strict") not in (None, "0", "false")
+        page = _int_param(params, "page", 1)
+        per_page = _int_param(params, "per_page", DEFAULT_PER_PAGE, maximum=MAX_PER_PAGE)
+        ranges = {}
+        for nutrient in NUTRIENTS:
+            low, high = _float_param(params, f"min_{nutrient}"), _float_param(params, f"max_{nutrient}")
+            if low is not None or high is not None:
+                ranges[nutrient] = (low, high)
+
+        try:
+            results = self.index.search(text("category"), text("method"), text("diet"), have, strict, ranges)
+        except ValueError as e:
+            raise HTTPError(400, str(e)) from None
+
+        page_results = results[(page - 1) * per_page:page * per_page]
+        body = {
+            "total": len(results),
+            "page": page,
+            "per_page": per_page,
+            "results": [
+                self._public(i, hits=hits, missing=missing)
+                for i, hits, missing in page_results
+            ],
+        }
+        return json.dumps(body).encode("utf-8")
+
+    def _ingredients(self, params):
+        limit = _int_param(params, "limit", MAX_SUGGESTIONS, maximum=MAX_PER_PAGE)
+        suggestions = self.autocomplete.suggest(params.get("q", [""])[-1], limit)
+        return json.dumps({"results": [{"name": name, "recipes": count} for name, count in suggestions]}).encode("utf-8")
+
+    def _search(self, params):
+        limit = _int_param(params, "limit", DEFAULT_PER_PAGE, maximum=MAX_PER_PAGE)
+        results = [
+            self._public(position, score=round(score, 3))
+            for position, score in self.search.search(params.get("q", [""])[-1], limit)
+        ]
+        return json.dumps({"results": results}).encode("utf-8")
+
+    def _plan(self, params):
+        goals = {name: _int_param(params, name, 0, minimum=1) for name in GOAL_KEYS if name in params}
+        meals = [meal for value in params.get("meals", []) for meal in value.split(",") if meal]
+        try:
+            result = plan_week(
+                self.index,
+                goals=goals,
+                diet=params.get("diet", [None])[-1],
+                method=params.get("method", [None])[-1],
+                meals=tuple(meals or MEAL_SLOTS),
+            )
+        except ValueError as e:
+            raise HTTPError(400, str(e)) from None
+        return json.dumps(result).encode("utf-8")
+
+    def _similar(self, position):
+        results = [
+            self._public(other, score=round(score, 3))
+            for other, score in self.similarity.similar(position)
+        ]
+        return json.dumps({"id": self._public(position)["id"], "results": results}).encode("utf-8")
+
+    def _recipe(self, position):
+        return json.dumps(self._public(position)).encode("utf-8")
+
+async def _read_request(reader):
+    """Read one request head, returning (method, target, headers) or None at EOF."""
+    request_line = await reader.readline()
+    if not request_line.strip():
+        return None
+    try:
+        method, target, _ = request_line.decode("latin-1").split(" ", 2)
+    except ValueError:
+        raise HTTPError(400, "Malformed request line") from None
+
+    headers = {}
+    for _ in range(MAX_HEADERS):
+        line = await reader.readline()
+        if line in (b"\r\n", b"\n", b""):
+            return method, target, headers
+        name, _, value = line.decode("latin-1").partition(":")
+        headers[name.strip().lower()] = value.strip()
+    raise HTTPError(400, "Too many headers")
+
+async def _discard_body(reader, headers):
+    """Skip a request body the routes ignore; return False when the connection cannot be reused.
+
+    A Content-Length body is read and dropped so the next request starts
+    at its request line. Chunked or oversized bodies are not read; the
+    connection is closed after the response instead.
+    """
+    if "transfer-encoding" in headers:
+        return False
+    length = headers.get("content-length")
+    if length is None:
+        return True
+    if not length.isascii() or not length.isdigit():
+        raise HTTPError(400, "Invalid Content-Length")
+    length = int(length)
+    if length > MAX_DISCARD_BYTES:
+        return False
+    await reader.readexactly(length)
+    return True
+
+def _response(status, body, headers, keep_alive, head_only=False):
+    lines = [f"HTTP/1.1 {status} {_REASONS.get(status, '')}"]
+    headers = dict(headers)
+    if status != 304:
+        headers.setdefault("Content-Type", "application/json; charset=utf-8")
+        headers["Content-Length"] = str(len(body))
+    headers["Connection"] = "keep-alive" if keep_alive else "close"
+    lines.extend(f"{name}: {value}" for name, value in headers.items())
+    head = ("\r\n".join(lines) + "\r\n\r\n").encode("latin-1")
+    return head if head_only or status == 304 else head + body
+
+async def _handle_connection(service, reader, writer):
+    """Serve requests on one keep-alive connection until the client is done."""
+    try:
+        while True:
+            try:
+                request = await _read_request(reader)
+                if request is None:
+                    break
+                method, target, headers = request
+                keep_alive = headers.get("connection", "").lower() != "close"
+                keep_alive = await _discard_body(reader, headers) and keep_alive
+                try:
+                    status, body, extra = service.handle(method, target, headers)
+                except HTTPError as e:
+                    status, body, extra = e.status, json.dumps({"error": e.message}).encode("utf-8"), {}
+                except Exception:
+                    # A bug in one route answers 500 instead of dropping the connection
+                    logging.exception(f"Error handling {method} {target}")
+                    status, body, extra = 500, json.dumps({"error": "Internal server error"}).encode("utf-8"), {}
+                writer.write(_response(status, body, extra, keep_alive, method == "HEAD"))
+            except HTTPError as e:
+                keep_alive = False
+                writer.write(_response(e.status, json.dumps({"error": e.message}).encode("utf-8"), {}, False))
+            await writer.drain()
+            if not keep_alive:
+                break
+    except (ConnectionError, asyncio.IncompleteReadError):
+        pass
+    finally:
+        writer.close()
+
+async def serve(html_file: str = "index.html", host: str = "127.0.0.1", port: int = 8000):
+    """Load the recipe store and serve the API until cancelled."""
+    service = RecipeService.from_html(html_file)
+    server = await asyncio.start_server(
+        lambda reader, writer: _handle_connection(service, reader, writer), host, port
+    )
+    logging.info(f"Serving {len(service.index)} recipes on http://{host}:{port}/recipes")
+    async with server:
+        await server.serve_forever()
+
+if __name__ == "__main__":
+    print("Starting the recipe API server (Ctrl+C to stop)...")
+    try:
+        asyncio.run(serve())
+    except KeyboardInterrupt:
+        print("Stopped.")
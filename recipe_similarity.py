@@ -0,0 +1,355 @@
+import os
+import re
+import heapq
+import zlib
+import random
+import struct
+import logging
+from array import array
+
+import numpy as np
+
+from recipe_diff import Fingerprints, diff_fingerprints, fingerprints_path, load_fingerprints, mark_done
+from recipe_snapshot import CACHE_DIR, file_digest, load_recipes
+from ingredient_canon import ingredient_name
+
+# Set up logging
+logging.basicConfig(level=logging.INFO)
+
+# 32 bands of 2 rows: recipes sharing roughly a fifth of their features collide
+NUM_PERM = 64
+ROWS_PER_BAND = 2
+TOP_K = 10
+
+# Buckets bigger than this (salt + pepper...) say nothing about similarity and are skipped
+MAX_BUCKET = 500
+
+_MERSENNE = (1 << 61) - 1
+_MAX_HASH = (1 << 32) - 1
+_NO_NEIGHBOUR = 0xFFFFFFFF
+
+# recipe_diff baseline holding the fingerprints the saved index reflects
+BASELINE = "similarity"
+
+# Index file: magic, version, recipe count, k, permutations, source SHA-1
+_HEADER = struct.Struct("<4sHIHH40s")
+_MAGIC = b"RSIM"
+_FILE_VERSION = 2
+
+# Words that say how a recipe is cooked rather than what it is
+TITLE_STOPWORDS = {"microwave", "air", "fryer", "oven", "no-cook", "baked", "with", "and", "the", "a", "&"}
+
+_rng = random.Random(20)
+_PERMUTATIONS = [(_rng.randrange(1, _MERSENNE), _rng.randrange(0, _MERSENNE)) for _ in range(NUM_PERM)]
+_feature_hashes = {}
+
+def recipe_features(recipe):
+    """Return the set of features compared between recipes.
+
+    Canonical ingredient names carry most of the weight; title
+    words and the cooking method add a little so near-duplicates rank first.
+    """
+    features = {"i:" + ingredient_name(number) for number in recipe.ingredient_ids}
+    features.update(
+        "t:" + word for word in re.findall(r"[a-z&'-]+", recipe.title.lower()) if word not in TITLE_STOPWORDS
+    )
+    features.add("m:" + recipe.method.label)
+    return features
+
+def _hashes(feature):
+    """Return the NUM_PERM permuted hashes of one feature, cached across recipes."""
+    values = _feature_hashes.get(feature)
+    if values is None:
+        base = zlib.crc32(feature.encode("utf-8"))
+        values = [((a * base + b) % _MERSENNE) & _MAX_HASH for a, b in _PERMUTATIONS]
+        _feature_hashes[feature] = values
+    return values
+
+def minhash(features):
+    """Return the MinHash signature of a feature set as a list of NUM_PERM ints."""
+    if not features:
+        return [_MAX_HASH] * NUM_PERM
+    return [min(column) for column in zip(*(_hashes(feature) for feature in features))]
+
+def index_path(html_file: str = "index.html"):
+    """Return where the similarity index for html_file is stored."""
+    directory, name = os.path.split(os.path.abspath(html_file))
+    return os.path.join(directory, CACHE_DIR, name + ".similar")
+
+class SimilarityIndex:
+    """Top-k similar recipes per recipe, found through MinHash/LSH.
+
+    signatures, neighbours and scores are flat arrays (NUM_PERM, k and k
+    entries per recipe), so a lookup is one slice. Scores are the number of
+    agreeing signature slots out of NUM_PERM, an estimate of the Jaccard
+    similarity of the two feature sets.
+    """
+
+    def __init__(self, k=TOP_K, source_sha1=""):
+        self.k = k
+        self.source_sha1 = source_sha1
+        self.signatures = array("I")
+        self.neighbours = array("I")
+        self.scores = array("B")
+        self._buckets = None
+
+    def __len__(self):
+        return len(self.signatures) // NUM_PERM
+
+    @classmethod
+    def build(cls, recipes, k=TOP_K, source_sha1=""):
+        """Index recipes, comparing each one only with recipes sharing an LSH bucket."""
+        index = cls(k, source_sha1)
+        for recipe in recipes:
+            index.signatures.extend(minhash(recipe_features(recipe)))
+        index.neighbours = array("I", [_NO_NEIGHBOUR]) * (len(index) * k)
+        index.scores = array("B", bytes(len(index) * k))
+        for item in range(len(index)):
+            index.refresh(item)
+        return index
+
+    def _signature(self, item):
+        return self.signatures[item * NUM_PERM:(item + 1) * NUM_PERM]
+
+    def _band_keys(self, signature):
+        for band, start in enumerate(range(0, NUM_PERM, ROWS_PER_BAND)):
+            yield (band,) + tuple(signature[start:start + ROWS_PER_BAND])
+
+    def _bucket_table(self):
+        if self._buckets is None:
+            self._buckets = {}
+            for item in range(len(self)):
+                for key in self._band_keys(self._signature(item)):
+                    self._buckets.setdefault(key, []).append(item)
+        return self._buckets
+
+    def _candidates(self, item):
+        buckets = self._bucket_table()
+        candidates = set()
+        for key in self._band_keys(self._signature(item)):
+            bucket = buckets.get(key, ())
+            if len(bucket) <= MAX_BUCKET:
+                candidates.update(bucket)
+        candidates.discard(item)
+        return candidates
+
+    def _agreement(self, a, b):
+        first, second = self._signature(a), self._signature(b)
+        return sum(1 for x, y in zip(first, second) if x == y)
+
+    def _top_k_scored(self, scored):
+        """Return the k best (recipe_id, score) pairs; ties go to the lower id."""
+        best = heapq.nlargest(self.k, ((score, -other) for other, score in scored.items()))
+        return [(-negative, score) for score, negative in best]
+
+    def _set_neighbours(self, item, ranked):
+        base = item * self.k
+        for slot in range(self.k):
+            other, score = ranked[slot] if slot < len(ranked) else (_NO_NEIGHBOUR, 0)
+            self.neighbours[base + slot] = other
+            self.scores[base + slot] = score
+
+    def similar(self, item):
+        """Return [(recipe_id, score)] for the stored neighbours of item, best first."""
+        if not 0 <= item < len(self):
+            raise IndexError(f"No recipe {item} in the similarity index")
+        base = item * self.k
+        return [
+            (other, self.scores[base + slot] / NUM_PERM)
+            for slot, other in enumerate(self.neighbours[base:base + self.k])
+            if other != _NO_NEIGHBOUR
+        ]
+
+    def refresh(self, item):
+        """Recompute item's neighbour list from the recipes sharing a bucket with it."""
+        scored = {other: self._agreement(item, other) for other in self._candidates(item)}
+        self._set_neighbours(item, self._top_k_scored(scored))
+
+    def _link(self, item):
+        """Refresh item's neighbours and offer item to each of theirs where it beats the weakest entry."""
+        scored = {other: self._agreement(item, other) for other in self._candidates(item)}
+        self._set_neighbours(item, self._top_k_scored(scored))
+        for other, score in scored.items():
+            current = [(neighbour, round(value * NUM_PERM)) for neighbour, value in self.similar(other)]
+            if len(current) < self.k or score > current[-1][1]:
+                current.append((item, score))
+                current.sort(key=lambda entry: (-entry[1], entry[0]))
+                self._set_neighbours(other, current[:self.k])
+
+    def _strip(self, item, delete=False):
+        """Take item out of every neighbour list, closing the gap; return the rows that listed it.
+
+        With delete, item's own row goes as well and later recipes move down one.
+        """
+        neighbours = np.frombuffer(self.neighbours, dtype=np.uint32).reshape(-1, self.k)
+        scores = np.frombuffer(self.scores, dtype=np.uint8).reshape(-1, self.k)
+        if delete:
+            neighbours, scores = np.delete(neighbours, item, axis=0), np.delete(scores, item, axis=0)
+        else:
+            neighbours, scores = neighbours.copy(), scores.copy()
+        listed = neighbours == item
+        rows = np.flatnonzero(listed.any(axis=1))
+        if len(rows):
+            # A stable sort moves the one matching slot to the end and keeps the rest in order
+            order = np.argsort(listed[rows], axis=1, kind="stable")
+            neighbours[rows] = np.take_along_axis(neighbours[rows], order, axis=1)
+            scores[rows] = np.take_along_axis(scores[rows], order, axis=1)
+            neighbours[rows, -1] = _NO_NEIGHBOUR
+            scores[rows, -1] = 0
+        if delete:
+            neighbours[(neighbours > item) & (neighbours != _NO_NEIGHBOUR)] -= 1
+        self.neighbours = array("I", neighbours.tobytes())
+        self.scores = array("B", scores.tobytes())
+        return rows.tolist()
+
+    def add(self, recipe):
+        """Append one recipe without a rebuild and return its id.
+
+        Only recipes sharing a bucket with it are compared; their neighbour
+        lists take the new recipe in when it beats their weakest entry.
+        """
+        item = len(self)
+        signature = minhash(recipe_features(recipe))
+        self.signatures.extend(signature)
+        self.neighbours.extend([_NO_NEIGHBOUR] * self.k)
+        self.scores.extend(bytes(self.k))
+        buckets = self._bucket_table()
+        for key in self._band_keys(signature):
+            buckets.setdefault(key, []).append(item)
+        self._link(item)
+        return item
+
+    def update(self, item, recipe):
+        """Re-index a recipe in place after its title, ingredients or method changed.
+
+        Lists that held it under its old signature drop it and are refreshed.
+        """
+        signature = minhash(recipe_features(recipe))
+        buckets = self._bucket_table()
+        for key in self._band_keys(self._signature(item)):
+            buckets[key].remove(item)
+        self.signatures[item * NUM_PERM:(item + 1) * NUM_PERM] = array("I", signature)
+        for key in self._band_keys(signature):
+            buckets.setdefault(key, []).append(item)
+        holders = self._strip(item)
+        self._link(item)
+        for other in holders:
+            self.refresh(other)
+
+    def remove(self, item):
+        """Delete one recipe, moving the ids after it down one, and return the ids whose lists named it.
+
+        Those lists are left an entry short, so that a batch of removals can
+        be followed by one refresh() of each returned id.
+        """
+        if not 0 <= item < len(self):
+            raise IndexError(f"No recipe {item} in the similarity index")
+        holders = self._strip(item, delete=True)
+        del self.signatures[item * NUM_PERM:(item + 1) * NUM_PERM]
+        # Bucket entries are ids, so the table is rebuilt on next use
+        self._buckets = None
+        return holders
+
+    def apply_changes(self, diff, recipes):
+        """Bring the index up to date with a CatalogueDiff from the catalogue it was built from.
+
+        Removed recipes are deleted, changed ones re-indexed in place and new
+        ones appended, so only their neighbourhoods are compared again.
+        Returns False without touching the index when recipes were reordered
+        or inserted before existing ones; it has to be rebuilt then.
+        """
+        rows = np.asarray(diff.rows, dtype=np.int64)
+        kept = rows[rows >= 0]
+        tail = len(recipes) - len(diff.added)
+        if (len(self) != len(kept) + len(diff.removed_rows) or np.any(np.diff(kept) <= 0)
+                or diff.added != list(range(tail, len(recipes)))):
+            return False
+
+        holders = set()
+        for item in sorted(diff.removed_rows, reverse=True):
+            holders = {other - (other > item) for other in holders}
+            holders.update(self.remove(item))
+        for item in diff.needs("similarity"):
+            if item < tail:
+                self.update(item, recipes[item])
+        for position in diff.added:
+            self.add(recipes[position])
+        for other in sorted(holders):
+            self.refresh(other)
+        return True
+
+    def save(self, path):
+        """Write the index to path atomically."""
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'wb') as f:
+            f.write(_HEADER.pack(_MAGIC, _FILE_VERSION, len(self), self.k, NUM_PERM, self.source_sha1.encode("ascii")))
+            self.signatures.tofile(f)
+            self.neighbours.tofile(f)
+            self.scores.tofile(f)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path):
+        """Read an index written by save(); raises ValueError for foreign or stale layouts."""
+        with open(path, 'rb') as f:
+            header = f.read(_HEADER.size)
+            if len(header) != _HEADER.size:
+                raise ValueError(f"Truncated similarity index {path}")
+            magic, version, count, k, num_perm, sha1 = _HEADER.unpack(header)
+            if magic != _MAGIC or version != _FILE_VERSION or num_perm != NUM_PERM:
+                raise ValueError(f"Incompatible similarity index {path}")
+            index = cls(k, sha1.decode("ascii").rstrip("\0"))
+            try:
+                index.signatures.fromfile(f, count * NUM_PERM)
+                index.neighbours.fromfile(f, count * k)
+                index.scores.fromfile(f, count * k)
+            except EOFError:
+                raise ValueError(f"Truncated similarity index {path}") from None
+        return index
+
+def load_similarity_index(html_file: str = "index.html", k=TOP_K):
+    """Return the similarity index for html_file, bringing it up to date when the file changed.
+
+    Edits since the index was saved are applied from a recipe_diff baseline;
+    it is only rebuilt from scratch when missing or when recipes were reordered.
+    """
+    path = index_path(html_file)
+    sha1 = file_digest(html_file)
+    index = None
+    try:
+        index = SimilarityIndex.load(path)
+        if index.source_sha1 == sha1 and index.k == k:
+            return index
+    except (OSError, ValueError):
+        pass
+
+    current = load_fingerprints(html_file)
+    recipes = load_recipes(html_file)
+    diff = None
+    if index is not None and index.k == k:
+        try:
+            previous = Fingerprints.load(fingerprints_path(html_file, BASELINE))
+            if previous.source_sha1 == index.source_sha1:
+                diff = diff_fingerprints(previous, current)
+        except (OSError, KeyError, ValueError):
+            pass
+
+    if diff is not None and index.apply_changes(diff, recipes):
+        logging.info(f"Updated similarity index for {html_file} ({diff.summary()})")
+    else:
+        index = SimilarityIndex.build(recipes, k)
+        logging.info(f"Rebuilt similarity index for {html_file} ({len(index)} recipes)")
+    index.source_sha1 = sha1
+    index.save(path)
+    mark_done(BASELINE, current, html_file)
+    return index
+
+if __name__ == "__main__":
+    print("Building the recipe similarity index...")
+    recipes = load_recipes()
+    index = load_similarity_index()
+    for item in (0, 50, 150):
+        print(f"\nMore like {recipes[item].title}:")
+        for other, score in index.similar(item)[:5]:
+            print(f"  {score:.2f}  {recipes[other].title}")
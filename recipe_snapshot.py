@@ -0,0 +1,95 @@
+import os
+import pickle
+import hashlib
+import logging
+
+from recipe_mmap import mapped_file
+from recipe_parser import parse_recipes
+
+# Bump when the Recipe/Nutrition layout or the parser output changes
+SNAPSHOT_VERSION = 4
+
+# Snapshots live next to the HTML file they were built from
+CACHE_DIR = ".recipe_cache"
+
+def snapshot_path(html_file: str = "index.html"):
+    """Return where the snapshot for html_file is stored."""
+    directory, name = os.path.split(os.path.abspath(html_file))
+    return os.path.join(directory, CACHE_DIR, name + ".pickle")
+
+def file_digest(path):
+    """Return the SHA-1 hex digest of a file's contents."""
+    with mapped_file(path) as buf:
+        return hashlib.sha1(buf).hexdigest()
+
+def _read_header(path):
+    """Return the snapshot header, or None when it is missing or unreadable."""
+    try:
+        with open(path, 'rb') as f:
+            return pickle.load(f)
+    except (OSError, EOFError, pickle.UnpicklingError):
+        return None
+
+def _read_payload(path):
+    with open(path, 'rb') as f:
+        pickle.load(f)
+        return pickle.load(f)
+
+def _write_snapshot(path, header, payload):
+    """Write header and payload as two pickles, replacing the file atomically."""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, 'wb') as f:
+        pickle.dump(header, f, protocol=pickle.HIGHEST_PROTOCOL)
+        pickle.dump(payload, f, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(tmp_path, path)
+
+def build_snapshot(html_file: str = "index.html"):
+    """Parse html_file and write a fresh snapshot, returning (recipes, offsets)."""
+    stat = os.stat(html_file)
+    # Tokenize straight over the mapped file instead of reading it into memory
+    with mapped_file(html_file) as buf:
+        recipes, offsets = parse_recipes(buf)
+        sha1 = hashlib.sha1(buf).hexdigest()
+    header = {
+        "version": SNAPSHOT_VERSION,
+        "size": stat.st_size,
+        "mtime_ns": stat.st_mtime_ns,
+        "sha1": sha1,
+    }
+    _write_snapshot(snapshot_path(html_file), header, (recipes, offsets))
+    logging.info(f"Rebuilt recipe snapshot for {html_file} ({len(recipes)} recipes)")
+    return recipes, offsets
+
+def load_recipes_with_offsets(html_file: str = "index.html"):
+    """Return (recipes, offsets) for html_file, rebuilding the snapshot when it is stale.
+
+    A snapshot whose size and mtime match the file is trusted as is. When only
+    the mtime moved (a touch, a checkout), the content hash decides, so the
+    parse is skipped for files that did not really change.
+    """
+    path = snapshot_path(html_file)
+    header = _read_header(path)
+    stat = os.stat(html_file)
+
+    if header is None or header.get("version") != SNAPSHOT_VERSION or header["size"] != stat.st_size:
+        return build_snapshot(html_file)
+
+    try:
+        if header["mtime_ns"] == stat.st_mtime_ns:
+            return _read_payload(path)
+
+        if header["sha1"] == file_digest(html_file):
+            payload = _read_payload(path)
+            header["mtime_ns"] = stat.st_mtime_ns
+            _write_snapshot(path, header, payload)
+            return payload
+    except (OSError, EOFError, pickle.UnpicklingError, AttributeError):
+        logging.warning(f"Discarding unreadable recipe snapshot {path}")
+
+    return build_snapshot(html_file)
+
+def load_recipes(html_file: str = "index.html"):
+    """Return the parsed recipes for html_file, using the snapshot cache."""
+    recipes, _ = load_recipes_with_offsets(html_file)
+    return recipes
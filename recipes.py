@@ -1,8 +1,10 @@
 import requests
 import os
-import re
 import logging
 
+from recipe_mmap import field_text, insert_field, patch_recipes
+from recipe_snapshot import load_recipes
+
 # Set up logging
 logging.basicConfig(level=logging.INFO)
 
@@ -15,14 +17,7 @@ os.makedirs(SAVE_DIR, exist_ok=True)
 
 def extract_recipes_from_html(html_file: str = "index.html"):
     """Extract all recipe titles from your HTML file."""
-    with open(html_file, 'r', encoding='utf-8') as f:
-        content = f.read()
-    
-    # Find all recipe objects
-    recipe_pattern = r'title:\s*"([^"]+)"'
-    titles = re.findall(recipe_pattern, content)
-    
-    return titles
+    return [recipe.title for recipe in load_recipes(html_file)]
 
 # Function to generate and save image
 def generate_image(recipe_name):
@@ -63,33 +58,19 @@ def generate_image(recipe_name):
 
 def update_html_with_images(recipes_with_images, html_file: str = "index.html"):
     """Update HTML file to include generated images."""
-    with open(html_file, 'r', encoding='utf-8') as f:
-        content = f.read()
-    
     # Create a mapping of titles to image paths
     title_to_image = {recipe["title"]: recipe.get("image_path", "") for recipe in recipes_with_images}
     
-    def add_image_to_recipe(match):
-        recipe_text = match.group(0)
-        title_match = re.search(r'title:\s*"([^"]+)"', recipe_text)
+    def add_image_to_recipe(buf, start, end, fields):
+        image_path = title_to_image.get(field_text(buf, fields, "title"), "")
         
-        if title_match:
-            title = title_match.group(1)
-            image_path = title_to_image.get(title, "")
-            
-            if image_path and 'image:' not in recipe_text:
-                # Add image property before the closing brace
-                recipe_text = recipe_text.rstrip(' },') + f', image: "{image_path}" }},'
-        
-        return recipe_text
-    
-    # Pattern to match recipe objects
-    recipe_pattern = r'{\s*title:\s*"[^"]+",\s*category:\s*"[^"]+",\s*method:\s*"[^"]+",\s*ingredients:\s*\[[^\]]+\],\s*steps:\s*\[[^\]]+\],\s*difficulty:\s*"[^"]+",\s*time:\s*"[^"]+"\s*},'
-    
-    updated_content = re.sub(recipe_pattern, add_image_to_recipe, content)
+        if image_path and "image" not in fields:
+            # Add image property before the closing brace
+            return [insert_field(buf, end, "image", image_path)]
+        return None
     
-    with open(html_file, 'w', encoding='utf-8') as f:
-        f.write(updated_content)
+    # Unchanged text is streamed straight from the mapped file
+    patch_recipes(html_file, add_image_to_recipe)
     
     logging.info("Updated HTML file with image references")
 
@@ -0,0 +1,91 @@
+import os
+import time
+import logging
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+# Read-only lookup tables visible to worker processes. Forked workers inherit
+# this dict as it was when the pool started; spawned workers get one copy
+# through the pool initializer instead of one per task.
+_SHARED_TABLES = {}
+
+# Starting a pool costs roughly this long, so work that finishes sooner stays in-process
+MIN_PARALLEL_SECONDS = 0.2
+
+def shared_table(name):
+    """Return a lookup table published by the running run_sharded call."""
+    return _SHARED_TABLES[name]
+
+def _install_tables(tables):
+    """Pool initializer for platforms that cannot fork."""
+    _SHARED_TABLES.update(tables)
+
+def _run_chunk(func, items):
+    """Apply func to one shard of items inside a worker process."""
+    return [func(item) for item in items]
+
+def chunk_ranges(total, chunk_size):
+    """Yield (start, stop) index pairs covering range(total)."""
+    for start in range(0, total, chunk_size):
+        yield start, min(start + chunk_size, total)
+
+def run_sharded(func, items, tables=None, workers=None, chunk_size=None):
+    """Apply func to every item across processes, returning results in input order.
+
+    func must be a module-level function so it can be sent to the workers.
+    tables is a dict of read-only lookup data that workers read back through
+    shared_table(); it is shared by fork rather than pickled with each task.
+
+    Items are first run in-process, and only what is left after
+    MIN_PARALLEL_SECONDS goes to a pool, so cheap work never pays for one
+    and memo caches warm in the calling process.
+    """
+    items = list(items)
+    tables = tables or {}
+    workers = workers or os.cpu_count() or 1
+
+    done = []
+    _SHARED_TABLES.update(tables)
+    try:
+        deadline = time.perf_counter() + MIN_PARALLEL_SECONDS
+        for item in items:
+            done.append(func(item))
+            if workers > 1 and time.perf_counter() > deadline:
+                break
+    finally:
+        for name in tables:
+            _SHARED_TABLES.pop(name, None)
+    items = items[len(done):]
+    if not items:
+        return done
+
+    if chunk_size is None:
+        # A few shards per worker keeps the pool busy when shards run unevenly
+        chunk_size = max(1, -(-len(items) // (workers * 4)))
+
+    if "fork" in multiprocessing.get_all_start_methods():
+        context = multiprocessing.get_context("fork")
+        initializer, initargs = None, ()
+    else:
+        context = multiprocessing.get_context("spawn")
+        initializer, initargs = _install_tables, (tables,)
+
+    logging.info(f"Running the remaining {len(items)} items in shards of {chunk_size} across {workers} processes")
+
+    _SHARED_TABLES.update(tables)
+    try:
+        with ProcessPoolExecutor(max_workers=workers, mp_context=context,
+                                 initializer=initializer, initargs=initargs) as pool:
+            futures = [
+                pool.submit(_run_chunk, func, items[start:stop])
+                for start, stop in chunk_ranges(len(items), chunk_size)
+            ]
+            # Futures are kept in submission order, so the merge is deterministic
+            results = done
+            for future in futures:
+                results.extend(future.result())
+    finally:
+        for name in tables:
+            _SHARED_TABLES.pop(name, None)
+
+    return results
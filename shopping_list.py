@@ -0,0 +1,219 @@
+import re
+import logging
+from functools import lru_cache
+from fractions import Fraction
+from collections import defaultdict
+
+from ingredient_canon import NUMBER, UNIT, UNITS, canonical_name, lemmatize, parse_amount, split_quantity
+from recipe_snapshot import load_recipes
+from sharded_executor import run_sharded, shared_table
+
+# Set up logging
+logging.basicConfig(level=logging.INFO)
+
+# Display units per family, largest first, with the smallest amount shown in each
+VOLUME_DISPLAY = (("cup", 48, 12), ("tbsp", 3, 3), ("tsp", 1, 0))
+
+# Aisle keywords, checked against every word of the canonical ingredient name
+AISLES = {
+    "Produce": {"apple", "banana", "lemon", "lime", "lettuce", "spinach", "onion", "garlic", "tomato", "tomatoes",
+                "potato", "potatoes", "zucchini", "vegetables", "veggies", "berries",
+                "strawberries", "blueberries", "avocado", "basil", "cilantro", "broccoli", "carrot", "carrots",
+                "cucumber", "mushrooms", "corn", "kale", "fruit", "herbs", "parsley"},
+    "Dairy & Eggs": {"milk", "cheese", "butter", "cream", "yogurt", "egg", "eggs", "mozzarella", "parmesan",
+                     "cheddar", "feta", "ricotta"},
+    "Meat & Seafood": {"chicken", "beef", "pork", "bacon", "sausage", "ham", "turkey", "fish", "salmon",
+                       "tuna", "shrimp", "pepperoni", "meat", "steak"},
+    "Bakery": {"bread", "tortilla", "tortillas", "bagel", "buns", "muffin", "pita", "croissant", "naan",
+               "flatbread", "pastry", "rolls", "crust"},
+    "Spices & Baking": {"salt", "cinnamon", "vanilla", "flour", "sugar", "cocoa", "baking", "paprika",
+                        "pepper", "oregano", "cumin", "seasoning", "yeast", "nutmeg", "chili"},
+    "Condiments & Sauces": {"sauce", "salsa", "mayo", "mustard", "ketchup", "honey", "syrup", "oil", "vinegar",
+                            "marinara", "dressing", "hummus", "pesto", "jam"},
+    "Pantry": {"rice", "pasta", "oats", "quinoa", "beans", "chips", "crackers", "cereal", "nuts", "breadcrumbs",
+               "marshmallows", "chocolate", "noodles", "granola", "peanut", "broth", "stock"},
+}
+# Names whose head noun points at the wrong aisle
+AISLE_OVERRIDES = {
+    "peanut butter": "Pantry",
+    "almond butter": "Pantry",
+    "bell pepper": "Produce",
+    "jalapeno": "Produce",
+    "ice cream": "Frozen",
+    "frozen fruit": "Frozen",
+}
+OTHER_AISLE = "Other"
+# Canonical names are singular, so match against singular keywords
+AISLES = {aisle: {lemmatize(word) for word in keywords} for aisle, keywords in AISLES.items()}
+AISLE_ORDER = tuple(AISLES) + ("Frozen", OTHER_AISLE)
+
+_step_patterns = {}
+
+def _step_pattern(name):
+    """Regex finding "<amount> [unit] name" in a step, allowing simple plurals."""
+    pattern = _step_patterns.get(name)
+    if pattern is None:
+        stem = name[:-1] if name.endswith("s") and not name.endswith("ss") else name
+        pattern = re.compile(
+            rf"{NUMBER}\s*(?:({UNIT})\b\.?\s*)?(?:of\s+)?{re.escape(stem)}(?:s|es)?\b", re.IGNORECASE
+        )
+        _step_patterns[name] = pattern
+    return pattern
+
+def aisle_for(name):
+    """Return the store aisle for an ingredient name."""
+    if name in AISLE_OVERRIDES:
+        return AISLE_OVERRIDES[name]
+    # Try the head noun first, so "cream cheese" is dairy and "chicken broth" is not meat
+    for word in reversed(name.split()):
+        word = lemmatize(word)
+        for aisle, keywords in AISLES.items():
+            if word in keywords:
+                return aisle
+    return OTHER_AISLE
+
+def recipe_items(recipe):
+    """Return [(name, aisle, family, unit, amount)] for one serving of a recipe.
+
+    Quantities come from the ingredient text itself ("1/4 cup cheese") or
+    from the first step that mentions the ingredient ("Add 2 tbsp milk").
+    amount is a float in the family's base unit, or None when the recipe
+    gives no quantity anywhere. Everything the aggregation needs is
+    resolved here once, so summing a plan is only dict updates.
+    """
+    items = []
+    for ingredient in recipe.ingredients:
+        amount, unit, name = split_quantity(ingredient)
+        if amount is None:
+            for step in recipe.steps:
+                match = _step_pattern(name).search(step)
+                if match:
+                    amount, unit = parse_amount(match.group(1)), match.group(2) and match.group(2).lower()
+                    break
+        family = None
+        if amount is not None:
+            family, unit, size = UNITS.get(unit, (unit, unit, 1))
+            amount = float(amount * size)
+        # Merge under the canonical name, so "2 eggs" and "1 egg, beaten" add up
+        name = canonical_name(ingredient)
+        items.append((name, aisle_for(name), family, unit, amount))
+    return items
+
+def _format_amount(amount):
+    """Render an amount as a kitchen fraction, snapped to the nearest eighth or third."""
+    amount = min((Fraction(round(amount * d), d) for d in (8, 3)), key=lambda snapped: abs(snapped - amount))
+    if amount == 0:
+        return "a pinch"
+    whole, rest = divmod(amount.numerator, amount.denominator)
+    if not rest:
+        return str(whole)
+    fraction = f"{rest}/{amount.denominator}"
+    return f"{whole} {fraction}" if whole else fraction
+
+def _with_unit(amount, unit):
+    text = _format_amount(amount)
+    if text == "a pinch":
+        return text
+    return f"{text} {unit}{'s' if amount > 1 and unit not in ('tsp', 'tbsp', 'oz', 'g') else ''}"
+
+@lru_cache(maxsize=4096)
+def format_quantity(family, unit, total):
+    """Render a summed amount; total is in the family's base unit."""
+    if family == "volume":
+        for name, size, minimum in VOLUME_DISPLAY:
+            if total >= minimum - 1e-9:
+                return _with_unit(total / size, name)
+    if family == "weight":
+        # Weights are shown in the unit the recipes used, grams as whole numbers
+        size = UNITS[unit][2]
+        if unit == "g":
+            return f"{round(total)} g"
+        return _with_unit(total / size, unit)
+    if unit is None:
+        return _format_amount(total)
+    return _with_unit(total, unit)
+
+def plan_titles(meal_plan):
+    """Flatten a {day: {meal: title}} plan (or a plain list of titles) into titles."""
+    if isinstance(meal_plan, dict):
+        return [title for meals in meal_plan.values() for title in meals.values() if title]
+    return [title for title in meal_plan if title]
+
+def aggregate(items_by_title, titles):
+    """Merge the line items of every planned recipe into an aisle-grouped list.
+
+    Returns {"aisles": {aisle: [{"name", "quantity", "recipes"}]}, "missing": [titles]}.
+    quantity is None when no recipe gave an amount for that ingredient.
+    """
+    totals = {}
+    units = {}
+    recipe_counts = {}
+    aisles_by_name = {}
+    missing = []
+
+    for title in titles:
+        items = items_by_title.get(title)
+        if items is None:
+            missing.append(title)
+            continue
+        for name, aisle, family, unit, amount in items:
+            recipe_counts[name] = recipe_counts.get(name, 0) + 1
+            aisles_by_name[name] = aisle
+            if amount is not None:
+                key = (name, family)
+                totals[key] = totals.get(key, 0.0) + amount
+                units[key] = unit
+
+    quantities = defaultdict(list)
+    for key in sorted(totals, key=lambda key: (key[0], str(key[1]))):
+        quantities[key[0]].append(format_quantity(key[1], units[key], round(totals[key], 6)))
+
+    aisles = {aisle: [] for aisle in AISLE_ORDER}
+    for name in sorted(recipe_counts):
+        aisles[aisles_by_name[name]].append({
+            "name": name,
+            "quantity": " + ".join(quantities[name]) or None,
+            "recipes": recipe_counts[name],
+        })
+    return {"aisles": {aisle: lines for aisle, lines in aisles.items() if lines}, "missing": missing}
+
+class ShoppingListBuilder:
+    """Builds shopping lists from meal plans through a title -> line items index."""
+
+    def __init__(self, recipes):
+        self.items_by_title = {}
+        for recipe in recipes:
+            # First recipe wins for duplicate titles, like recipes.find() in index.html
+            if recipe.title not in self.items_by_title:
+                self.items_by_title[recipe.title] = recipe_items(recipe)
+
+    @classmethod
+    def from_html(cls, html_file: str = "index.html"):
+        return cls(load_recipes(html_file))
+
+    def build(self, meal_plan):
+        """Return the aggregated shopping list for one meal plan."""
+        return aggregate(self.items_by_title, plan_titles(meal_plan))
+
+    def build_many(self, meal_plans, workers=None):
+        """Return one shopping list per plan, sharding large batches across processes."""
+        return run_sharded(
+            _build_shared, meal_plans, tables={"shopping_items": self.items_by_title}, workers=workers
+        )
+
+def _build_shared(meal_plan):
+    """Worker entry point for build_many."""
+    return aggregate(shared_table("shopping_items"), plan_titles(meal_plan))
+
+if __name__ == "__main__":
+    from meal_planner import plan_week
+    from recipe_index import RecipeIndex
+
+    print("Building a shopping list for an auto-planned week...")
+    index = RecipeIndex.from_html()
+    builder = ShoppingListBuilder(index.recipes)
+    shopping_list = builder.build(plan_week(index)["plan"])
+    for aisle, lines in shopping_list["aisles"].items():
+        print(f"\n{aisle}:")
+        for line in lines:
+            print(f"  {line['name']}: {line['quantity'] or 'as needed'} ({line['recipes']} recipes)")
@@ -0,0 +1,240 @@
+import os
+import re
+import json
+import html
+import hashlib
+import logging
+
+from recipe_snapshot import load_recipes
+from sharded_executor import run_sharded
+
+# Set up logging
+logging.basicConfig(level=logging.INFO)
+
+# Bump when the markup below changes so every page is rendered again
+TEMPLATE_VERSION = 1
+
+OUTPUT_DIR = "site"
+MANIFEST_NAME = "manifest.json"
+
+_PLACEHOLDER = re.compile(r"\{\{(\{?)\s*(\w+)\s*\}?\}\}")
+
+def compile_template(text):
+    """Compile a template with {{name}} (escaped) and {{{name}}} (raw HTML) fields.
+
+    The text is split once into literal chunks and field lookups, so
+    rendering is a single join.
+    """
+    parts = []
+    pos = 0
+    for match in _PLACEHOLDER.finditer(text):
+        parts.append((text[pos:match.start()], match.group(2), bool(match.group(1))))
+        pos = match.end()
+    tail = text[pos:]
+
+    def render(context):
+        out = []
+        for literal, name, raw in parts:
+            out.append(literal)
+            value = context[name]
+            out.append(str(value) if raw else html.escape(str(value)))
+        out.append(tail)
+        return "".join(out)
+
+    return render
+
+CARD = compile_template("""<div class="card">
+  <h3><a href="{{href}}">{{title}}</a></h3>
+  {{{nutrition}}}
+  <div class="chip-row"><span class="chip difficulty">{{difficulty}}</span><span class="chip">{{time}}</span><span class="chip">{{method}}</span></div>
+  <div class="section-title">Ingredients</div>
+  <div class="chip-row">{{{ingredients}}}</div>
+  <div class="section-title">Steps</div>
+  <ol>{{{steps}}}</ol>
+</div>""")
+
+NUTRITION = compile_template("""<div class="nutrition-section">
+    <div class="nutrition-header">Nutrition (per serving)</div>
+    <div class="nutrition-grid">
+      <div class="nutrition-item calories"><span class="nutrition-value">{{calories}}</span><span class="nutrition-label">Calories</span></div>
+      <div class="nutrition-item protein"><span class="nutrition-value">{{protein}}g</span><span class="nutrition-label">Protein</span></div>
+      <div class="nutrition-item carbs"><span class="nutrition-value">{{carbs}}g</span><span class="nutrition-label">Carbs</span></div>
+      <div class="nutrition-item fat"><span class="nutrition-value">{{fat}}g</span><span class="nutrition-label">Fat</span></div>
+    </div>
+    <div class="macro-chart">
+      <div class="macro-chart-header">Macro Breakdown</div>
+      <div class="pie-chart-container">
+        <div class="pie-chart"><div style="width: 80px; height: 80px; border-radius: 50%; background: conic-gradient(#34a853 0deg {{protein_deg}}deg, #4285f4 {{protein_deg}}deg {{carbs_deg}}deg, #ff9800 {{carbs_deg}}deg 360deg);"></div></div>
+        <div class="pie-legend">
+          <div class="legend-item"><div class="legend-color protein-color"></div><span class="legend-text">Protein: {{protein}}g</span></div>
+          <div class="legend-item"><div class="legend-color carbs-color"></div><span class="legend-text">Carbs: {{carbs}}g</span></div>
+          <div class="legend-item"><div class="legend-color fat-color"></div><span class="legend-text">Fat: {{fat}}g</span></div>
+        </div>
+      </div>
+    </div>
+  </div>""")
+
+PAGE = compile_template("""<!DOCTYPE html>
+<html lang="en">
+<head>
+  <meta charset="UTF-8" />
+  <meta name="viewport" content="width=device-width, initial-scale=1.0" />
+  <title>{{title}}</title>
+  <meta name="description" content="{{description}}" />
+  <link rel="stylesheet" href="{{stylesheet}}" />
+</head>
+<body>
+  <main class="container">
+    {{{header}}}
+    <div class="grid">
+{{{cards}}}
+    </div>
+  </main>
+</body>
+</html>
+""")
+
+def slugify(title):
+    """Turn a recipe title into a URL-safe file name."""
+    return re.sub(r"[^a-z0-9]+", "-", title.lower()).strip("-") or "recipe"
+
+def assign_slugs(recipes):
+    """Return one unique slug per recipe, led by its stable id ("r42-mug-cake").
+
+    The id keeps same-titled recipes apart and keeps every other page's URL
+    put when one of them is deleted. Recipes without an id yet fall back to
+    numbering repeated titles.
+    """
+    slugs = []
+    used = {}
+    for recipe in recipes:
+        base = slugify(recipe.title)
+        if recipe.id:
+            base = f"{slugify(recipe.id)}-{base}"
+        used[base] = used.get(base, 0) + 1
+        slugs.append(base if used[base] == 1 else f"{base}-{used[base]}")
+    return slugs
+
+def render_nutrition(nutrition):
+    if nutrition is None:
+        return ""
+    values = nutrition.to_dict()
+    macros = values["protein"] + values["carbs"] + values["fat"]
+    protein_deg = round(values["protein"] / macros * 360, 2) if macros else 0
+    carbs_deg = round((values["protein"] + values["carbs"]) / macros * 360, 2) if macros else 0
+    return NUTRITION(dict(values, protein_deg=protein_deg, carbs_deg=carbs_deg))
+
+def render_card(recipe, href):
+    """Render the same card markup renderCards builds on the client."""
+    return CARD({
+        "href": href,
+        "title": recipe.title,
+        "nutrition": render_nutrition(recipe.nutrition),
+        "difficulty": recipe.difficulty.label,
+        "time": recipe.time or "Quick",
+        "method": recipe.method.label,
+        "ingredients": "".join(f'<span class="chip">{html.escape(item)}</span>' for item in recipe.ingredients),
+        "steps": "".join(f"<li>{html.escape(step)}</li>" for step in recipe.steps),
+    })
+
+def render_recipe_page(job):
+    """Render one recipe's page; job is (recipe, slug, stylesheet). Runs inside the sharded workers."""
+    recipe, slug, stylesheet = job
+    return PAGE({
+        "title": f"{recipe.title} | Smart Meal Planner",
+        "description": f"{recipe.title}: {', '.join(recipe.ingredients)}",
+        "stylesheet": "../" + stylesheet,
+        "header": '<p><a href="../index.html">&larr; All recipes</a></p>',
+        "cards": render_card(recipe, f"{slug}.html"),
+    })
+
+def recipe_fingerprint(recipe, stylesheet):
+    """Hash everything a recipe page depends on."""
+    source = json.dumps([TEMPLATE_VERSION, stylesheet, recipe.to_dict()], sort_keys=True)
+    return hashlib.sha1(source.encode("utf-8")).hexdigest()
+
+def extract_stylesheet(html_file: str = "index.html"):
+    """Return the contents of the page's inline <style> block."""
+    with open(html_file, 'r', encoding='utf-8') as f:
+        content = f.read()
+    match = re.search(r"<style>(.*?)</style>", content, re.DOTALL)
+    return match.group(1).strip() + "\n" if match else ""
+
+def _write_if_changed(path, text):
+    """Write text to path unless the file already holds exactly that; return True when written."""
+    data = text.encode("utf-8")
+    try:
+        with open(path, 'rb') as f:
+            if f.read() == data:
+                return False
+    except OSError:
+        pass
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, 'wb') as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+    return True
+
+def build_site(html_file: str = "index.html", output_dir: str = OUTPUT_DIR, workers: int = None):
+    """Pre-render the recipe grid and one page per recipe into output_dir.
+
+    The stylesheet gets a content-hashed name so browsers can cache it
+    forever. Pages keep stable URLs; a manifest of per-page source
+    fingerprints means only recipes that changed are rendered again, and
+    pages of removed recipes are deleted. Returns the number of pages written.
+    """
+    recipes = load_recipes(html_file)
+    pages_dir = os.path.join(output_dir, "recipes")
+    os.makedirs(pages_dir, exist_ok=True)
+
+    css = extract_stylesheet(html_file)
+    stylesheet = f"styles.{hashlib.sha1(css.encode('utf-8')).hexdigest()[:10]}.css"
+    _write_if_changed(os.path.join(output_dir, stylesheet), css)
+
+    manifest_path = os.path.join(output_dir, MANIFEST_NAME)
+    try:
+        with open(manifest_path, 'r', encoding='utf-8') as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        manifest = {}
+    old_pages = manifest.get("pages", {})
+
+    slugs = assign_slugs(recipes)
+    fingerprints = [recipe_fingerprint(recipe, stylesheet) for recipe in recipes]
+    stale = [
+        i for i, (slug, fingerprint) in enumerate(zip(slugs, fingerprints))
+        if old_pages.get(slug) != fingerprint or not os.path.exists(os.path.join(pages_dir, f"{slug}.html"))
+    ]
+
+    rendered = run_sharded(render_recipe_page, [(recipes[i], slugs[i], stylesheet) for i in stale], workers=workers)
+    for i, page in zip(stale, rendered):
+        _write_if_changed(os.path.join(pages_dir, f"{slugs[i]}.html"), page)
+
+    for slug in set(old_pages) - set(slugs):
+        path = os.path.join(pages_dir, f"{slug}.html")
+        if os.path.exists(path):
+            os.remove(path)
+
+    grid = "\n".join(render_card(recipe, f"recipes/{slug}.html") for recipe, slug in zip(recipes, slugs))
+    _write_if_changed(os.path.join(output_dir, "index.html"), PAGE({
+        "title": "Smart Meal Planner",
+        "description": f"{len(recipes)} quick microwave, air fryer, oven and no-cook recipes",
+        "stylesheet": stylesheet,
+        "header": f"<h1>Smart Meal Planner</h1><p>{len(recipes)} recipes</p>",
+        "cards": grid,
+    }))
+
+    for name in os.listdir(output_dir):
+        if name.startswith("styles.") and name.endswith(".css") and name != stylesheet:
+            os.remove(os.path.join(output_dir, name))
+
+    with open(manifest_path, 'w', encoding='utf-8') as f:
+        json.dump({"stylesheet": stylesheet, "pages": dict(zip(slugs, fingerprints))}, f, indent=1, sort_keys=True)
+
+    logging.info(f"✓ Rendered {len(stale)} of {len(recipes)} recipe pages into {output_dir}/")
+    return len(stale)
+
+if __name__ == "__main__":
+    print("Pre-rendering recipe pages...")
+    build_site()
+    print("Done!")
@@ -0,0 +1,28 @@
+import pytest
+
+PAGE_HEAD = "<!DOCTYPE html>\n<html>\n<body>\n<script>\n        const recipes = [\n"
+PAGE_TAIL = "        ];\n        renderRecipes(recipes);\n</script>\n</body>\n</html>\n"
+
+def _recipe_line(title, category="breakfast", method="microwave", ingredients=("2 eggs",), steps=("Cook.",),
+                **extra):
+    """Return one recipe object literal in the layout index.html uses."""
+    ingredients = ", ".join(f'"{item}"' for item in ingredients)
+    steps = ", ".join(f'"{step}"' for step in steps)
+    fields = "".join(f', {name}: "{value}"' for name, value in extra.items())
+    return (f'{{ title: "{title}", category: "{category}", method: "{method}", ingredients: [{ingredients}], '
+            f'steps: [{steps}]{fields} }}')
+
+@pytest.fixture
+def recipe_line():
+    """Return a function building one recipe object literal from keyword fields."""
+    return _recipe_line
+
+@pytest.fixture
+def write_page(tmp_path):
+    """Return a function writing an index.html-like page around the given object literals."""
+    def write(*objects, name="index.html"):
+        path = tmp_path / name
+        body = "".join(f"            {obj},\n" for obj in objects)
+        path.write_bytes((PAGE_HEAD + body + PAGE_TAIL).encode("utf-8"))
+        return str(path)
+    return write
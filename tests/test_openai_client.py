@@ -0,0 +1,165 @@
+import json
+import asyncio
+
+import pytest
+
+import openai_client
+from openai_client import AsyncOpenAIClient, DeadlineExceeded, OpenAIError
+
+class StubServer:
+    """A local HTTP/1.1 server answering each request with the next canned response.
+
+    A response is raw bytes, or None to never answer. requests records
+    (connection number, request line, body) for every request read.
+    """
+
+    def __init__(self, responses):
+        self.responses = list(responses)
+        self.requests = []
+        self.connections = 0
+
+    async def __aenter__(self):
+        self.server = await asyncio.start_server(self._serve, "127.0.0.1", 0)
+        self.port = self.server.sockets[0].getsockname()[1]
+        return self
+
+    async def __aexit__(self, *exc_info):
+        self.server.close()
+        await self.server.wait_closed()
+
+    def client(self, **kwargs):
+        return AsyncOpenAIClient(api_key="test-key", base_url=f"http://127.0.0.1:{self.port}/v1", **kwargs)
+
+    async def _serve(self, reader, writer):
+        self.connections += 1
+        connection = self.connections
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    return
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b"\r\n", b""):
+                        break
+                    name, _, value = line.decode("latin-1").partition(":")
+                    headers[name.strip().lower()] = value.strip()
+                body = await reader.readexactly(int(headers.get("content-length", 0)))
+                self.requests.append((connection, request_line.decode("latin-1").strip(), json.loads(body)))
+                response = self.responses.pop(0)
+                if response is None:
+                    await asyncio.sleep(3600)
+                writer.write(response)
+                await writer.drain()
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+def _json_response(data, status=200, headers=()):
+    body = json.dumps(data).encode("utf-8")
+    head = [f"HTTP/1.1 {status} Status", "Content-Type: application/json", f"Content-Length: {len(body)}", *headers]
+    return ("\r\n".join(head) + "\r\n\r\n").encode("latin-1") + body
+
+def _chunked_response(chunks, content_type="application/json"):
+    head = f"HTTP/1.1 200 OK\r\nContent-Type: {content_type}\r\nTransfer-Encoding: chunked\r\n\r\n".encode("latin-1")
+    body = b"".join(b"%x\r\n%s\r\n" % (len(chunk), chunk) for chunk in chunks)
+    return head + body + b"0\r\n\r\n"
+
+def _sse(*events):
+    return [f"data: {event}\n\n".encode("utf-8") for event in events]
+
+def _run(scenario):
+    return asyncio.run(scenario())
+
+def test_post_reads_chunked_body():
+    async def scenario():
+        async with StubServer([_chunked_response([b'{"choices": [{"message"', b': {"content": " hi "}}]}'])]) as server:
+            async with server.client() as client:
+                reply = await client.chat({"model": "m", "messages": []})
+        assert server.requests[0][1] == "POST /v1/chat/completions HTTP/1.1"
+        return reply
+
+    assert _run(scenario) == "hi"
+
+def test_connection_is_reused_between_requests():
+    async def scenario():
+        responses = [_json_response({"n": 1}), _chunked_response([b'{"n": 2}']), _json_response({"n": 3})]
+        async with StubServer(responses) as server:
+            async with server.client() as client:
+                results = [await client.post("/echo", {"i": i}) for i in range(3)]
+        return results, server.connections
+
+    results, connections = _run(scenario)
+    assert results == [{"n": 1}, {"n": 2}, {"n": 3}]
+    assert connections == 1
+
+def test_closed_connection_is_not_reused():
+    async def scenario():
+        responses = [_json_response({"n": 1}, headers=["Connection: close"]), _json_response({"n": 2})]
+        async with StubServer(responses) as server:
+            async with server.client() as client:
+                results = [await client.post("/echo", {}) for _ in range(2)]
+        return results, server.connections
+
+    assert _run(scenario) == ([{"n": 1}, {"n": 2}], 2)
+
+def test_rate_limit_waits_for_retry_after(monkeypatch):
+    monkeypatch.setattr(openai_client, "BACKOFF_BASE", 0.0)
+
+    async def scenario():
+        responses = [_json_response({"error": "slow down"}, 429, ["Retry-After: 0.2"]), _json_response({"ok": True})]
+        async with StubServer(responses) as server:
+            async with server.client() as client:
+                loop = asyncio.get_running_loop()
+                started = loop.time()
+                result = await client.post("/echo", {})
+                return result, loop.time() - started, len(server.requests)
+
+    result, elapsed, requests = _run(scenario)
+    assert result == {"ok": True}
+    assert requests == 2
+    assert elapsed >= 0.2
+
+def test_error_status_raises_after_retries(monkeypatch):
+    monkeypatch.setattr(openai_client, "BACKOFF_BASE", 0.0)
+    monkeypatch.setattr(openai_client, "MAX_RETRIES", 1)
+
+    async def scenario():
+        async with StubServer([_json_response({}, 503), _json_response({}, 503)]) as server:
+            async with server.client() as client:
+                await client.post("/echo", {})
+
+    with pytest.raises(OpenAIError) as error:
+        _run(scenario)
+    assert error.value.status == 503
+
+def test_deadline_covers_a_silent_server():
+    async def scenario():
+        async with StubServer([None]) as server:
+            async with server.client() as client:
+                await client.post("/echo", {}, timeout=0.2)
+
+    with pytest.raises(DeadlineExceeded):
+        _run(scenario)
+
+def test_stream_chat_yields_deltas():
+    events = _sse(json.dumps({"choices": [{"delta": {"content": "Hel"}}]}),
+                  json.dumps({"choices": [{"delta": {"content": "lo"}}]}), "[DONE]")
+
+    async def scenario():
+        async with StubServer([_chunked_response(events, "text/event-stream")]) as server:
+            async with server.client() as client:
+                return [text async for text in client.stream_chat({"model": "m", "messages": []})]
+
+    assert _run(scenario) == ["Hel", "lo"]
+
+def test_stream_chat_wraps_malformed_events():
+    async def scenario():
+        async with StubServer([_chunked_response(_sse("{not json", "[DONE]"), "text/event-stream")]) as server:
+            async with server.client() as client:
+                return [text async for text in client.stream_chat({"model": "m", "messages": []})]
+
+    with pytest.raises(OpenAIError, match="invalid event"):
+        _run(scenario)
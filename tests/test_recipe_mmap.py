@@ -0,0 +1,74 @@
+import os
+
+from recipe_mmap import field_text, insert_field, mapped_file, patch_recipes, replace_field, write_spliced
+from recipe_parser import read_recipes, scan_value
+
+def _apply(buf, edits):
+    for start, stop, replacement in sorted(edits, reverse=True):
+        buf = buf[:start] + replacement + buf[stop:]
+    return buf
+
+def _object(text):
+    buf = text.encode("utf-8")
+    stop, fields = scan_value(buf, 0, len(buf))
+    return buf, stop, fields
+
+def test_insert_field_keeps_padding_before_brace():
+    buf, end, _ = _object('{ title: "Toast", time: "3 min" }')
+    assert _apply(buf, [insert_field(buf, end, "id", "r1")]) == b'{ title: "Toast", time: "3 min", id: "r1" }'
+
+def test_insert_field_after_trailing_comma():
+    buf, end, _ = _object('{\n  title: "Toast",\n}')
+    assert _apply(buf, [insert_field(buf, end, "id", "r1")]) == b'{\n  title: "Toast", id: "r1"\n}'
+
+def test_insert_field_without_padding():
+    buf, end, _ = _object('{title: "Toast"}')
+    assert _apply(buf, [insert_field(buf, end, "id", "r1")]) == b'{title: "Toast", id: "r1"}'
+
+def test_replace_field_swaps_only_the_value():
+    buf, _, fields = _object("{ title: 'Toast', time: \"3 min\" }")
+    edit = replace_field(fields, "title", "French Toast")
+    assert _apply(buf, [edit]) == b'{ title: "French Toast", time: "3 min" }'
+
+def test_write_spliced_applies_edits_in_order(tmp_path):
+    path = str(tmp_path / "page.html")
+    buf = b"0123456789"
+    tmp = write_spliced(path, buf, [(1, 3, b"ab"), (5, 5, b"++"), (8, 10, b"")])
+    with open(tmp, "rb") as f:
+        assert f.read() == b"0ab34++567"
+    assert not os.path.exists(path)
+
+def test_patch_recipes_rewrites_only_changed_recipes(write_page, recipe_line):
+    path = write_page(recipe_line("Toast"), recipe_line("Soup", time="10 min"), recipe_line("Salad"))
+    with open(path, "rb") as f:
+        before = f.read()
+
+    def patch(buf, start, end, fields):
+        title = field_text(buf, fields, "title")
+        if title == "Toast":
+            return [insert_field(buf, end, "time", "5 min")]
+        if title == "Soup":
+            return [replace_field(fields, "time", "15 min")]
+        return None
+
+    assert patch_recipes(path, patch) == 2
+    with open(path, "rb") as f:
+        after = f.read()
+    assert after == before.replace(b'["Cook."] }', b'["Cook."], time: "5 min" }', 1).replace(b'"10 min"', b'"15 min"')
+    recipes, _ = read_recipes(path)
+    assert [(recipe.title, recipe.time) for recipe in recipes] == [("Toast", "5 min"), ("Soup", "15 min"),
+                                                                   ("Salad", "")]
+    assert [name for name in os.listdir(os.path.dirname(path)) if name.endswith(".tmp")] == []
+
+def test_patch_recipes_leaves_unchanged_file_alone(write_page, recipe_line):
+    path = write_page(recipe_line("Toast"))
+    stat = os.stat(path)
+    assert patch_recipes(path, lambda buf, start, end, fields: None) == 0
+    assert os.stat(path).st_ino == stat.st_ino
+    assert os.stat(path).st_mtime_ns == stat.st_mtime_ns
+
+def test_mapped_file_handles_empty_files(tmp_path):
+    path = tmp_path / "empty.html"
+    path.write_bytes(b"")
+    with mapped_file(str(path)) as buf:
+        assert buf == b""
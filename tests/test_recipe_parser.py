@@ -0,0 +1,99 @@
+import logging
+
+import pytest
+
+from recipe_models import Category, Method
+from recipe_parser import (
+    RecipeSyntaxError, decode_string, find_recipes_array, line_col, parse_recipes, read_recipes, scan_string,
+    scan_value, skip_space,
+)
+
+def _scan(text):
+    buf = text.encode("utf-8")
+    return buf, scan_value(buf, 0, len(buf))
+
+def test_skip_space_skips_comments():
+    buf = b"  // a comment\n  /* block\n comment */ {"
+    assert buf[skip_space(buf, 0, len(buf))] == ord("{")
+
+def test_unterminated_comment_is_reported():
+    with pytest.raises(RecipeSyntaxError, match="Unterminated comment") as error:
+        skip_space(b" /* never closed", 0, 16)
+    assert error.value.offset == 1
+
+def test_scan_string_honours_escaped_quotes():
+    buf = rb'"say \"hi\"\\" rest'
+    assert scan_string(buf, 0, len(buf)) == 14
+    buf = b"'it\\'s' rest"
+    assert scan_string(buf, 0, len(buf)) == 7
+
+def test_scan_string_rejects_unterminated_and_multiline_strings():
+    with pytest.raises(RecipeSyntaxError, match="Unterminated string"):
+        scan_string(b'"open', 0, 5)
+    with pytest.raises(RecipeSyntaxError, match="Line break inside string"):
+        scan_string(b'"one\ntwo"', 0, 9)
+
+def test_scan_value_returns_spans():
+    buf, (stop, fields) = _scan('{ title: "Toast", "servings": 2, tags: ["a", \'b\'], ok: true }')
+    assert stop == len(buf)
+    assert set(fields) == {"title", "servings", "tags", "ok"}
+    assert buf[slice(*fields["title"])] == b'"Toast"'
+    assert buf[slice(*fields["servings"])] == b"2"
+    assert [buf[slice(*span)] for span in fields["tags"]] == [b'"a"', b"'b'"]
+    assert buf[slice(*fields["ok"])] == b"true"
+
+@pytest.mark.parametrize("text, message", [
+    ('{ title "Toast" }', "Expected ':' after 'title'"),
+    ('{ title: "Toast" "x" }', "Expected ',' or '}' in object"),
+    ('["a" "b"]', "Expected ',' or ']' in array"),
+    ('{ title: "Toast",', "Unterminated object"),
+    ('{ title: @ }', "Unexpected character '@'"),
+])
+def test_scan_value_reports_syntax_errors(text, message):
+    with pytest.raises(RecipeSyntaxError, match=message):
+        _scan(text)
+
+def test_decode_string_unescapes():
+    buf = rb'"caf\u00e9 \x41\t\"q\" \\ \'"'
+    assert decode_string(buf, 0, len(buf)) == "caf\u00e9 A\t\"q\" \\ '"
+    buf = '"crème brûlée"'.encode("utf-8")
+    assert decode_string(buf, 0, len(buf)) == "crème brûlée"
+
+def test_line_col():
+    buf = b"ab\ncd\nef"
+    assert line_col(buf, 0) == (1, 1)
+    assert line_col(buf, 4) == (2, 2)
+    assert line_col(buf, 6) == (3, 1)
+
+def test_find_recipes_array():
+    buf = b"<script>const recipes = [];</script>"
+    assert buf[find_recipes_array(buf)] == ord("[")
+    with pytest.raises(RecipeSyntaxError, match="No `const recipes`"):
+        find_recipes_array(b"<script></script>")
+
+def test_parse_recipes_returns_object_offsets(write_page, recipe_line):
+    path = write_page(recipe_line("Toast", "breakfast", "oven"), recipe_line("Nachos", "lunch", "air-fryer"))
+    recipes, offsets = read_recipes(path)
+    assert [recipe.title for recipe in recipes] == ["Toast", "Nachos"]
+    assert (recipes[1].category, recipes[1].method) == (Category.LUNCH, Method.AIR_FRYER)
+    with open(path, "rb") as f:
+        buf = f.read()
+    objects = [buf[offsets[i]:offsets[i + 1]] for i in range(0, len(offsets), 2)]
+    assert objects == [recipe_line("Toast", "breakfast", "oven").encode(),
+                       recipe_line("Nachos", "lunch", "air-fryer").encode()]
+
+def test_parse_recipes_skips_bad_recipes(recipe_line, caplog):
+    buf = b"const recipes = [\n" + b",\n".join([
+        recipe_line("Toast").encode(), recipe_line("Soup", category="brunch").encode(),
+        b'{ category: "lunch" }', recipe_line("Salad").encode(),
+    ]) + b"\n];"
+    with caplog.at_level(logging.WARNING):
+        recipes, offsets = parse_recipes(buf)
+    assert [recipe.title for recipe in recipes] == ["Toast", "Salad"]
+    assert len(offsets) == 4
+    assert "Skipping recipe at line 3" in caplog.text
+    assert "Skipping recipe at line 4" in caplog.text
+
+def test_parse_recipes_raises_on_broken_literal():
+    with pytest.raises(RecipeSyntaxError, match="Unterminated recipes array"):
+        parse_recipes(b'const recipes = [{ title: "Toast" },')
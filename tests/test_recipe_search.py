@@ -0,0 +1,77 @@
+import os
+
+from recipe_models import Method, Recipe
+from recipe_parser import read_recipes
+from recipe_search import SearchIndex, parse_query, tokenize
+
+def _air_fryer(title, ingredients, steps):
+    return Recipe(title, method=Method.AIR_FRYER, ingredients=ingredients, steps=steps)
+
+def _catalogue():
+    """A catalogue shaped like index.html: "air fryer" is common, chicken less so."""
+    recipes = [
+        _air_fryer(f"Air Fryer Vegetables {i}", ["vegetables", "oil", "salt", "pepper"],
+                   ["Preheat air fryer.", "Toss vegetables with oil.", "Air fry 10 minutes.", "Season and serve."])
+        for i in range(110)
+    ]
+    recipes += [
+        Recipe(f"Oven Pasta Bake {i}", ingredients=["pasta", "cheese", "sauce"], steps=["Preheat oven.", "Bake 20 minutes."])
+        for i in range(190)
+    ]
+    recipes += [Recipe(f"Chicken Salad {i}", ingredients=["chicken", "lettuce"], steps=["Toss together."]) for i in range(30)]
+    for name in ("Gyro", "Taquitos", "Tenders Wrap"):
+        recipes.append(_air_fryer(
+            f"Air Fryer Chicken {name}", ["tortilla", "chicken", "vegetables", "sauce"],
+            ["Cook chicken in air fryer.", "Warm tortilla.", "Add chicken, vegetables, sauce.", "Roll up tightly."],
+        ))
+    return recipes
+
+def _titles(recipes, query):
+    index = SearchIndex.build(recipes)
+    return [recipes[position].title for position, _ in index.search(query)]
+
+def test_stem_joins_word_forms():
+    assert tokenize("Crispy baked") == tokenize("crisp bake")
+
+def test_parse_query_splits_phrases_and_prefixes():
+    terms, phrases, prefixes = parse_query('"peanut butter" choc* mug')
+    assert phrases == [tokenize("peanut butter")]
+    assert prefixes == ["choc"]
+    assert terms == tokenize("peanut butter mug")
+
+def test_every_term_beats_only_common_terms():
+    recipes = _catalogue()
+    recipes.append(_air_fryer(
+        "Weeknight Rice Bowl", ["chicken", "rice", "broccoli", "soy sauce", "garlic", "sesame seeds"],
+        ["Rinse the rice, then simmer it covered with twice its volume of water for 15 minutes.",
+         "Cut the chicken and broccoli into even bite-size pieces and toss them with the garlic.",
+         "Cook in the air fryer for 15 minutes, shaking the basket halfway, until crispy.",
+         "Whisk the soy sauce with a splash of water and toss everything together.",
+         "Serve over the rice and scatter the sesame seeds on top."],
+    ))
+    titles = _titles(recipes, "crispy air fryer chicken")
+    assert titles[0] == "Weeknight Rice Bowl"
+
+def test_catalogue_query_prefers_the_searched_dish():
+    # "crispy" appears once, in a hash brown recipe's steps; that alone must not outrank chicken
+    html_file = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "index.html")
+    recipes, _ = read_recipes(html_file)
+    titles = _titles(recipes, "crispy air fryer chicken")
+    assert "Chicken" in titles[0]
+    assert titles.index("Air Fryer Chicken Gyro") < titles.index("Air Fryer Hash Brown Waffles")
+
+def test_phrase_must_match_in_order():
+    recipes = [
+        Recipe("Peanut Butter Toast", ingredients=["peanut butter", "bread"]),
+        Recipe("Butter Peanut Mix", ingredients=["butter", "peanuts"]),
+    ]
+    index = SearchIndex.build(recipes)
+    assert [position for position, _ in index.search('"peanut butter"')] == [0]
+
+def test_saved_index_answers_prefix_queries(tmp_path):
+    recipes = [Recipe("Chocolate Mug Cake"), Recipe("Chocolate Chip Cookies"), Recipe("Banana Bread")]
+    path = str(tmp_path / "index.search")
+    SearchIndex.build(recipes).save(path)
+    index = SearchIndex.load(path)
+    assert {position for position, _ in index.search("choc*")} == {0, 1}
+    assert index.search("choc* mug")[0][0] == 0
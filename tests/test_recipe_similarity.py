@@ -0,0 +1,41 @@
+from recipe_diff import Fingerprints, diff_fingerprints
+from recipe_models import Method, Recipe
+from recipe_similarity import SimilarityIndex
+
+PANTRY = ["eggs", "milk", "cheese", "spinach", "bread", "butter", "chicken", "rice", "beans", "salsa", "oats"]
+
+def _catalogue(count):
+    recipes = []
+    for i in range(count):
+        ingredients = [PANTRY[(i + j * (i % 5 + 1)) % len(PANTRY)] for j in range(4)]
+        recipes.append(Recipe(f"Dish {i}", method=Method(i % 3), ingredients=ingredients, recipe_id=f"r{i + 1}"))
+    return recipes
+
+def _neighbours(index):
+    return [index.similar(item) for item in range(len(index))]
+
+def test_apply_changes_matches_a_rebuild():
+    old = _catalogue(60)
+    index = SimilarityIndex.build(old)
+    new = [recipe for position, recipe in enumerate(old) if position not in (5, 40)]
+    new[10] = Recipe(new[10].title, method=new[10].method, ingredients=["saffron", "rice", "chicken"],
+                     recipe_id=new[10].id)
+    new.append(Recipe("Dish 61", method=Method.OVEN, ingredients=["eggs", "cheese", "bread"], recipe_id="r61"))
+
+    diff = diff_fingerprints(Fingerprints.build(old), Fingerprints.build(new))
+    assert index.apply_changes(diff, new)
+    assert _neighbours(index) == _neighbours(SimilarityIndex.build(new))
+
+def test_apply_changes_refuses_reordered_catalogues():
+    old = _catalogue(20)
+    index = SimilarityIndex.build(old)
+    new = old[1:] + old[:1]
+    assert not index.apply_changes(diff_fingerprints(Fingerprints.build(old), Fingerprints.build(new)), new)
+    assert len(index) == 20
+
+def test_remove_renumbers_neighbours():
+    recipes = _catalogue(30)
+    index = SimilarityIndex.build(recipes)
+    for other in index.remove(0):
+        index.refresh(other)
+    assert _neighbours(index) == _neighbours(SimilarityIndex.build(recipes[1:]))
@@ -0,0 +1,89 @@
+import os
+
+import pytest
+
+import recipe_snapshot
+from recipe_snapshot import load_recipes, load_recipes_with_offsets, snapshot_path
+
+@pytest.fixture
+def parses(monkeypatch):
+    """Count the full parses the snapshot cache falls back to."""
+    calls = []
+    parse_recipes = recipe_snapshot.parse_recipes
+
+    def counting_parse(buf):
+        calls.append(len(buf))
+        return parse_recipes(buf)
+
+    monkeypatch.setattr(recipe_snapshot, "parse_recipes", counting_parse)
+    return calls
+
+def _titles(path):
+    return [recipe.title for recipe in load_recipes(path)]
+
+def _bump_mtime(path):
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10 ** 9))
+
+def test_snapshot_is_reused(write_page, recipe_line, parses):
+    path = write_page(recipe_line("Toast"), recipe_line("Soup"))
+    recipes, offsets = load_recipes_with_offsets(path)
+    assert os.path.exists(snapshot_path(path))
+    again, again_offsets = load_recipes_with_offsets(path)
+    assert [recipe.title for recipe in again] == ["Toast", "Soup"]
+    assert list(again_offsets) == list(offsets)
+    assert len(parses) == 1
+
+def test_touched_file_is_restamped_without_reparsing(write_page, recipe_line, parses):
+    path = write_page(recipe_line("Toast"))
+    load_recipes(path)
+    _bump_mtime(path)
+    assert _titles(path) == ["Toast"]
+    assert _titles(path) == ["Toast"]
+    assert len(parses) == 1
+    assert recipe_snapshot._read_header(snapshot_path(path))["mtime_ns"] == os.stat(path).st_mtime_ns
+
+def test_same_size_edit_rebuilds(write_page, recipe_line, parses):
+    path = write_page(recipe_line("Toast"))
+    load_recipes(path)
+    size = os.path.getsize(path)
+    write_page(recipe_line("Roast"))
+    _bump_mtime(path)
+    assert os.path.getsize(path) == size
+    assert _titles(path) == ["Roast"]
+    assert len(parses) == 2
+
+def test_size_change_rebuilds(write_page, recipe_line, parses):
+    path = write_page(recipe_line("Toast"))
+    load_recipes(path)
+    write_page(recipe_line("Toast"), recipe_line("Soup"))
+    assert _titles(path) == ["Toast", "Soup"]
+    assert len(parses) == 2
+
+def test_version_change_rebuilds(write_page, recipe_line, parses, monkeypatch):
+    path = write_page(recipe_line("Toast"))
+    load_recipes(path)
+    monkeypatch.setattr(recipe_snapshot, "SNAPSHOT_VERSION", recipe_snapshot.SNAPSHOT_VERSION + 1)
+    assert _titles(path) == ["Toast"]
+    assert len(parses) == 2
+
+@pytest.mark.parametrize("damage", [b"", b"not a pickle"])
+def test_unreadable_snapshot_rebuilds(write_page, recipe_line, parses, damage):
+    path = write_page(recipe_line("Toast"))
+    load_recipes(path)
+    with open(snapshot_path(path), "wb") as f:
+        f.write(damage)
+    assert _titles(path) == ["Toast"]
+    assert len(parses) == 2
+
+def test_truncated_payload_rebuilds(write_page, recipe_line, parses):
+    path = write_page(recipe_line("Toast"))
+    load_recipes(path)
+    snapshot = snapshot_path(path)
+    with open(snapshot, "rb") as f:
+        data = f.read()
+    # Keep the header readable so only the payload is damaged
+    with open(snapshot, "wb") as f:
+        f.write(data[:len(data) - 20])
+    assert _titles(path) == ["Toast"]
+    assert len(parses) == 2
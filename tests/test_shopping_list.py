@@ -0,0 +1,82 @@
+import pytest
+
+from recipe_models import Recipe
+from shopping_list import ShoppingListBuilder, aisle_for, format_quantity, plan_titles, recipe_items
+
+def _recipe(title, ingredients, steps=()):
+    return Recipe(title, ingredients=list(ingredients), steps=list(steps))
+
+def _lines(shopping_list):
+    return {line["name"]: (aisle, line["quantity"], line["recipes"])
+            for aisle, lines in shopping_list["aisles"].items() for line in lines}
+
+def test_recipe_items_read_quantities_from_text_and_steps():
+    recipe = _recipe("Omelette", ["2 eggs", "1/4 cup milk", "cheese", "flour"], ["Whisk in 2 tbsp flour."])
+    assert recipe_items(recipe) == [
+        ("egg", "Dairy & Eggs", None, None, 2.0),
+        ("milk", "Dairy & Eggs", "volume", "cup", 12.0),
+        ("cheese", "Dairy & Eggs", None, None, None),
+        ("flour", "Spices & Baking", "volume", "tbsp", 6.0),
+    ]
+
+def test_volumes_sum_across_units():
+    builder = ShoppingListBuilder([
+        _recipe("Pancakes", ["1/2 cup milk", "1 egg"]),
+        _recipe("Mug Cake", ["3 tbsp milk", "1 tsp vanilla"]),
+        _recipe("Latte", ["1 cup milk"]),
+    ])
+    lines = _lines(builder.build(["Pancakes", "Mug Cake", "Latte"]))
+    # 24 + 9 + 48 tsp of milk
+    assert lines["milk"] == ("Dairy & Eggs", "1 2/3 cups", 3)
+    assert lines["vanilla"] == ("Spices & Baking", "1 tsp", 1)
+
+def test_counts_merge_under_the_canonical_name():
+    builder = ShoppingListBuilder([_recipe("Scramble", ["2 eggs"]), _recipe("Toast", ["1 egg, beaten"])])
+    assert _lines(builder.build(["Scramble", "Toast"]))["egg"] == ("Dairy & Eggs", "3", 2)
+
+def test_incompatible_families_are_listed_separately():
+    builder = ShoppingListBuilder([
+        _recipe("Roux", ["2 tbsp flour"]), _recipe("Bread", ["100 g flour"]), _recipe("Pie", ["4 oz flour"]),
+    ])
+    # 4 oz of flour is 113.4 g, which joins the 100 g and is shown in the unit the last recipe used
+    assert _lines(builder.build(["Roux", "Bread", "Pie"]))["flour"] == ("Spices & Baking", "2 tbsp + 7 1/2 oz", 3)
+
+def test_unquantified_ingredients_have_no_quantity():
+    builder = ShoppingListBuilder([_recipe("Nachos", ["chips", "salsa"])])
+    assert _lines(builder.build(["Nachos", "Nachos"]))["chip"] == ("Pantry", None, 2)
+
+def test_plan_dict_and_missing_titles():
+    builder = ShoppingListBuilder([_recipe("Toast", ["2 slices bread"])])
+    plan = {"Monday": {"breakfast": "Toast", "lunch": None}, "Tuesday": {"breakfast": "Waffles"}}
+    assert plan_titles(plan) == ["Toast", "Waffles"]
+    shopping_list = builder.build(plan)
+    assert shopping_list["missing"] == ["Waffles"]
+    assert _lines(shopping_list) == {"bread": ("Bakery", "2 slices", 1)}
+
+def test_first_recipe_wins_for_duplicate_titles():
+    builder = ShoppingListBuilder([_recipe("Toast", ["1 slice bread"]), _recipe("Toast", ["3 slices bread"])])
+    assert _lines(builder.build(["Toast"]))["bread"] == ("Bakery", "1 slice", 1)
+
+def test_build_many_matches_build():
+    builder = ShoppingListBuilder([_recipe("Toast", ["1 slice bread"]), _recipe("Soup", ["1 can beans"])])
+    plans = [["Toast"], ["Toast", "Soup"], ["Soup", "Pizza"]]
+    assert builder.build_many(plans, workers=1) == [builder.build(plan) for plan in plans]
+
+@pytest.mark.parametrize("family, unit, total, expected", [
+    ("volume", "tsp", 1.5, "1 1/2 tsp"),
+    ("volume", "tsp", 6.0, "2 tbsp"),
+    ("volume", "cup", 16.0, "1/3 cup"),
+    ("volume", "tsp", 0.01, "a pinch"),
+    ("weight", "g", 250.4, "250 g"),
+    ("weight", "lb", 453.59, "1 lb"),
+    ("can", "can", 2.0, "2 cans"),
+    (None, None, 2.5, "2 1/2"),
+])
+def test_format_quantity(family, unit, total, expected):
+    assert format_quantity(family, unit, total) == expected
+
+def test_aisle_uses_head_noun_and_overrides():
+    assert aisle_for("cream cheese") == "Dairy & Eggs"
+    assert aisle_for("chicken broth") == "Pantry"
+    assert aisle_for("peanut butter") == "Pantry"
+    assert aisle_for("strawberry") == "Produce"
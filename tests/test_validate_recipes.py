@@ -0,0 +1,73 @@
+import pytest
+
+from recipe_parser import find_recipes_array
+from validate_recipes import chunk_bounds, validate_file, validate_range
+
+def _read(path):
+    with open(path, "rb") as f:
+        return f.read()
+
+def _multiline(title):
+    # A nested object on its own line looks like the start of a recipe to the chunker
+    return (f'{{ title: "{title}", category: "lunch", method: "oven", ingredients: ["rice"], steps: ["Bake."],\n'
+            f'              extra:\n              {{ note: "serves 2" }} }}')
+
+def test_chunk_bounds_split_on_object_lines(write_page, recipe_line):
+    path = write_page(*(recipe_line(f"Recipe {i}") for i in range(20)))
+    buf = _read(path)
+    start = find_recipes_array(buf) + 1
+    bounds = chunk_bounds(buf, start, 300)
+    assert len(bounds) > 1
+    assert bounds[0][0] == start and bounds[-1][1] == len(buf)
+    for (_, stop, _), (next_start, _, next_line) in zip(bounds, bounds[1:]):
+        assert stop == next_start
+        assert buf[next_start:next_start + 9] == b'{ title: '
+        assert next_line == buf[:next_start].count(b"\n") + 1
+
+def test_validate_range_reports_where_it_stopped(write_page):
+    path = write_page(_multiline("Bake"), _multiline("Roast"))
+    buf = _read(path)
+    start = find_recipes_array(buf) + 1
+    # A range ending inside the first object still scans that object to its end
+    statuses, array_end, _, resume = validate_range(buf, start, start + 40)
+    assert [(status[3], status[4]) for status in statuses] == [("Bake", None)]
+    assert array_end is None
+    assert buf[resume:resume + 9] == b'{ title: '
+
+@pytest.mark.parametrize("chunk_bytes", [1, 50, 120, 400])
+def test_object_spanning_a_chunk_boundary_is_validated_once(write_page, recipe_line, chunk_bytes):
+    path = write_page(*(_multiline(f"Recipe {i}") if i % 2 else recipe_line(f"Recipe {i}") for i in range(8)))
+    whole = validate_file(path, workers=1, incremental=False)
+    assert whole.ok and whole.recipes == 8
+    chunked = validate_file(path, workers=1, chunk_bytes=chunk_bytes, incremental=False)
+    assert chunked.statuses == whole.statuses
+    assert chunked.ok
+
+def test_chunked_errors_match_a_single_chunk(write_page, recipe_line):
+    path = write_page(
+        recipe_line("Toast"), _multiline("Bake"), recipe_line("Soup", category="brunch"),
+        '{ title: "Broken", steps ["x"] }', _multiline("Roast"), recipe_line("Salad"),
+    )
+    whole = validate_file(path, workers=1, incremental=False)
+    assert [status[4] is None for status in whole.statuses] == [True, True, False, False, True, True]
+    for chunk_bytes in (1, 64, 200):
+        assert validate_file(path, workers=1, chunk_bytes=chunk_bytes, incremental=False).statuses == whole.statuses
+
+def test_known_lines_are_skipped_on_the_next_run(write_page, recipe_line):
+    path = write_page(recipe_line("Toast"), recipe_line("Soup"), _multiline("Bake"))
+    first = validate_file(path, workers=1, chunk_bytes=64)
+    second = validate_file(path, workers=1, chunk_bytes=64)
+    # Known-good lines are accepted without decoding their title
+    assert [status[3] for status in first.statuses] == ["Toast", "Soup", "Bake"]
+    assert [status[3] for status in second.statuses] == [None, None, "Bake"]
+    assert second.ok
+
+def test_invalid_utf8_is_reported(write_page, recipe_line):
+    path = write_page(recipe_line("Toast"), recipe_line("Soup"))
+    buf = _read(path).replace(b"Soup", b"So\xffp")
+    with open(path, "wb") as f:
+        f.write(buf)
+    for chunk_bytes in (1, 1 << 18):
+        report = validate_file(path, workers=1, chunk_bytes=chunk_bytes, incremental=False)
+        assert [status[4] is None for status in report.statuses if status[4] != "Invalid UTF-8"] == [True, False]
+        assert [status[4] for status in report.errors].count("Invalid UTF-8") == 1
@@ -1,9 +1,12 @@
 import requests
 import os
-import re
 import logging
 import time
 
+from memo_cache import BoundedCache, memoize
+from recipe_mmap import field_text, insert_field, patch_recipes
+from recipe_snapshot import load_recipes
+
 # Set up logging
 logging.basicConfig(level=logging.INFO)
 
@@ -14,16 +17,13 @@ UNSPLASH_API = "https://api.unsplash.com/search/photos"
 SAVE_DIR = "static/recipe_images"
 os.makedirs(SAVE_DIR, exist_ok=True)
 
+# Search answers kept in memory, per search term; many titles map to the same term
+SEARCH_CACHE_ENTRIES = 10000
+SEARCH_CACHE_BYTES = 4 << 20
+
 def extract_recipes_from_html(html_file: str = "index.html"):
     """Extract all recipe titles from your HTML file."""
-    with open(html_file, 'r', encoding='utf-8') as f:
-        content = f.read()
-    
-    # Find all recipe objects
-    recipe_pattern = r'title:\s*"([^"]+)"'
-    titles = re.findall(recipe_pattern, content)
-    
-    return titles
+    return [recipe.title for recipe in load_recipes(html_file)]
 
 def get_food_image_url(recipe_name):
     """Get a food image URL from Unsplash."""
@@ -79,8 +79,11 @@ def get_food_image_url(recipe_name):
             break
     
     # Add "food" to ensure we get food-related images
-    search_term = f"{search_term} food"
-    
+    return search_image(f"{search_term} food")
+
+@memoize(BoundedCache("unsplash_search", SEARCH_CACHE_ENTRIES, SEARCH_CACHE_BYTES))
+def search_image(search_term):
+    """Return the URL of the first Unsplash result for search_term, or None on failure."""
     try:
         # Use Unsplash's public API (no key required for basic usage)
         params = {
@@ -100,7 +103,7 @@ def get_food_image_url(recipe_name):
             logging.warning(f"Unsplash API returned status {response.status_code}")
             
     except Exception as e:
-        logging.error(f"Error fetching image for {recipe_name}: {e}")
+        logging.error(f"Error fetching image for {search_term}: {e}")
     
     return None
 
@@ -157,33 +160,19 @@ def generate_images_for_all_recipes(html_file: str = "index.html"):
 
 def update_html_with_images(recipes_with_images, html_file: str = "index.html"):
     """Update HTML file to include generated images."""
-    with open(html_file, 'r', encoding='utf-8') as f:
-        content = f.read()
-    
     # Create a mapping of titles to image paths
     title_to_image = {recipe["title"]: recipe.get("image_path", "") for recipe in recipes_with_images}
     
-    def add_image_to_recipe(match):
-        recipe_text = match.group(0)
-        title_match = re.search(r'title:\s*"([^"]+)"', recipe_text)
-        
-        if title_match:
-            title = title_match.group(1)
-            image_path = title_to_image.get(title, "")
-            
-            if image_path and 'image:' not in recipe_text:
-                # Add image property before the closing brace
-                recipe_text = recipe_text.rstrip(' },') + f', image: "{image_path}" }},'
+    def add_image_to_recipe(buf, start, end, fields):
+        image_path = title_to_image.get(field_text(buf, fields, "title"), "")
         
-        return recipe_text
-    
-    # Pattern to match recipe objects
-    recipe_pattern = r'{\s*title:\s*"[^"]+",\s*category:\s*"[^"]+",\s*method:\s*"[^"]+",\s*ingredients:\s*\[[^\]]+\],\s*steps:\s*\[[^\]]+\],\s*difficulty:\s*"[^"]+",\s*time:\s*"[^"]+"\s*},'
-    
-    updated_content = re.sub(recipe_pattern, add_image_to_recipe, content)
+        if image_path and "image" not in fields:
+            # Add image property before the closing brace
+            return [insert_field(buf, end, "image", image_path)]
+        return None
     
-    with open(html_file, 'w', encoding='utf-8') as f:
-        f.write(updated_content)
+    # Unchanged text is streamed straight from the mapped file
+    patch_recipes(html_file, add_image_to_recipe)
     
     logging.info("Updated HTML file with image references")
 
@@ -0,0 +1,322 @@
+import os
+import sys
+import hashlib
+import logging
+from array import array
+
+from recipe_mmap import mapped_file
+from recipe_models import Category, Difficulty, Method, Nutrition, parse_code
+from recipe_parser import RecipeSyntaxError, decode_string, find_recipes_array, scan_object, skip_space
+from recipe_snapshot import CACHE_DIR
+from sharded_executor import run_sharded, shared_table
+
+# Set up logging
+logging.basicConfig(level=logging.INFO)
+
+# Files are split into chunks of about this many bytes, validated in parallel when there are enough of them
+CHUNK_BYTES = 1 << 18
+
+_OPEN_BRACE, _CLOSE_BRACKET, _COMMA = ord("{"), ord("]"), ord(",")
+_INDENT = frozenset(b" \t")
+_QUOTE_BYTES = frozenset(b"\"'")
+
+# What the parser needs from each recipe object, mirroring recipe_from_fields
+REQUIRED_FIELDS = ("title", "category", "method")
+STRING_FIELDS = ("title", "category", "method", "difficulty", "time", "image", "nutrition", "id")
+LIST_FIELDS = ("ingredients", "steps")
+_LABELS = {"category": Category, "method": Method, "difficulty": Difficulty}
+
+# Bump when check_fields changes; known-good lines from older rules then stop matching
+RULES_VERSION = 1
+_RULES_KEY = hashlib.blake2b(repr((RULES_VERSION, [
+    member.label for enum_cls in _LABELS.values() for member in enum_cls
+])).encode("utf-8"), digest_size=16).digest()
+
+def _is_string(buf, value):
+    return isinstance(value, tuple) and buf[value[0]] in _QUOTE_BYTES
+
+def check_fields(buf, fields):
+    """Return why the scanned fields would not load as a recipe, or None.
+
+    Only the short fields are decoded; ingredient and step strings are
+    type-checked, which is what makes this cheaper than building the Recipe.
+    """
+    for name in REQUIRED_FIELDS:
+        if name not in fields:
+            return f"Missing {name}"
+    for name in STRING_FIELDS:
+        if name in fields and not _is_string(buf, fields[name]):
+            return f"{name} must be a string"
+    for name in LIST_FIELDS:
+        value = fields.get(name, [])
+        if not isinstance(value, list) or not all(_is_string(buf, item) for item in value):
+            return f"{name} must be a list of strings"
+    try:
+        for name, enum_cls in _LABELS.items():
+            if name in fields:
+                parse_code(enum_cls, decode_string(buf, *fields[name]))
+        if "nutrition" in fields:
+            nutrition = decode_string(buf, *fields["nutrition"])
+            if nutrition:
+                Nutrition.from_json(nutrition)
+    except ValueError as e:
+        return str(e)
+    return None
+
+def line_digest(data):
+    """Return the known-good key of one line's bytes under the current rules."""
+    return int.from_bytes(hashlib.blake2b(data, digest_size=8, key=_RULES_KEY).digest(), "little")
+
+def _line_end(buf, pos, end):
+    newline = buf.find(b"\n", pos, end)
+    return end if newline == -1 else newline
+
+def _next_line_object(buf, pos, end):
+    """Return the offset of the next line, at or after pos, whose first character is '{', or -1."""
+    while pos < end:
+        newline = buf.find(b"\n", pos, end)
+        if newline == -1:
+            return -1
+        start = newline + 1
+        while start < end and buf[start] in _INDENT:
+            start += 1
+        if start < end and buf[start] == _OPEN_BRACE:
+            return start
+        pos = start
+    return -1
+
+class _Lines:
+    """Turns increasing byte offsets into (line, column) without rescanning from the top."""
+
+    def __init__(self, buf, offset, line):
+        self.buf = buf
+        self.offset = offset
+        self.line = line
+
+    def locate(self, offset):
+        # Slicing a mapped file copies the bytes, which is still far cheaper than a find() per line
+        self.line += self.buf[self.offset:offset].count(b"\n")
+        self.offset = offset
+        return self.line, offset - self.buf.rfind(b"\n", 0, offset)
+
+def validate_range(buf, start, stop, line=1, known=None):
+    """Validate the recipe objects that begin in buf[start:stop]; line is the line number at start.
+
+    Returns (statuses, array_end, good, resume) where statuses holds one
+    (offset, line, column, title, error) tuple per object, error being None
+    for a usable recipe, and array_end is the offset of the closing ']' if
+    it was reached, else None. After a syntax error scanning resumes at the
+    next line that opens an object, so one bad recipe cannot hide the rest.
+    resume is where scanning stopped; it lies past stop when the last
+    object ran over the end of the range.
+
+    good lists the line_digest of every line that holds exactly one usable
+    object and its comma. Lines whose digest is in known are accepted
+    without being tokenized again.
+    """
+    end = len(buf)
+    lines = _Lines(buf, start, line)
+    statuses = []
+    good = []
+    pos = start
+    while True:
+        pos = skip_space(buf, pos, end)
+        if pos >= end:
+            return statuses, None, good, end
+        if buf[pos] == _CLOSE_BRACKET:
+            return statuses, pos, good, pos
+        if pos >= stop:
+            return statuses, None, good, pos
+        line, column = lines.locate(pos)
+        if buf[pos] != _OPEN_BRACE:
+            statuses.append((pos, line, column, None, "Expected recipe object"))
+            pos = _next_line_object(buf, pos, end)
+            if pos == -1:
+                return statuses, None, good, end
+            continue
+
+        line_end = _line_end(buf, pos, end)
+        digest = line_digest(buf[pos:line_end])
+        if known and digest in known:
+            statuses.append((pos, line, column, None, None))
+            good.append(digest)
+            pos = line_end
+            continue
+
+        try:
+            pos_after, fields = scan_object(buf, pos, end)
+        except RecipeSyntaxError as e:
+            error_line, error_column = _Lines(buf, pos, line).locate(e.offset) if e.offset >= pos else (line, column)
+            statuses.append((pos, line, column, None, f"{e.message} (line {error_line}, column {error_column})"))
+            pos = _next_line_object(buf, pos, end)
+            if pos == -1:
+                return statuses, None, good, end
+            continue
+        error = check_fields(buf, fields)
+        try:
+            title = decode_string(buf, *fields["title"]) if _is_string(buf, fields.get("title")) else None
+        except UnicodeDecodeError:
+            # The parser skips such a recipe; the chunk's _check_utf8 status points at the byte
+            title, error = None, error or "title is not valid UTF-8"
+        statuses.append((pos, line, column, title, error))
+        pos = pos_after
+
+        if error is None and pos < line_end and buf[pos] == _COMMA and not buf[pos + 1:line_end].strip():
+            good.append(digest)
+        pos = skip_space(buf, pos, end)
+        if pos < end and buf[pos] == _COMMA:
+            pos += 1
+        elif pos < end and buf[pos] != _CLOSE_BRACKET:
+            line, column = lines.locate(pos)
+            statuses.append((pos, line, column, title, "Expected ',' or ']' after recipe object"))
+            pos = _next_line_object(buf, pos, end)
+            if pos == -1:
+                return statuses, None, good, end
+
+def _check_utf8(buf, start, stop, line):
+    """Return a status for the first invalid UTF-8 byte in buf[start:stop], or None."""
+    try:
+        buf[start:stop].decode("utf-8")
+    except UnicodeDecodeError as e:
+        offset = start + e.start
+        return (offset, *_Lines(buf, start, line).locate(offset), None, "Invalid UTF-8")
+    return None
+
+def _validate_bounds(buf, bounds, known):
+    """Return validate_range's results for one chunk plus its _check_utf8 status."""
+    return (*validate_range(buf, *bounds, known=known), _check_utf8(buf, *bounds))
+
+def _validate_chunk(bounds):
+    with mapped_file(shared_table("validate_file")) as buf:
+        return _validate_bounds(buf, bounds, shared_table("validate_known"))
+
+def chunk_bounds(buf, start, chunk_bytes=CHUNK_BYTES):
+    """Split buf from start into (start, stop, line) ranges that each begin on a line opening an object."""
+    bounds = []
+    end = len(buf)
+    line = buf[:start].count(b"\n") + 1
+    while start < end:
+        guess = start + chunk_bytes
+        stop = _next_line_object(buf, guess, end) if guess < end else -1
+        if stop == -1:
+            bounds.append((start, end, line))
+            break
+        bounds.append((start, stop, line))
+        line += buf[start:stop].count(b"\n")
+        start = stop
+    return bounds
+
+class ValidationReport:
+    """Parse status of every object in a file's recipe literal."""
+
+    def __init__(self, path, statuses, title_keys):
+        self.path = path
+        self.statuses = statuses
+        self.title_keys = title_keys
+
+    @property
+    def errors(self):
+        return [status for status in self.statuses if status[4] is not None]
+
+    @property
+    def recipes(self):
+        return len(self.statuses) - len(self.errors)
+
+    @property
+    def ok(self):
+        return not self.errors and self.title_keys == len(self.statuses)
+
+    def summary(self):
+        return (f"{self.path}: {len(self.statuses)} objects, {self.recipes} usable recipes, "
+                f"{len(self.errors)} errors, {self.title_keys} title keys")
+
+    def format_errors(self):
+        lines = []
+        for offset, line, column, title, error in self.errors:
+            label = f" ({title})" if title else ""
+            lines.append(f"{self.path}:{line}:{column}: {error}{label}")
+        if self.title_keys != len(self.statuses):
+            lines.append(f"{self.path}: found {len(self.statuses)} objects but {self.title_keys} `title:` keys; "
+                         f"some recipes were merged or lost")
+        return lines
+
+def known_path(path: str = "index.html"):
+    """Return where the digests of path's known-good recipe lines are stored."""
+    directory, name = os.path.split(os.path.abspath(path))
+    return os.path.join(directory, CACHE_DIR, name + ".valid")
+
+def _load_known(path):
+    digests = array('Q')
+    try:
+        with open(path, 'rb') as f:
+            digests.frombytes(f.read())
+    except (OSError, ValueError):
+        return frozenset()
+    return frozenset(digests)
+
+def _save_known(path, digests):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, 'wb') as f:
+        array('Q', digests).tofile(f)
+    os.replace(tmp_path, path)
+
+def validate_file(path: str = "index.html", workers: int = None, chunk_bytes: int = CHUNK_BYTES,
+                  incremental: bool = True):
+    """Validate every recipe object in path, in parallel chunks for large files.
+
+    With incremental, lines that held a usable recipe on an earlier run are
+    not re-tokenized, so after a small edit only the touched lines are
+    scanned; pass incremental=False to check everything from scratch.
+    """
+    cache = known_path(path)
+    known = _load_known(cache) if incremental else frozenset()
+    with mapped_file(path) as buf:
+        try:
+            array_start = find_recipes_array(buf)
+        except RecipeSyntaxError as e:
+            return ValidationReport(path, [(e.offset, 1, 1, None, e.message)], 1)
+        bounds = chunk_bounds(buf, array_start + 1, chunk_bytes)
+        if len(bounds) == 1:
+            results = [_validate_bounds(buf, bounds[0], known)]
+        else:
+            results = run_sharded(_validate_chunk, bounds, tables={
+                "validate_file": os.path.abspath(path), "validate_known": known,
+            }, workers=workers, chunk_size=1)
+
+        statuses = []
+        good = []
+        array_end = None
+        resume = None
+        for (start, stop, line), result in zip(bounds, results):
+            # Chunks past the end of the array looked at ordinary script code
+            if array_end is not None and start > array_end:
+                break
+            chunk_statuses, chunk_end, chunk_good, chunk_resume, bad_utf8 = result
+            if resume is not None and resume > start:
+                # The previous chunk's last object ran over this chunk's first line, so this chunk
+                # began inside it; scan again from where that object ended
+                line += buf[start:resume].count(b"\n")
+                chunk_statuses, chunk_end, chunk_good, chunk_resume = validate_range(buf, resume, stop, line, known)
+            statuses.extend(chunk_statuses)
+            if bad_utf8:
+                statuses.append(bad_utf8)
+            good.extend(chunk_good)
+            if chunk_end is not None:
+                array_end = chunk_end
+            resume = chunk_resume
+        if array_end is None:
+            statuses.append((len(buf), *_Lines(buf, 0, 1).locate(len(buf)), None, "Unterminated recipes array"))
+            array_end = len(buf)
+        title_keys = buf[array_start:array_end].count(b"title:")
+    if incremental and set(good) != known:
+        _save_known(cache, good)
+    return ValidationReport(path, statuses, title_keys)
+
+if __name__ == "__main__":
+    # Usable as a git pre-commit hook: `python validate_recipes.py index.html` fails on any bad object
+    report = validate_file(*sys.argv[1:2])
+    for message in report.format_errors():
+        print(message)
+    print(report.summary())
+    sys.exit(0 if report.ok else 1)